@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""Mikro ölçümler: istemcinin sıcak yolları, eski yollarla yan yana.
+
+Her ölçüm chatclient paketinin kendi kodunu, eski yolun aynısını yapan
+küçük bir başvuru uygulamasıyla karşılaştırır. Makine gürültülü olabilir:
+karşılaştırılan yollar sırayla koşar ve turların en iyisi alınır.
+
+    python3 bench.py framer                  # satır bölme: split() ↔ LineFramer
+    python3 bench.py framer --rounds 15
+    python3 bench.py upload --mb 512         # dosya gövdesi: read+sendall ↔ readinto ↔ sendfile
+    python3 bench.py dispatch                # gelen satır yönlendirme: startswith zinciri ↔ tablo
+    python3 bench.py media --corpus ~/Resimler   # /send öncesi küçültme: bayt ve uçtan uca süre
+    python3 bench.py zlib --trace oturum.txt     # zlib akışı: oran ve CPU ("< " gelen, "> " giden)
+    python3 bench.py codec --rounds 15           # frame2 ile v1: bayt, çözme ve soket üstü alım
+"""
+import argparse, asyncio, glob, os, random, socket, sys, tempfile, threading, time, zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chatclient.protocol import FRAME_BUF, ZLIB_LEVEL, LineFramer, as_message, frame_lines
+from chatclient.uploads import send_buffered, stream_file
+
+def best(fns, rounds):
+    """fns: ad → çağrılabilir; sırayla koşturur, her birinin en iyi süresi."""
+    out = dict.fromkeys(fns, float("inf"))
+    for _ in range(rounds):
+        for name, fn in fns.items():
+            t0 = time.perf_counter(); fn()
+            out[name] = min(out[name], time.perf_counter() - t0)
+    return out
+
+def size_text(n):
+    return f"{n >> 20} MiB" if n >= 1 << 20 else f"{n >> 10} KiB"
+
+# ===== Satır bölme =====
+def split_lines(chunks):
+    # eski recv_loop: buf += data, sonra her satırda buf.split(b"\n", 1)
+    buf, n = b"", 0
+    for data in chunks:
+        buf += data
+        while b"\n" in buf:
+            line, buf = buf.split(b"\n", 1); n += 1
+    return n
+
+def framer_lines(chunks):
+    f, n = LineFramer(), 0
+    for data in chunks:
+        f.feed(data)
+        for _ in f.lines(): n += 1
+    return n
+
+def bench_framer(args):
+    line = b"NOTICE:sunucu duyurusu: bu gece 02:00-03:00 arasi bakim var\n"
+    print(f"[framer] tek recv'de gelen patlama, {len(line)} baytlık NOTICE satırları")
+    print(f"  {'patlama':9} {'split()':>21} {'LineFramer':>21}")
+    for burst in (1 << 10, 16 << 10, 128 << 10, 1 << 20):
+        chunks = [line * (burst // len(line))]
+        lines = burst // len(line)
+        assert split_lines(chunks) == framer_lines(chunks) == lines
+        t = best({"split": lambda: split_lines(chunks), "framer": lambda: framer_lines(chunks)},
+                 args.rounds)
+        print(f"  {size_text(burst):9} {lines / t['split'] / 1e6:10.2f}M satır/sn "
+              f"{lines / t['framer'] / 1e6:10.2f}M satır/sn")
+
+# ===== Dosya gönderimi =====
+class Sink:
+    """Yerel sahte alıcı: bağlantı başına gelen baytları sayıp atar."""
+    def __init__(self):
+        self.srv = socket.create_server(("127.0.0.1", 0))
+        self.got = []
+
+    def send(self, body):
+        """Yeni bağlantı açar, body(sock) ile yazar; alıcı her şeyi okuyunca döner."""
+        t = threading.Thread(target=self._take); t.start()
+        sock = socket.create_connection(self.srv.getsockname())
+        try: body(sock)
+        finally: sock.close()
+        t.join()
+        return self.got[-1]
+
+    def _take(self):
+        c, _ = self.srv.accept()
+        buf, n = bytearray(1 << 20), 0
+        with c:
+            while k := c.recv_into(buf): n += k
+        self.got.append(n)
+
+def read_sendall(sock, f, offset, count):
+    # eski send_file: 64 KiB read() + sendall
+    f.seek(offset)
+    for chunk in iter(lambda: f.read(65536), b""): sock.sendall(chunk)
+
+def bench_upload(args):
+    size = args.mb << 20
+    fd, path = tempfile.mkstemp(prefix="bench-", suffix=".bin")
+    block = random.Random(5).randbytes(1 << 20)
+    with os.fdopen(fd, "wb") as f:
+        for _ in range(args.mb): f.write(block)
+    sink = Sink()
+    paths = {"read(64K) + sendall (eski)": read_sendall,
+             "readinto tampon (yedek yol)": send_buffered,
+             "socket.sendfile": stream_file}
+    try:
+        with open(path, "rb") as f:
+            runs = {name: (lambda fn=fn: sink.send(lambda s: fn(s, f, 0, size))) for name, fn in paths.items()}
+            t = best(runs, args.rounds)
+        assert set(sink.got) == {size}
+        print(f"[upload] {args.mb} MiB dosya → yerel alıcı, {args.rounds} turun en iyisi")
+        for name in paths: print(f"  {name:28} {size / t[name] / 1e6:7.0f} MB/sn")
+    finally:
+        os.remove(path); sink.srv.close()
+
+# ===== Gelen satır yönlendirme =====
+def old_tkm(line):
+    # eski render_tkm_line: 11 önek denemesi
+    if line.startswith("TKM:CHALLENGE"):
+        return f"[TKM] Meydan okuma geldi: {line.split('from=', 1)[1]}\n      Kabul: /tkm kabul  |  Red: /tkm red"
+    if line.startswith("TKM:CONFIRM"): return "[TKM] Meydan okuma kabul edildi. Her turda /tkm seç tas|kagit|makas"
+    if line.startswith("TKM:PROMPT"): return f"[TKM] Tur {line.split('round=', 1)[1]} → /tkm seç tas|kagit|makas"
+    if line.startswith("TKM:WAITING"): return "[TKM] Rakip seçimi bekleniyor…"
+    if line.startswith("TKM:DECLINE"): return f"[TKM] {line.split('by=', 1)[1]} meydan okumayı reddetti."
+    if line.startswith("TKM:CANCEL"): return f"[TKM] Oyun iptal edildi (by {line.split('by=', 1)[1]})."
+    if line.startswith("TKM:ROUND"):
+        return line.replace("TKM:ROUND", "[TKM Tur]").replace(" winner=", " kazanan=")
+    if line.startswith("TKM:RESULT"):
+        return line.replace("TKM:RESULT", "[TKM Maç]").replace("match", "Maç").replace(" winner=", " kazanan=")
+    if line.startswith("TKM:SKOR"): return "[TKM] Skorlar: " + line.split(" ", 1)[1]
+    if line.startswith("TKM:INFO"): return "[TKM] " + line.split(" ", 1)[1]
+    if line.startswith("TKM:ERR"): return "[TKM:Hata] " + line.split(" ", 1)[1]
+    return line
+
+def old_handle_line(text, ui, transfers, meter):
+    # eski recv_loop gövdesi: startswith/== zinciri, FILEURL'de alan başına tarama
+    if text.startswith("PONG "):
+        rtt = meter.on_pong(text)
+        if rtt is not None: ui.set_latency(f"{rtt * 1000:.0f} ms")
+        return True
+    if text.startswith("FILE2:"): transfers.on_reply(text); return True
+    if text.startswith("TKM:"): ui.write(old_tkm(text), log=True); return True
+    if text.startswith("FILEURL "):
+        info = text.split()
+        from_ = next((p.split("=", 1)[1] for p in info if p.startswith("from=")), "?")
+        name = next((p.split("=", 1)[1] for p in info if p.startswith("name=")), "?")
+        url = next((p.split("=", 1)[1] for p in info if p.startswith("url=")), "?")
+        ui.write(f"[Dosya] {from_} → {name}\n        İndir: {url}", log=True)
+        return True
+    if text.startswith("[FILE] "): ui.write(text, log=True); return True
+    if text == "CTRL:CLEAR": ui.clear("— Admin sohbet penceresini temizledi —"); return True
+    if text.startswith("USERLIST:"):
+        ui.set_users([u for u in text.split(":", 1)[1].split(",") if u]); return True
+    if text == "CTRL:KICKED": ui.say("[Sistem] Admin tarafından çıkarıldınız."); return False
+    if text.startswith("NOTICE:"): ui.say("[Sunucu] " + text.split(":", 1)[1], log=True); return True
+    ui.say(text, log=True)
+    return True
+
+class NullUI:
+    """Ekran yerine: çağrıları yutar, yalnızca yönlendirme maliyeti ölçülür."""
+    previews = None
+    def say(self, text, log=False): pass
+    write = say
+    def clear(self, note=None): pass
+    def set_users(self, users): pass
+    def user_join(self, name): pass
+    def user_part(self, name): pass
+    def set_latency(self, text): pass
+
+class NullLink:
+    def on_pong(self, text): return None
+    def on_reply(self, text): pass
+
+DISPATCH_MIX = (["ali: selam nasılsın bugün hava çok güzel"] * 50 + ["NOTICE:sunucu duyurusu"] * 5 +
+                ["USERLIST:ali,veli,ayse,bob"] * 5 + ["PONG 12345"] * 10 +
+                ["FILEURL from=ali name=tatil.mp4 url=http://127.0.0.1:8000/tatil.mp4"] * 5 +
+                ["TKM:ROUND 2 ali=tas veli=makas winner=ali", "TKM:CHALLENGE from=ali", "TKM:SKOR ali=2 veli=1",
+                 "TKM:ERR bilinmeyen", "TKM:WAITING", "TKM:RESULT match ali winner=ali"] * 3 +
+                ["[FILE] ali bir dosya gönderdi", "CTRL:CLEAR", "FILE2:OFFSET id=3 offset=0"] * 2)
+
+def bench_dispatch(args):
+    from chatclient import engine
+    engine.remember_url = lambda url, name=None: 0      # ölçüm LAST_URL_FILE'a yazmasın
+    ui, link = NullUI(), NullLink()
+    def run(handle, lines, n):
+        def go():
+            for _ in range(n):
+                for line in lines: handle(line, ui, link, link)
+        return go
+    paths = {"eski": old_handle_line, "tablo": engine.handle_line}
+    mix = best({k: run(h, DISPATCH_MIX, 50) for k, h in paths.items()}, args.rounds)
+    print(f"[dispatch] {len(DISPATCH_MIX)} satırlık karışım (%50 sohbet), ns/satır, {args.rounds} turun en iyisi")
+    print(f"  {'':14} {'eski':>7} {'tablo':>7}")
+    for label, probe in (("sohbet", "ali: selam nasılsın"), ("NOTICE", "NOTICE:duyuru"),
+                         ("FILEURL", "FILEURL from=ali name=x.jpg url=http://h/x.jpg"),
+                         ("TKM:ROUND", "TKM:ROUND 2 ali=tas winner=ali"), ("PONG", "PONG 123")):
+        t = best({k: run(h, [probe], 3000) for k, h in paths.items()}, args.rounds)
+        print(f"  {label:14} {t['eski'] / 3000 * 1e9:7.0f} {t['tablo'] / 3000 * 1e9:7.0f}")
+    n = 50 * len(DISPATCH_MIX)
+    print(f"  {'karışım':14} {mix['eski'] / n * 1e9:7.0f} {mix['tablo'] / n * 1e9:7.0f}")
+
+# ===== Medya küçültme =====
+def make_corpus(folder):
+    """Telefon fotoğrafı benzeri derlem (Pillow ile): EXIF'li 12 MP q97 JPEG'ler, PNG ekran görüntüsü."""
+    from PIL import Image, ImageDraw, ImageFilter, PngImagePlugin
+    rng = random.Random(22)
+    def photo(w, h):
+        im = Image.effect_noise((w // 4, h // 4), 60).convert("RGB").resize((w, h), Image.BICUBIC)
+        im = Image.blend(im, Image.linear_gradient("L").resize((w, h)).convert("RGB"), 0.5)
+        d = ImageDraw.Draw(im)
+        for _ in range(80):
+            x, y, r = rng.randrange(w), rng.randrange(h), rng.randrange(40, 600)
+            d.ellipse((x, y, x + r, y + r), fill=tuple(rng.randrange(256) for _ in range(3)))
+        im = im.filter(ImageFilter.GaussianBlur(2))
+        return Image.blend(im, Image.effect_noise((w, h), 24).convert("RGB"), 0.3)
+    for i, (w, h, turn) in enumerate([(4032, 3024, 6), (4000, 3000, 1), (3024, 4032, 1)]):
+        ex = Image.Exif(); ex[0x0112] = turn; ex[0x010F] = "PhoneCo"; ex[0x0110] = "Model X"
+        photo(w, h).save(os.path.join(folder, f"IMG_{i}.jpg"), "JPEG", quality=97, exif=ex.tobytes())
+    im = Image.new("RGB", (2560, 1440), "white"); d = ImageDraw.Draw(im)
+    for y in range(0, 1440, 18): d.text((10, y), "".join(chr(33 + rng.randrange(90)) for _ in range(420)), fill="black")
+    meta = PngImagePlugin.PngInfo(); meta.add_text("Software", "screenshot tool")
+    im.save(os.path.join(folder, "screen.png"), compress_level=1, pnginfo=meta)
+    photo(1600, 1200).save(os.path.join(folder, "small_photo.jpg"), quality=85)
+
+async def send_corpus(port, files, raw):
+    # tümü birden kuyruğa; süre, her dosyanın FILEURL yankısı gelene kadar
+    from chatclient.headless import Client
+    c = await Client.connect("127.0.0.1", port, name=f"bench{int(raw)}")
+    try:
+        t0 = time.perf_counter()
+        ups = await asyncio.gather(*(c.send_file(f, raw) for f in files))
+        echoed = 0
+        async for ev in c:
+            echoed += ev["type"] == "file" and ev["from"] == c.session.answers["USERNAME?"]
+            if echoed == len(files): break
+        return ups, time.perf_counter() - t0
+    finally:
+        await c.close()
+
+def bench_media(args):
+    import loadtest
+    from chatclient import media, uploads
+    uploads.OPTIMIZE_IMAGES = True      # varsayılan kapalı; ölçülen yol bu
+    tmp = None
+    if args.corpus:
+        files = sorted(f for f in glob.glob(os.path.join(os.path.expanduser(args.corpus), "*")) if os.path.isfile(f))
+    else:
+        if not media.pillow(): sys.exit("[media] örnek derlem için Pillow gerekli; --corpus DİZİN verin")
+        tmp = tempfile.TemporaryDirectory(prefix="bench-media-")
+        make_corpus(tmp.name)
+        files = sorted(glob.glob(os.path.join(tmp.name, "*")))
+    proc, port = loadtest.start_server("upload2,ping")
+    try:
+        print(f"[media] {len(files)} dosya, Pillow {'var' if media.pillow() else 'yok (yalnızca meta veri silme)'}; "
+              f"yerel sahte sunucu, {args.mbit:g} Mbit/sn için yalnızca aktarım süresi hesaplanır")
+        for raw in (True, False):
+            ups, dt = asyncio.run(send_corpus(port, files, raw))
+            before, after = sum(u.original for u in ups), sum(u.size for u in ups)
+            label = "--raw" if raw else "küçültülmüş"
+            print(f"  {label:12} {before / 1e6:6.1f} MB → {after / 1e6:6.2f} MB (-%{100 - after * 100 // before})  "
+                  f"loopback {dt:5.2f} sn  {args.mbit:g} Mbit/sn'de ~{after * 8 / (args.mbit * 1e6):5.1f} sn")
+            if not raw:
+                for u in ups:
+                    print(f"    {os.path.basename(u.source):18} {u.original:>9} → {u.size:>9}  {u.name}")
+    finally:
+        proc.terminate(); proc.wait(timeout=5)
+        if tmp: tmp.cleanup()
+
+# ===== Sıkıştırma (zlib) =====
+def session_trace(n=6000, seed=23):
+    """Kayıt yoksa üretilen oturum: (gelen satırlar, giden satırlar).
+
+    Sohbet ağırlıklı; katılma/ayrılmada NOTICE + tam USERLIST, TKM maçları,
+    FILEURL ve PING/PONG. Oranlar sunucu günlüklerindeki dağılıma yakındır.
+    """
+    rng = random.Random(seed)
+    names = [f"{n}{i}" for i, n in enumerate("ali ayse mehmet zeynep can elif mert deniz ece burak "
+                                             "selin emre irem kaan".split() * 3)]
+    phrases = ["selam", "nasılsın", "iyiyim sen", "bugün toplantı var mı", "tamam", "saat kaçta",
+               "ben geliyorum", "dosyayı attım bakar mısın", "olur", "teşekkürler", ":)", "hahaha",
+               "akşam maç var", "kim geliyor", "link çalışmıyor", "tekrar dener misin", "şimdi oldu",
+               "görüşürüz", "hocam ödev ne zaman", "yarın"]
+    say = lambda k: " ".join(rng.choice(phrases) for _ in range(rng.randint(1, k)))
+    online, down, up = names[:30], [], []
+    for _ in range(n):
+        r = rng.random()
+        if r < 0.70:
+            down.append(f"{rng.choice(online)}: {say(4)}")
+            if rng.random() < 0.1: up.append(say(3))
+        elif r < 0.78:
+            if rng.random() < 0.5 and len(online) < len(names):
+                who = rng.choice([x for x in names if x not in online]); online.append(who)
+                down.append(f"NOTICE:{who} katıldı")
+            else:
+                who = rng.choice(online); online.remove(who); down.append(f"NOTICE:{who} ayrıldı")
+            down.append("USERLIST:" + ",".join(online))
+        elif r < 0.85:
+            a, b = rng.sample(online, 2)
+            down += [f"TKM:CHALLENGE from={a}", "TKM:CONFIRM", "TKM:PROMPT round=1", "TKM:WAITING",
+                     f"TKM:ROUND round=1 {a}=tas {b}=makas winner={a}", "TKM:PROMPT round=2",
+                     f"TKM:ROUND round=2 {a}=kagit {b}=makas winner={b}", f"TKM:RESULT match winner={a} 2-1"]
+            up += ["/tkm kabul", "/tkm seç tas", "/tkm seç kagit"]
+        elif r < 0.90:
+            f = f"IMG_{rng.randint(1000, 9999)}.jpg"
+            down.append(f"FILEURL from={rng.choice(online)} name={f} url=http://127.0.0.1:8000/{f}")
+        else:
+            k = rng.randint(1, 999); up.append(f"PING {k}"); down.append(f"PONG {k}")
+    return down, up
+
+def read_trace(path):
+    # "< satır" gelen, "> satır" giden; önsüz satırlar gelen sayılır
+    down, up = [], []
+    with open(os.path.expanduser(path), encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if line.startswith("> "): up.append(line[2:])
+            elif line: down.append(line[2:] if line.startswith("< ") else line)
+    return down, up
+
+def zlib_pass(data, zdict):
+    # satır başına bir yazım (SYNC_FLUSH); sözlüksüz karşılaştırma için ham zlib
+    c = zlib.compressobj(ZLIB_LEVEL, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, *([zdict] if zdict else []))
+    d = zlib.decompressobj(-15, *([zdict] if zdict else []))
+    out = [c.compress(x) + c.flush(zlib.Z_SYNC_FLUSH) for x in data]
+    assert b"".join(d.decompress(o) for o in out) == b"".join(data)
+    return sum(map(len, out))
+
+def framer_pass(data):
+    # istemcinin gerçek yolu: pack() ile sıkıştır, feed() + lines() ile aç ve böl
+    tx, rx = LineFramer(), LineFramer()
+    tx.compress(); rx.compress()
+    t0 = time.process_time()
+    out = [tx.pack(x) for x in data]
+    t1 = time.process_time()
+    n = 0
+    for o in out:
+        rx.feed(o)
+        for _ in rx.lines(): n += 1
+    t2 = time.process_time()
+    assert n == len(data)
+    return sum(map(len, out)), t1 - t0, t2 - t1
+
+def bench_zlib(args):
+    down, up = read_trace(args.trace) if args.trace else session_trace()
+    src = args.trace or "üretilmiş oturum (kayıt için --trace)"
+    print(f"[zlib] {src}: {len(down)} gelen, {len(up)} giden satır; satır başına SYNC_FLUSH")
+    ul = sum(len(l) + 1 for l in down if l.startswith("USERLIST:"))
+    if down: print(f"  USERLIST gelen baytların %{ul * 100 // sum(len(l) + 1 for l in down)}'i")
+    print(f"  {'':7} {'düz':>9} {'sözlüksüz':>10} {'ZDICT':>18}  {'deflate':>13} {'inflate':>13}")
+    for label, lines in (("gelen", down), ("giden", up), ("ilk 50", down[:50])):
+        if not lines: continue
+        data = [(l + "\n").encode("utf-8") for l in lines]
+        plain = sum(map(len, data))
+        bare = zlib_pass(data, None)
+        runs = [framer_pass(data) for _ in range(args.rounds)]
+        wire = runs[0][0]
+        tc, td = min(r[1] for r in runs), min(r[2] for r in runs)
+        print(f"  {label:7} {plain:9} {bare:10} {wire:9} (-%{100 - wire * 100 // plain:2})  "
+              f"{tc / len(data) * 1e6:6.1f} µs/sat {td / len(data) * 1e6:6.1f} µs/sat")
+
+# ===== Çerçeve kodlayıcı (frame2) =====
+def codec_corpus(n=50000, seed=24):
+    # %70 sohbet; kalanı tipli çerçeveye giden türler (boşluklu dosya adları dahil)
+    rng = random.Random(seed)
+    names = [f"kullanici{i}" for i in range(60)] + ["ayşe", "çağrı", "ömer", "gül"]
+    words = "merhaba selam nasılsın bugün toplantı dosya gönderdim tamam evet hayır şimdi sonra çok güzel".split()
+    out = []
+    for i in range(n):
+        r = rng.random()
+        if r < .70: out.append(f"{rng.choice(names)}: " + " ".join(rng.choice(words) for _ in range(rng.randint(1, 25))))
+        elif r < .74: out.append("USERLIST:" + ",".join(rng.sample(names, rng.randint(5, 60))))
+        elif r < .80: out.append(rng.choice(["JOIN:", "PART:"]) + rng.choice(names))
+        elif r < .86: out.append(f"FILEURL from={rng.choice(names)} name=IMG {i} tatil.jpg "
+                                 f"url=http://127.0.0.1:8000/IMG {i} tatil.jpg")
+        elif r < .92: out.append(f"PONG {i}")
+        elif r < .95: out.append(f"NOTICE:sunucu {i} bakım duyurusu")
+        elif r < .97: out.append(f"FILE2:OFFSET id={i:016x} offset={i * 1024}")
+        else: out.append(f"TKM:ROUND round={i % 3 + 1} tas kagit winner={rng.choice(names)}")
+    return out
+
+def touch(m):
+    # işleyicilerin okuduğu alanlar: tembel ayrıştırma da ölçüme girsin
+    if m.kind == "FILEURL": m.fields["name"]
+    elif m.kind == "USERLIST": m.rest.split(",")
+    elif m.kind in ("JOIN", "PART", "NOTICE"): m.rest
+    return m.kind
+
+def codec_feed(data, binary):
+    f = LineFramer()
+    if binary: f.binary()
+    n = 0
+    for i in range(0, len(data), FRAME_BUF):
+        f.feed(data[i:i + FRAME_BUF])
+        for raw in f.lines(): touch(as_message(raw)); n += 1
+    return n
+
+def codec_socket(data, binary):
+    a, b = socket.socketpair()
+    a.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+    threading.Thread(target=lambda: (a.sendall(data), a.close()), daemon=True).start()
+    f = LineFramer()
+    if binary: f.binary()
+    n = 0
+    while True:
+        for raw in f.lines(): touch(as_message(raw)); n += 1
+        if not f.recv(b): break               # v1 recv, v2 recv_into
+    b.close()
+    return n
+
+def bench_codec(args):
+    corpus = codec_corpus()
+    v1 = "".join(l + "\n" for l in corpus).encode()
+    v2 = frame_lines(v1)
+    assert codec_feed(v1, False) == codec_feed(v2, True) == len(corpus)
+    print(f"[codec] {len(corpus)} satır: v1 {len(v1)} B, v2 {len(v2)} B ({(len(v2) - len(v1)) * 100 / len(v1):+.1f}%)")
+    for label, fn in (("feed 64K + çözme", codec_feed), ("soket recv / recv_into", codec_socket)):
+        t = best({"v1": lambda: fn(v1, False), "v2": lambda: fn(v2, True)}, args.rounds)
+        print(f"  {label:24} v1 {t['v1'] * 1e6 / len(corpus):.2f}  v2 {t['v2'] * 1e6 / len(corpus):.2f} µs/satır"
+              f"  ({(t['v2'] - t['v1']) * 100 / t['v1']:+.0f}%)")
+    t = best({"enc": lambda: frame_lines(v1)}, args.rounds)
+    print(f"  {'kodlama (frame_lines)':24} {t['enc'] * 1e6 / len(corpus):.2f} µs/satır")
+    typed = ("USERLIST", "JOIN:", "PART:", "FILEURL", "PONG", "NOTICE:", "FILE2:", "TKM:")
+    for kind in ("USERLIST", "FILEURL", "PONG", "sohbet"):
+        sub = [l for l in corpus if l.startswith(kind) or kind == "sohbet" and not l.startswith(typed)]
+        d1 = "".join(l + "\n" for l in sub).encode(); d2 = frame_lines(d1)
+        t = best({"v1": lambda: codec_feed(d1, False), "v2": lambda: codec_feed(d2, True)}, args.rounds)
+        print(f"    {kind:9} n={len(sub):5}  v1 {t['v1'] * 1e6 / len(sub):.2f}  v2 {t['v2'] * 1e6 / len(sub):.2f} µs"
+              f"  bayt {len(d1)} -> {len(d2)} ({(len(d2) - len(d1)) * 100 / len(d1):+.0f}%)")
+
+BENCHES = {"framer": bench_framer, "upload": bench_upload, "dispatch": bench_dispatch, "media": bench_media,
+           "zlib": bench_zlib, "codec": bench_codec}
+
+def main():
+    ap = argparse.ArgumentParser(description="chat_client mikro ölçümleri")
+    ap.add_argument("bench", choices=BENCHES, nargs="+")
+    ap.add_argument("--rounds", type=int, default=5, help="tur sayısı (en iyisi alınır)")
+    ap.add_argument("--mb", type=int, default=256, help="upload: dosya boyu, MiB")
+    ap.add_argument("--corpus", metavar="DIR", help="media: görsel dizini (yoksa Pillow ile örnek üretilir)")
+    ap.add_argument("--mbit", type=float, default=20, help="media: aktarım süresi hesabı için bağlantı hızı")
+    ap.add_argument("--trace", metavar="FILE", help="zlib: kayıtlı trafik (satır başına bir mesaj)")
+    args = ap.parse_args()
+    for name in args.bench: BENCHES[name](args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""Yük testi: yerel sahte sunucu + N başsız (curses'sız) istemci.
+
+İstemciler chatclient paketinin kendi kodunu çalıştırır: Session
+(handshake), pump_lines → handle_line (ayrıştırma ve yönlendirme),
+SocketSender/Transfers (sohbet satırları ve yüklemeler). Yalnızca ekran,
+satırları sayan HeadlessUI ile değiştirilir. Sunucu ayrı bir süreçte
+koşar, böylece istemcilerle aynı GIL'i paylaşmaz; --inprocess ile aynı
+süreçte (InProcessTransport, socketpair) koşar.
+
+    python3 loadtest.py                                  # 20 istemci × 200 mesaj
+    python3 loadtest.py --clients 50 --messages 500 --rate 50
+    python3 loadtest.py --upload-mb 64 --caps upload2,ping --json sonuc.json
+    CHAT_COMPRESS=1 python3 loadtest.py --caps ping,zlib # zlib akışıyla
+    CHAT_FRAMING=v2 python3 loadtest.py --caps upload2,ping,frame2   # v2 çerçeveleriyle
+    python3 loadtest.py --serve 5600                     # yalnızca sahte sunucu
+    python3 loadtest.py --serve 5600 --caps upload2 --store gelen   # upload2 dosyalarını sakla
+    python3 loadtest.py --inprocess                      # sunucu aynı süreçte, TCP yok
+    python3 loadtest.py --files 8000 --dir ~/medya       # yalnızca dosya sunucusu (/get testi)
+
+Aynı parametre ve --seed ile çalıştırmalar aynı trafiği üretir; --json
+çıktısı sürümler arasında karşılaştırmak içindir.
+"""
+import argparse, asyncio, json, os, platform, random, re, subprocess, sys, tempfile, threading, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chatclient.engine import SocketSender, pump_lines
+from chatclient.metrics import METRICS
+from chatclient.protocol import (BODY, FRAME_MAX, ZDICT, LineFramer, Presence, frame_lines,
+                                 frame_message, parse_fields)
+from chatclient.session import Session
+from chatclient.transports import InProcessTransport, TcpTransport
+
+# ===== Sahte sunucu =====
+class Room:
+    """Bağlı kullanıcılar, yayın ve yarım upload2 aktarımları."""
+    def __init__(self, store=None):
+        self.members = {}           # isim → writer
+        self.uploads = {}           # (kullanıcı, upload2 id) → Partial; bağlantı kopsa da kalır
+        self.store = store          # dizin: gelen dosyalar yazılır ve özeti doğrulanır
+
+    def send_all(self, data):
+        for w in self.members.values():
+            w.write(data)
+
+    def userlist(self):
+        return ("USERLIST:" + ",".join(self.members) + "\n").encode("utf-8")
+
+class Partial:
+    """upload2 ile gelen (belki yarım) dosya: alınan bayt ve istenirse diskteki kopya."""
+    def __init__(self, f, store):
+        self.name, self.size, self.hash = f.get("name", "?"), int(f.get("size", 0)), f.get("hash")
+        self.got = 0
+        self.path = os.path.join(store, os.path.basename(self.name)) if store else None
+        if self.path: open(self.path, "wb").close()
+
+    def same(self, f):
+        return int(f.get("size", 0)) == self.size and f.get("hash") == self.hash
+
+    def write(self, off, data):
+        if off != self.got: return          # sırası kaymış parça: istemci OFFSET'ten sürer
+        if self.path:
+            with open(self.path, "r+b") as out: out.seek(off); out.write(data)
+        self.got += len(data)
+
+    def verify(self):
+        # hash=blake2b:<hex>; saklanmıyorsa yalnızca boy denetlenir
+        if self.got != self.size: return False
+        if not self.path or not (self.hash or "").startswith("blake2b:"): return True
+        from chatclient.uploads import file_digest
+        return file_digest(self.path) == self.hash[8:]
+
+    def drop(self):
+        if self.path and os.path.exists(self.path): os.remove(self.path)
+
+class DeflateStream:
+    """zlib yeteneği (sunucu tarafı): okuma açılır, yazma sıkıştırılır."""
+    def __init__(self, reader, writer):
+        import zlib
+        self.reader, self.writer = reader, writer
+        self.inflater = zlib.decompressobj(-15, ZDICT)
+        self.out = LineFramer(); self.out.compress()     # pack(): istemcinin açıcısıyla aynı akış
+        self.buf = bytearray()
+
+    async def fill(self, n):
+        while len(self.buf) < n:
+            data = await self.reader.read(65536)
+            if not data: raise ConnectionError
+            self.buf += self.inflater.decompress(data)
+
+    async def readline(self):
+        while (i := self.buf.find(b"\n")) < 0: await self.fill(len(self.buf) + 1)
+        line = bytes(self.buf[:i + 1]); del self.buf[:i + 1]
+        return line
+
+    async def readexactly(self, n):
+        await self.fill(n)
+        data = bytes(self.buf[:n]); del self.buf[:n]
+        return data
+
+    async def read(self, n):
+        await self.fill(1)
+        data = bytes(self.buf[:n]); del self.buf[:n]
+        return data
+
+    def write(self, data):
+        self.writer.write(self.out.pack(data))
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
+
+class FrameStream:
+    """frame2 yeteneği (sunucu tarafı): v2 çerçeveleri satır ve gövde okumasına çevrilir."""
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+        self.framer = LineFramer(FRAME_MAX); self.framer.binary()
+
+    async def frame(self):
+        while True:
+            for frame in self.framer.frames_raw(): return frame
+            data = await self.reader.read(1 << 16)
+            if not data: raise ConnectionError
+            self.framer.feed(data)
+
+    async def readline(self):
+        typ, payload = await self.frame()
+        if typ == BODY: raise ConnectionError("satır yerine gövde")
+        msg = frame_message(typ, payload)
+        self.fields = msg.fields
+        return msg.line.encode("utf-8") + b"\n"
+
+    async def readexactly(self, n):
+        out = bytearray()
+        while len(out) < n:
+            typ, payload = await self.frame()
+            if typ != BODY: raise ConnectionError("gövde yerine satır")
+            out += payload
+        return bytes(out)
+
+    last = (None, b"")              # Room.send_all aynı baytları herkese yazar: bir kez çerçevelenir
+
+    def write(self, data):
+        if data is not FrameStream.last[0]: FrameStream.last = (data, frame_lines(data))
+        self.writer.write(FrameStream.last[1])
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
+
+async def serve_client(reader, writer, room, caps):
+    async def readline():
+        line = await reader.readline()
+        if not line: raise ConnectionError
+        return line.decode("utf-8", errors="replace").rstrip("\r\n")
+
+    def fields(line):
+        # v2'de alanlar çerçeveden gelir: boşluklu dosya adı bölünmez
+        return reader.fields if isinstance(reader, FrameStream) else parse_fields(line)
+
+    name = None
+    uploads = room.uploads
+    try:
+        writer.write(b"Sahte sunucu (yuk testi)\nUSERNAME?\n")
+        name = await readline()
+        if caps: writer.write(f"CAPS:{caps}\n".encode())
+        writer.write(b"Kurallar: yok\nACCEPT? (OK/EXIT)\n")
+        answer, agreed = await readline(), set()
+        while answer.startswith("CAPS:"):
+            agreed = set(answer[5:].split(",")) & set(caps.split(","))
+            answer = await readline()
+        if answer.upper() != "OK" or name in room.members:
+            writer.write(b"DENIED:kabul edilmedi\n"); return
+        writer.write(f"WELCOME {name}\n".encode("utf-8"))
+        if "zlib" in agreed: reader = writer = DeflateStream(reader, writer)
+        if "frame2" in agreed: reader = writer = FrameStream(reader, writer)
+        writer.write(f"NOTICE:hos geldin {name}\n".encode("utf-8"))
+        room.members[name] = writer
+        room.send_all(room.userlist())
+
+        while True:
+            line = await readline()
+            if line.startswith("PING "):
+                writer.write(f"PONG {line[5:]}\n".encode())
+            elif line.startswith("FILE "):
+                f = fields(line)
+                await readline()                        # boş satır
+                await reader.readexactly(int(f["size"]))
+                room.send_all(fileurl(name, f["name"]))
+            elif line.startswith("FILE2 "):
+                f = fields(line)
+                up = uploads.get((name, f["id"]))
+                if not up or not up.same(f):
+                    up = uploads[name, f["id"]] = Partial(f, room.store)
+                writer.write(f"FILE2:OFFSET id={f['id']} offset={up.got}\n".encode())
+            elif line.startswith("CHUNK "):
+                f = fields(line)
+                data = await reader.readexactly(int(f["len"]))
+                up = uploads.get((name, f["id"]))
+                if up: up.write(int(f["off"]), data)
+            elif line.startswith("FILE2:END") or line.startswith("FILE2:ABORT"):
+                key = fields(line).get("id")
+                up = uploads.pop((name, key), None)
+                if not up: pass
+                elif line.startswith("FILE2:ABORT"): up.drop()
+                elif up.verify(): room.send_all(fileurl(name, up.name))
+                else:
+                    up.drop()
+                    writer.write(f"FILE2:ERR id={key} dosya özeti tutmuyor\n".encode("utf-8"))
+            elif line.startswith("/tkm"):
+                writer.write(b"TKM:INFO sahte sunucuda oyun yok\n")
+            elif line == "/clear":
+                room.send_all(b"CTRL:CLEAR\n")
+            elif line == "/quit":
+                return
+            else:
+                room.send_all(f"{name}: {line}\n".encode("utf-8"))
+            if writer.transport.get_write_buffer_size() > 1 << 20:
+                await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        if room.members.get(name) is writer:
+            del room.members[name]
+            room.send_all(room.userlist())
+        writer.close()
+
+def fileurl(sender, name):
+    return f"FILEURL from={sender} name={name} url=http://127.0.0.1:8000/{name}\n".encode("utf-8")
+
+async def serve(port, caps, store=None):
+    room = Room(store)
+    server = await asyncio.start_server(lambda r, w: serve_client(r, w, room, caps),
+                                        "127.0.0.1", port)
+    print("READY", server.sockets[0].getsockname()[1], flush=True)
+    async with server: await server.serve_forever()
+
+def start_server(caps):
+    """Sunucuyu alt süreçte başlatır; (süreç, port)."""
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", "0", "--caps", caps],
+                            stdout=subprocess.PIPE, text=True)
+    ready = proc.stdout.readline().split()
+    if not ready or ready[0] != "READY":
+        proc.kill(); raise RuntimeError("sahte sunucu başlamadı")
+    return proc, int(ready[1])
+
+def start_inprocess(caps):
+    """Sunucuyu bu süreçte ayrı bir thread'in döngüsünde başlatır; taşıyıcıyı döndürür."""
+    loop, room = asyncio.new_event_loop(), Room()
+    threading.Thread(target=loop.run_forever, name="server", daemon=True).start()
+    async def accept(sock):
+        reader, writer = await asyncio.open_connection(sock=sock)
+        await serve_client(reader, writer, room, caps)
+    return InProcessTransport(lambda sock: asyncio.run_coroutine_threadsafe(accept(sock), loop))
+
+# ===== Sahte dosya sunucusu =====
+def file_server(port, folder):
+    """Sunucunun 8000 portu yerine: http.server + HTTP/1.1 keep-alive ve tek aralıklı Range."""
+    import functools, http.server
+
+    class Handler(http.server.SimpleHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True     # başlık ve gövde ayrı yazılıyor
+        left = None                 # 206 yanıtında gönderilecek bayt
+
+        def log_message(self, *args): pass
+
+        def end_headers(self):
+            self.send_header("Accept-Ranges", "bytes")
+            super().end_headers()
+
+        def send_head(self):
+            path = self.translate_path(self.path)
+            m = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            if not m or not os.path.isfile(path): return super().send_head()
+            f = open(path, "rb")
+            size = os.fstat(f.fileno()).st_size
+            start, end = int(m[1]), min(int(m[2] or size - 1), size - 1)
+            if start > end:
+                f.close(); self.send_error(416); return None
+            self.send_response(206)
+            self.send_header("Content-Type", self.guess_type(path))
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+            f.seek(start); self.left = end - start + 1
+            return f
+
+        def copyfile(self, src, dst):
+            left, self.left = self.left, None
+            if left is None: return super().copyfile(src, dst)
+            while left > 0 and (buf := src.read(min(left, 1 << 20))):
+                dst.write(buf); left -= len(buf)
+
+    return http.server.ThreadingHTTPServer(("127.0.0.1", port), functools.partial(Handler, directory=folder))
+
+def serve_files(port, folder):
+    server = file_server(port, folder)
+    print("READY", server.server_address[1], flush=True)
+    server.serve_forever()
+
+# ===== Başsız istemci =====
+class HeadlessUI:
+    """ChatUI'nin curses'sız karşılığı: satırları sayar, bench gecikmelerini ölçer."""
+    archive = None
+    previews = None
+
+    def __init__(self):
+        self.presence = Presence()
+        self.lines = 0
+        self.latencies = []         # sn
+        self.last_rx = 0.0
+        self.files = set()          # gelen FILEURL'ler: (gönderen, ad)
+        self.errors = []
+        self.done = threading.Event()
+        self.expect = None
+
+    def say(self, text, log=False):
+        now = time.perf_counter()
+        self.lines += 1; self.last_rx = now
+        i = text.find(" bench ")
+        if i >= 0:
+            self.latencies.append(now - int(text.rsplit(" ", 1)[1]) / 1e9)
+            if self.expect and len(self.latencies) >= self.expect: self.done.set()
+
+    def write(self, text, log=False):
+        self.lines += 1
+        if text.startswith("[Dosya] "):
+            sender, rest = text[8:].split(" → ", 1)
+            self.files.add((sender, rest.split("\n", 1)[0].rsplit("  (/get ", 1)[0]))
+        elif text.startswith("[Hata]"):
+            self.errors.append(text)
+
+    def clear(self, note=None): self.lines += 1
+    def set_users(self, users): self.presence.replace(users)
+    def user_join(self, name): self.presence.join(name)
+    def user_part(self, name): self.presence.part(name)
+    def resync_users(self): self.presence.synced = False
+    def set_latency(self, text): pass
+    def set_status(self, text, part="upload"): pass
+
+class Bot:
+    """Tek başsız istemci: gerçek Session + SocketSender + pump_lines."""
+    def __init__(self, n, transport):
+        self.n, self.name = n, f"bot{n:03d}"
+        self.ui = HeadlessUI()
+        self.session = Session(transport)
+        self.session.answers = {"USERNAME?": self.name, "ACCEPT?": "OK"}
+
+    def connect(self):
+        self.session.reconnect_once()
+        self.session.online = True
+        self.out = SocketSender(self.session, self.ui)
+        self.rx = threading.Thread(target=pump_lines, name=f"recv-{self.n}",
+                                   args=(self.session, self.ui, self.out.transfers), daemon=True)
+        self.rx.start()
+
+    def chat(self, messages, rate, rng, size):
+        pad = "".join(rng.choice("abcçdefgğhıijklmnoöprsştuüvyz ") for _ in range(size))
+        gap = 1 / rate if rate else 0
+        t_next = time.perf_counter()
+        for seq in range(messages):
+            if gap:
+                t_next += gap
+                time.sleep(max(0.0, t_next - time.perf_counter()))
+            self.out.send_line(f"{pad} bench {self.n} {seq} {time.perf_counter_ns()}")
+
+    def close(self):
+        try: self.out.quit()
+        except OSError: pass
+        self.rx.join(timeout=2)
+        self.session.close()
+
+# ===== Ölçüm =====
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def pct(values, q):
+    if not values: return None
+    s = sorted(values)
+    return s[min(len(s) - 1, int(q * len(s)))]
+
+def run(args):
+    random.seed(args.seed)
+    proc = None
+    if args.inprocess:
+        transport = start_inprocess(args.caps)
+    elif args.server:
+        host, port = args.server.rsplit(":", 1)
+        transport = TcpTransport(host, int(port))
+    else:
+        proc, port = start_server(args.caps)
+        transport = TcpTransport("127.0.0.1", port)
+    bots = []
+    try:
+        rss0 = rss_bytes()
+        t0 = time.perf_counter()
+        for i in range(args.clients):
+            b = Bot(i, transport); b.connect(); bots.append(b)
+        connect_s = time.perf_counter() - t0
+        per_client = (rss_bytes() - rss0) / args.clients
+
+        # --- sohbet: her mesaj herkese yayılır ---
+        total = args.clients * args.messages
+        for b in bots: b.ui.expect = total
+        senders = [threading.Thread(target=b.chat, daemon=True,
+                                    args=(args.messages, args.rate, random.Random(args.seed + b.n), args.size))
+                   for b in bots]
+        t_start = time.perf_counter()
+        for s in senders: s.start()
+        for s in senders: s.join()
+        deadline = time.monotonic() + args.timeout
+        for b in bots: b.ui.done.wait(max(0.0, deadline - time.monotonic()))
+        t_end = max(b.ui.last_rx for b in bots)
+        lat = [x for b in bots for x in b.ui.latencies]
+        delivered = len(lat)
+
+        # --- yükleme ---
+        upload = None
+        if args.upload_mb:
+            upload = run_uploads(bots[:max(1, args.uploaders)], args)
+
+        # yetenekler bağlantı başınadır: farklı anlaşan istemci varsa ayrıca yazılır
+        caps = {b.name: sorted(b.session.caps) for b in bots}
+        odd = {k: v for k, v in caps.items() if v != caps[bots[0].name]}
+        result = {
+            "params": {k: v for k, v in vars(args).items() if k not in ("json", "server", "serve")},
+            "env": {"python": platform.python_version(), "platform": platform.platform(),
+                    "caps": caps[bots[0].name], "caps_differ": odd},
+            "connect_s": connect_s,
+            "sent": total,
+            "delivered": delivered,
+            "expected": total * args.clients,
+            "duration_s": t_end - t_start,
+            "msgs_per_s": delivered / (t_end - t_start) if t_end > t_start else 0.0,
+            "latency_ms": {q: (pct(lat, v) or 0) * 1000 for q, v in
+                           (("p50", 0.50), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))},
+            "rss_per_client_kib": per_client / 1024,
+            "upload": upload,
+        }
+        if METRICS.on: result["metrics"] = METRICS.snapshot()
+        return result
+    finally:
+        for b in bots: b.close()
+        if proc:
+            proc.terminate(); proc.wait(timeout=5)
+
+def run_uploads(bots, args):
+    size = args.upload_mb << 20
+    path = os.path.join(tempfile.gettempdir(), f"loadtest-{os.getpid()}.bin")
+    block = random.Random(args.seed).randbytes(1 << 20)
+    with open(path, "wb") as f:
+        for _ in range(args.upload_mb): f.write(block)
+    try:
+        name = os.path.basename(path)
+        t0 = time.perf_counter()
+        for b in bots: b.out.send_file(path)
+        deadline = time.monotonic() + args.timeout
+        # bitti: her gönderen kendi dosyasının FILEURL yankısını aldı (sunucu hepsini okudu)
+        while time.monotonic() < deadline:
+            if all((b.name, name) in b.ui.files for b in bots): break
+            time.sleep(0.01)
+        dt = time.perf_counter() - t0
+        states = [u.state for b in bots for u in b.out.transfers.items]
+        return {"files": len(bots), "size_mb": args.upload_mb, "seconds": dt,
+                "mb_per_s": len(bots) * size / dt / 1e6, "states": states}
+    finally:
+        os.remove(path)
+
+def report(r):
+    p = r["params"]
+    print(f"[Yük testi] {p['clients']} istemci × {p['messages']} mesaj "
+          f"({p['size']} bayt, hız {format(p['rate'], 'g') if p['rate'] else 'sınırsız'}/sn), seed {p['seed']}, caps {r['env']['caps']}")
+    if r["env"]["caps_differ"]:
+        print(f"  [Uyarı] farklı yetenekle bağlanan istemciler: {r['env']['caps_differ']}")
+    print(f"  bağlanma      {r['connect_s'] * 1000:.0f} ms ({p['clients']} handshake)")
+    print(f"  teslim        {r['delivered']}/{r['expected']} satır, {r['duration_s']:.2f} sn "
+          f"→ {r['msgs_per_s']:.0f} satır/sn")
+    l = r["latency_ms"]
+    print(f"  uçtan uca     p50 {l['p50']:.1f} ms  p95 {l['p95']:.1f}  p99 {l['p99']:.1f}  max {l['max']:.1f}")
+    print(f"  bellek        ~{r['rss_per_client_kib']:.0f} KiB RSS / istemci")
+    u = r["upload"]
+    if u:
+        print(f"  yükleme       {u['files']} × {u['size_mb']} MiB, {u['seconds']:.2f} sn "
+              f"→ {u['mb_per_s']:.0f} MB/sn  ({', '.join(u['states'])})")
+
+def main():
+    ap = argparse.ArgumentParser(description="chat_client yük testi (sahte sunucu + başsız istemciler)")
+    ap.add_argument("--clients", type=int, default=20)
+    ap.add_argument("--messages", type=int, default=200, help="istemci başına mesaj")
+    ap.add_argument("--size", type=int, default=64, help="mesaj gövdesi, karakter")
+    ap.add_argument("--rate", type=float, default=0, help="istemci başına mesaj/sn (0: sınırsız)")
+    ap.add_argument("--upload-mb", type=int, default=0, help="yüklenecek dosya boyu, MiB")
+    ap.add_argument("--uploaders", type=int, default=1, help="aynı anda yükleyen istemci")
+    ap.add_argument("--caps", default="ping", help="sunucunun sunduğu yetenekler (örn. upload2,ping)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--timeout", type=float, default=60)
+    ap.add_argument("--server", help="HOST:PORT — sahte sunucu yerine bu sunucuya bağlan")
+    ap.add_argument("--inprocess", action="store_true",
+                    help="sahte sunucuyu aynı süreçte çalıştır (socketpair, TCP yok)")
+    ap.add_argument("--json", help="sonuçları bu dosyaya JSON olarak yaz")
+    ap.add_argument("--serve", type=int, metavar="PORT", help="yalnızca sahte sunucuyu çalıştır")
+    ap.add_argument("--files", type=int, metavar="PORT",
+                    help="yalnızca dosya sunucusunu çalıştır (Range + keep-alive, /get testi)")
+    ap.add_argument("--dir", default=".", help="--files ile sunulan dizin")
+    ap.add_argument("--store", metavar="DIR", help="--serve: upload2 dosyalarını bu dizine yaz ve doğrula")
+    args = ap.parse_args()
+
+    if args.files is not None:
+        try: serve_files(args.files, os.path.expanduser(args.dir))
+        except KeyboardInterrupt: pass
+        return
+    if args.serve is not None:
+        try: asyncio.run(serve(args.serve, args.caps, args.store))
+        except KeyboardInterrupt: pass
+        return
+    r = run(args)
+    report(r)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f: json.dump(r, f, indent=2)
+    if r["delivered"] < r["expected"]: sys.exit(1)
+
+if __name__ == "__main__":
+    main()
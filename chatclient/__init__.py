@@ -0,0 +1,20 @@
+"""Sohbet istemcisi paketi.
+
+    config      ayarlar, dağıtım profilleri (direct, lan), argv
+    protocol    satır ve v2 çerçeveleme, zlib akışı, Message/Dispatcher, handshake
+    transports  doğrudan TCP, ssh tüneli, süreç içi (testler)
+    session     yeniden bağlanma, keepalive, bağlantı ölçümleri
+    engine      gelen satır tablosu (LINES), thread motoru
+    aio         asyncio gönderici
+    uploads     yükleme kuyruğu, v1/upload2 gönderimi
+    downloads   /get: keep-alive HTTP havuzu, paralel Range indirme
+    preview     görsel önizleme: süreç havuzunda çözme, blok/sixel çizim, LRU
+    media       /send öncesi görsel küçültme ve meta veri silme
+    commands    /komutlar
+    ui          curses ekranı (ui_async: --async motoru)
+    headless    Client API ve --headless JSON satırları
+    app         giriş noktası: run(profil)
+
+Ağır modüller (curses, asyncio, sqlite3, mimetypes, subprocess, http.client) yalnızca
+kullanılan yolda yüklenir; başsız istemci curses'a hiç dokunmaz.
+"""
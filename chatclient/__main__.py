@@ -0,0 +1,7 @@
+# python3 -m chatclient [HOST [PORT]] [--async | --headless] [--profile=lan]
+import sys
+
+from .app import run
+from .config import arg_value
+
+sys.exit(run(arg_value("--profile", "direct")))
@@ -0,0 +1,196 @@
+"""asyncio gönderici ve yeniden bağlanma (--async ve başsız istemci ortak)."""
+import asyncio, os
+
+from .config import REPLY_TIMEOUT, UPLOAD_SLICE
+from .downloads import Downloads
+from .protocol import FRAME_MAX, body_head
+from .session import Outbox
+from .uploads import Transfers, file_digest, resume_offset
+
+# ===== zlib / v2: çerçeveleyen yazıcı =====
+class WireWriter:
+    """StreamWriter sarmalayıcı; yazılanlar oturumun pack()'inden geçer
+    (zlib akışı ve/veya v2 çerçeveleri).
+
+    drain, close, is_closing, transport … alttaki yazıcıya gider.
+    """
+    def __init__(self, writer, framer):
+        self.writer, self.framer = writer, framer
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
+
+    def write(self, data):
+        self.writer.write(self.framer.pack(data))
+
+    async def sendfile(self, f, offset, count):
+        if not self.framer.deflater:
+            # yalnızca v2: BODY başlığı, gövde döngünün sendfile'ıyla
+            loop, sent = asyncio.get_running_loop(), 0
+            while sent < count:
+                n = min(FRAME_MAX, count - sent)
+                self.writer.write(body_head(n))
+                if await loop.sendfile(self.writer.transport, f, offset + sent, n, fallback=True) != n:
+                    raise ConnectionError("dosya beklenenden kısa")
+                sent += n
+            return sent
+        # zlib: gövde stored bloklar olarak gider; okuma döngüyü bekletmesin
+        data = await asyncio.to_thread(os.pread, f.fileno(), count, offset)
+        self.writer.write(self.framer.pack_stored(data))
+        return len(data)
+
+async def open_stream(session):
+    """Oturum soketi üzerinde (reader, writer); zlib ya da v2 anlaşıldıysa writer pack()'ler."""
+    session.sock.setblocking(False)
+    reader, writer = await asyncio.open_connection(sock=session.sock)
+    f = session.framer
+    if f.deflater or f.frames: writer = WireWriter(writer, f)
+    return reader, writer
+
+# ===== asyncio gönderici =====
+class AsyncSender:
+    """Satırlar sınırlı kuyruğa (Outbox) girer; tek yazıcı görev onları ve dosyaları sırayla yazar.
+
+    SocketSender ile aynı kurallar: aynı döngü turunda biriken satırlar
+    tek write'ta (zlib/v2'de tek pack) gider; dosya akarken gelen sohbet
+    satırları v1'de dosya bitince, upload2'de her parçadan sonra yazılır;
+    bağlantı yokken yazılanlar yeniden bağlanınca gider. Görev drain()'de
+    beklerken kuyruk dolarsa send_line satırı reddeder; beklemek isteyen
+    önce room()'u bekler (Client.send).
+    """
+    def __init__(self, session, writer, ui):
+        self.session, self.writer, self.ui = session, writer, ui
+        self.transfers = Transfers(ui, session.meter)
+        loop = asyncio.get_running_loop()
+        self.transfers.on_ready = lambda: loop.call_soon_threadsafe(self.wake.set)
+        self.downloads = Downloads(ui)
+        self.busy = False
+        self.upload = None
+        self.online = True
+        self.dead = False
+        self.out = Outbox(ui)
+        self.wake = asyncio.Event()
+        self.space = asyncio.Event()    # kuyrukta yer açıldı
+        self.tasks = set()
+        t = asyncio.ensure_future(self._worker())
+        self.tasks.add(t)
+
+    def send_line(self, text):
+        if self.dead: raise BrokenPipeError
+        if self.out.full():
+            self.out.refuse(text); return
+        self.out.put((text + "\n").encode("utf-8"))
+        if self.busy or not self.online: self.out.show()
+        self.wake.set()
+
+    async def room(self):
+        """Kuyrukta yer açılana kadar bekler (geri basınç)."""
+        while self.out.full() and not self.dead:
+            self.space.clear(); await self.space.wait()
+
+    def queue_text(self):
+        return self.out.report()
+
+    def send_file(self, path, raw=False):
+        if self.transfers.add(path, raw): self.wake.set()
+
+    def quit(self):
+        self.session.closing = True
+        self.send_line("/quit")
+        if not self.busy: self._write_queued()      # kapanıştan önce taşıyıcıya geçsin
+
+    def detach(self):
+        self.online = False
+        self.transfers.abort_replies()
+
+    def kill(self):
+        self.online = False; self.dead = True
+
+    def attach(self, writer):
+        self.writer = writer; self.online = True
+        self.transfers.requeue_interrupted()
+        self.wake.set()
+
+    def _write_queued(self):
+        # birikenlerin hepsi tek write; taşıyıcı kısmi yazımı kendisi tamamlar
+        if not self.online or not self.out or self.writer.is_closing(): return
+        while self.out:
+            batch = self.out.take()
+            data = b"".join(batch)
+            self.writer.write(data)
+            self.session.meter.bytes_out += len(data)
+            self.out.sent(len(batch))
+        self.space.set()
+        self.out.show()
+
+    async def _body(self, f, up, n):
+        # destekleniyorsa os.sendfile, değilse döngünün kendi tamponlu yolu
+        await self.writer.drain()
+        if isinstance(self.writer, WireWriter): sent = await self.writer.sendfile(f, up.sent, n)
+        else: sent = await asyncio.get_running_loop().sendfile(
+            self.writer.transport, f, up.sent, n, fallback=True)
+        if sent != n: raise ConnectionError("dosya beklenenden kısa")
+        self.transfers.advance(up, n)
+
+    async def _upload(self, up):
+        self.writer.write(up.header)
+        with open(up.path, "rb") as f:
+            while up.sent < up.size:
+                await self._body(f, up, min(UPLOAD_SLICE, up.size - up.sent))
+
+    async def _upload_chunked(self, up):
+        w = self.writer
+        if not up.digest: up.digest = await asyncio.to_thread(file_digest, up.path)
+        fut = self.transfers.expect(up.key)
+        w.write(up.chunked_header())
+        try: off = await asyncio.wait_for(asyncio.wrap_future(fut), REPLY_TIMEOUT)
+        except asyncio.TimeoutError:
+            w.write(f"FILE2:ABORT id={up.key}\n".encode("utf-8"))
+            raise self.transfers.no_reply(up) from None
+        up.sent = resume_offset(up, off)
+        up.restart_clock()
+        with open(up.path, "rb") as f:
+            while up.sent < up.size:
+                if up.cancelled:
+                    w.write(f"FILE2:ABORT id={up.key}\n".encode("utf-8")); return
+                n = min(UPLOAD_SLICE, up.size - up.sent)
+                w.write(f"CHUNK id={up.key} off={up.sent} len={n}\n".encode("utf-8"))
+                await self._body(f, up, n)
+                self._write_queued()
+        w.write(f"FILE2:END id={up.key}\n".encode("utf-8"))
+        await w.drain()
+
+    async def _worker(self):
+        while True:
+            if self.online and self.out and not self.writer.is_closing():
+                self._write_queued()
+                try: await self.writer.drain()      # taşıyıcı tamponu dolunca burada beklenir
+                except OSError: pass                # kopmayı alım tarafı işler
+                continue
+            up = self.transfers.next() if self.online else None
+            if not up:
+                self.wake.clear(); await self.wake.wait(); continue
+            up.chunked = "upload2" in self.session.caps
+            self.busy, self.upload = True, up
+            try:
+                await (self._upload_chunked(up) if up.chunked else self._upload(up))
+                self.transfers.finish(up)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not self.online and not isinstance(e, OSError): e = ConnectionError(e)
+                self.transfers.finish(up, e)
+            finally:
+                if self.online: self.transfers.requeue_interrupted()
+                self.busy, self.upload = False, None
+
+async def async_reconnect(session, ui):
+    """Geri çekilerek yeniden bağlanır; (reader, writer, welcome) ya da kapanışta None."""
+    while True:
+        await asyncio.sleep(session.delay())
+        if session.closing: return None
+        try: welcome = await asyncio.to_thread(session.reconnect_once)
+        except OSError as e:
+            session.failed(ui, e); continue
+        reader, writer = await open_stream(session)
+        return reader, writer, welcome
@@ -0,0 +1,15 @@
+"""Giriş noktası: profil + argv → ekranlı ya da başsız istemci."""
+import sys
+
+from . import config
+
+def run(profile="direct", argv=None):
+    config.use_profile(profile)
+    config.apply_argv(sys.argv[1:] if argv is None else argv)
+    if config.HEADLESS:
+        import asyncio
+        from .headless import headless_main
+        return asyncio.run(headless_main())
+    import curses
+    from .ui import main
+    curses.wrapper(main)
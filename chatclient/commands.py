@@ -0,0 +1,193 @@
+"""Girilen satırlar: yerel komutlar (/help, /send, /get …) ve dosya linkleri."""
+import collections, os, sys
+
+from . import config
+from .config import LAST_URL_FILE, LINKS_MAX
+from .metrics import METRICS
+from .paths import resolve_send_path
+
+LAST_FILE_URL = None
+LINKS = collections.deque(maxlen=LINKS_MAX)     # (no, ad, link); /links ve /get N
+_link_no = 0
+
+# ===== Dosya linkleri =====
+def add_link(url, name=None):
+    """Linki /links listesine ekler; /get için numarasını döndürür."""
+    global _link_no
+    _link_no += 1
+    LINKS.append((_link_no, name, url))
+    return _link_no
+
+def find_link(arg):
+    # boş: son link (önceki oturumdan kalan dahil) | N: /links numarası
+    if not arg: return LINKS[-1] if LINKS else (LAST_FILE_URL and (0, None, LAST_FILE_URL))
+    try: n = int(arg)
+    except ValueError: return None
+    return next((l for l in LINKS if l[0] == n), None)
+
+def load_last_url():
+    global LAST_FILE_URL
+    try:
+        if os.path.isfile(LAST_URL_FILE):
+            with open(LAST_URL_FILE, "r", encoding="utf-8") as f:
+                LAST_FILE_URL = f.read().strip() or None
+    except Exception:
+        LAST_FILE_URL = None
+
+def remember_url(url, name=None):
+    global LAST_FILE_URL
+    LAST_FILE_URL = url
+    n = add_link(url, name)
+    try:
+        with open(LAST_URL_FILE, "w", encoding="utf-8") as f:
+            f.write(url)
+    except Exception:
+        pass
+    return n
+
+# ===== Komutlar =====
+HELP_TEXT = (
+    "Komutlar:\n"
+    "  /tkm @kisi        → Taş-Kâğıt-Makas meydan oku ({tkm_rule})\n"
+    "  /tkm kabul | /tkm red | /tkm iptal\n"
+    "  /tkm seç tas|kagit|makas\n"
+    "  /tkm skor         → Skorlarını gör\n"
+    "  /send PATH        → Dosya gönder (arka planda; CHAT_OPTIMIZE=1 ise görsel önce küçültülür)\n"
+    "  /send --raw PATH  → CHAT_OPTIMIZE=1 iken görseli küçültmeden, özgün haliyle gönder\n"
+    "  /uploads          → Yükleme kuyruğunu listele\n"
+    "  /cancel N         → N numaralı yüklemeyi iptal et\n"
+    "  /lasturl          → Son dosya linkini göster\n"
+    "  /open             → Son linki tarayıcıda aç\n"
+    "  /links            → Son dosya linkleri (numaralı)\n"
+    "  /get [N]          → N numaralı linki indir (boşsa sonuncusu; arka planda)\n"
+    "  /get iptal N | /downloads → İndirmeyi iptal et | İndirmeleri listele\n"
+    "  /preview [N]      → N numaralı görseli ekranda önizle (CHAT_PREVIEW kipi)\n"
+    "  /cls              → Ekranı temizle (yerel, geçmiş kalır)\n"
+    "  PageUp/PageDown   → Geçmişte gezin (Home: başa, End: sona)\n"
+    "  Shift+↑/↓         → Kullanıcı listesini kaydır\n"
+    "  /render           → Ekran çizim istatistikleri\n"
+    "  /net              → Gecikme (RTT) dağılımı, trafik, gönderim kuyruğu, soket ayarları\n"
+    "  /stats            → Süre ölçümleri ve kilit çekişmesi (CHAT_METRICS=1)\n"
+    "  /search KELİME    → Yerel geçmişte ara (CHAT_HISTORY açıksa)\n"
+    "  /quit             → Çıkış\n")
+
+def open_url(url):
+    import subprocess
+    # Platform uyumlu açıcı
+    if sys.platform == "darwin":
+        opener = ["open", url]                   # macOS
+    elif os.name == "nt":
+        opener = ["cmd", "/c", "start", "", url]  # Windows
+    else:
+        opener = ["xdg-open", url]               # Linux
+    subprocess.Popen(
+        opener,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        close_fds=True,
+        start_new_session=True,
+    )
+
+def run_command(text, ui, out):
+    """Girilen satırı işler; yerel komut değilse sunucuya gönderir.
+
+    out: send_line()/send_file()/quit() sağlayan gönderici. "quit" → çıkış.
+    """
+    if text.startswith("/"):
+        if text == "/help":
+            ui.say(HELP_TEXT.format(tkm_rule=config.TKM_RULE))
+            return
+        if text in ("/cls", "/clearme"):
+            ui.clear(); return
+        if text == "/render":
+            ui.say(ui.stats_text()); return
+        if text.startswith("/search"):
+            term = text[len("/search"):].strip()
+            if not ui.archive:
+                ui.write("[Bilgi] Yerel geçmiş kapalı (CHAT_HISTORY ile açılır).")
+            elif not term:
+                ui.write("[Hata] Kullanım: /search KELİME")
+            else:
+                import sqlite3
+                from .history import search_text
+                try: ui.write(search_text(ui.archive, term))
+                except sqlite3.Error as e: ui.write(f"[Hata] Arama: {e}")
+            return
+        if text == "/stats":
+            if METRICS.on: ui.write(METRICS.report())
+            else: ui.write("[Bilgi] Ölçüm kapalı (CHAT_METRICS=1 ile açılır).")
+            return
+        if text == "/net":
+            s = out.session
+            ui.write(f"{s.meter.report(s.sock, s.framer, s.caps)}\n  {out.queue_text()}\n"
+                     f"  taşıyıcı: {s.transport}"); return
+        if text == "/lasturl":
+            if LAST_FILE_URL:
+                ui.write(f"[Son link] {LAST_FILE_URL}")
+            else:
+                ui.write("[Bilgi] Henüz bir dosya linki yok.")
+            return
+        if text == "/open":
+            if LAST_FILE_URL:
+                try:
+                    open_url(LAST_FILE_URL)
+                    ui.write("[Bilgi] Link tarayıcıda açılıyor.")
+                except Exception as e:
+                    ui.write(f"[Hata] Açılamadı: {e}")
+            else:
+                ui.write("[Bilgi] Henüz bir dosya linki yok.")
+            return
+        if text == "/links":
+            if not LINKS:
+                ui.write("[Bilgi] Henüz bir dosya linki yok."); return
+            ui.write("[Linkler]\n" + "\n".join(f"  {n}. {name or '?'}  {url}" for n, name, url in LINKS))
+            return
+        if text == "/get" or text.startswith("/get "):
+            arg = text[len("/get"):].strip()
+            if arg.startswith("iptal"):
+                try: n = int(arg.split(None, 1)[1])
+                except (IndexError, ValueError):
+                    ui.write("[Hata] Kullanım: /get iptal N  (numara için /downloads)")
+                    return
+                ui.write(out.downloads.cancel(n)); return
+            link = find_link(arg)
+            if not link:
+                ui.write("[Hata] Link yok. Numara için /links; /get boşsa son link indirilir.")
+                return
+            out.downloads.add(link[2], link[1]); return
+        if text == "/preview" or text.startswith("/preview "):
+            link = find_link(text[len("/preview"):].strip())
+            if not ui.previews:
+                ui.write("[Bilgi] Önizleme kapalı (CHAT_PREVIEW=auto|halfblocks|blocks|sixel ile açılır).")
+            elif not link:
+                ui.write("[Hata] Link yok. Numara için /links; /preview boşsa son link.")
+            else:
+                ui.previews.request(link[2], link[1])
+            return
+        if text == "/downloads":
+            ui.say(out.downloads.listing()); return
+        if text.startswith("/send"):
+            try: arg = text.split(" ",1)[1].strip()
+            except IndexError: arg = ""
+            raw = arg == "--raw" or arg.startswith("--raw ")
+            if raw: arg = arg[5:].strip()
+            path = resolve_send_path(arg)
+            if not path:
+                ui.write("[Hata] Yol/isim bulunamadı. /send /tam/yol/dosya veya yalnızca isim.")
+                return
+            out.send_file(path, raw); return
+        if text == "/uploads":
+            ui.say(out.transfers.listing()); return
+        if text.startswith("/cancel"):
+            try: n = int(text.split(" ",1)[1])
+            except (IndexError, ValueError):
+                ui.write("[Hata] Kullanım: /cancel N  (numara için /uploads)")
+                return
+            ui.write(out.transfers.cancel(n)); return
+        if text == "/quit":
+            try: out.quit()
+            except: pass
+            ui.say("[Sistem] Sohbetten çıkılıyor...")
+            return "quit"
+    out.send_line(text)
@@ -0,0 +1,141 @@
+"""İstemci ayarları, dağıtım profilleri ve komut satırı.
+
+Profile ya da argv'ye bağlı değerler (adres, taşıyıcı, motor) diğer
+modüllerde çağrı anında config.X diye okunur; ayar sabitleri doğrudan
+içe aktarılır.
+"""
+import os, sys
+
+SERVER_IP = "127.0.0.1"
+SERVER_PORT = 1161
+TRANSPORT = "tcp"          # tcp: doğrudan | tunnel: ssh -L ile localhost'a açılmış sunucu
+TKM_RULE = "3 tur"         # /help'teki TKM maç kuralı
+# kullanici@sunucu verilirse ssh tünelini istemci kurar, denetler ve /quit'te kapatır
+SSH_TARGET = os.environ.get("CHAT_SSH") or None
+
+# --async → alım, gönderim ve klavye tek asyncio döngüsünde
+ASYNC_ENGINE = False
+# --headless → ekran yok: stdin satırları gönderilir, olaylar stdout'a JSON satırı
+HEADLESS = False
+# Sohbet bağlantısı zlib ile sıkıştırılsın mı (sunucu CAPS'te "zlib" sunarsa):
+# 1 | 0 | auto (ssh tünelinde, yani yavaş uzak bağlantıda açık)
+COMPRESS = os.environ.get("CHAT_COMPRESS", "auto")
+# v2: sunucu CAPS'te "frame2" sunarsa satırlar yerine uzunluk önekli çerçeveler.
+# İsteğe bağlı (v1 | v2, varsayılan v1): telde kazancı yok, boşluklu dosya adlarını düzeltir.
+FRAMING = os.environ.get("CHAT_FRAMING", "v1")
+
+# Dağıtım profili: varsayılanlardan farkı. LAN istemcisi tünelden bağlanır.
+PROFILES = {
+    "direct": {},
+    "lan": {"TRANSPORT": "tunnel", "TKM_RULE": "first-to-2"},
+}
+
+def use_profile(name):
+    globals().update(PROFILES[name])
+
+def arg_value(name, default=None):
+    # --isim=değer biçimindeki seçenek
+    for a in sys.argv[1:]:
+        if a.startswith(name + "="): return a.split("=", 1)[1]
+    return default
+
+def apply_argv(argv):
+    """chat_client.py [HOST [PORT]] [--ssh=kullanici@sunucu] [--async | --headless] [--name=X ...]"""
+    global SERVER_IP, SERVER_PORT, ASYNC_ENGINE, HEADLESS, SSH_TARGET
+    args = [a for a in argv if not a.startswith("--")]
+    if len(args) >= 1:
+        SERVER_IP = args[0]
+    if len(args) >= 2:
+        try: SERVER_PORT = int(args[1])
+        except ValueError: pass
+    ASYNC_ENGINE = "--async" in argv
+    HEADLESS = "--headless" in argv
+    SSH_TARGET = next((a.split("=", 1)[1] for a in argv if a.startswith("--ssh=")), SSH_TARGET)
+
+# ===== Ayarlar =====
+# Görsel önizleme (isteğe bağlı, varsayılan kapalı): none | auto (sixel bilinen uçbirimde sixel,
+# yoksa halfblocks) | blocks | halfblocks | sixel. Açıkken /preview N ile; AUTO_PREVIEW de açıksa
+# gelen her görsel linki kendiliğinden önizlenir
+PREVIEW_MODE = os.environ.get("CHAT_PREVIEW", "none")
+AUTO_PREVIEW = os.environ.get("CHAT_AUTO_PREVIEW") == "1"
+PREVIEW_COLS = 48                        # önizleme en fazla genişliği, hücre
+PREVIEW_ROWS = 16                        # önizleme en fazla yüksekliği, satır
+PREVIEW_WORKERS = 2                      # çözme/küçültme süreçleri
+PREVIEW_MAX_BYTES = 32 << 20             # önizleme için indirilecek en büyük dosya
+PREVIEW_CACHE = 8 << 20                  # çizilmiş önizlemeler (URL'ye göre LRU), bayt
+RENDER_FPS = 30            # saniyede en fazla ekran güncellemesi
+SCROLLBACK_LINES = int(os.environ.get("CHAT_SCROLLBACK", "10000"))  # geçmiş kapasitesi
+USE_SENDFILE = hasattr(os, "sendfile")   # dosya gövdesi çekirdekte kopyalansın
+SEND_BUF_SIZE = 256 * 1024               # sendfile yoksa okuma tamponu
+UPLOAD_SLICE = 1 << 20                   # ilerleme/iptal kontrolü arası bayt (upload2 parça boyu)
+REPLY_TIMEOUT = 15                       # sunucu yanıtı (FILE2:OFFSET) bekleme süresi, sn
+CONNECT_TIMEOUT = 10                     # bağlanma + handshake zaman aşımı, sn
+RECONNECT_BASE = 0.5                     # yeniden bağlanma: ilk bekleme üst sınırı, sn
+RECONNECT_MAX = 30                       # yeniden bağlanma: en uzun bekleme, sn
+OUTBOX_MAX = 500                         # gönderim kuyruğunda (bağlantı yokken de) en fazla satır
+SEND_WAIT = 5                            # kuyruk doluysa send_line'ın yer bekleme süresi, sn
+SEND_COALESCE = 256                      # tek yazımda (sendmsg) birleştirilen en fazla satır
+KEEPALIVE_IDLE = 30                      # TCP keepalive: ilk yoklamaya kadar boşta, sn
+KEEPALIVE_INTERVAL = 10                  # PING ve TCP yoklama aralığı, sn
+KEEPALIVE_MISSES = 3                     # kaç aralık cevapsız kalırsa bağlantı ölü
+RTT_WINDOW = 512                         # yüzdelikler için tutulan son RTT sayısı
+EVENT_QUEUE = 10000                      # Client: okunmamış en fazla olay (dolunca soket beklenir)
+QUIT_WAIT = 2                            # Client: /quit sonrası sunucunun kapatması için süre, sn
+
+# /send öncesi görsel iyileştirme (kayıplı küçültme): isteğe bağlı, varsayılan kapalı.
+# CHAT_OPTIMIZE=1 ile açılır; açıkken /send --raw tek dosyada atlar.
+OPTIMIZE_IMAGES = os.environ.get("CHAT_OPTIMIZE", "0") != "0"
+OPTIMIZE_MAX_DIM = int(os.environ.get("CHAT_OPTIMIZE_DIM", "1920"))   # uzun kenar, piksel (Pillow)
+OPTIMIZE_FORMAT = os.environ.get("CHAT_OPTIMIZE_FORMAT", "jpeg")       # jpeg | webp (Pillow)
+OPTIMIZE_QUALITY = 82                    # JPEG/WebP kalite hedefi
+OPTIMIZE_MIN_BYTES = 256 * 1024          # daha küçük görsele dokunulmaz
+OPTIMIZE_MIN_GAIN = 0.1                  # kayıplı kodlama en az %10 küçültmezse özgün dosya gider
+
+# ssh tüneli (SSH_TARGET verilirse): sohbet portu ve dosya linkleri (HTTP) aynı süreçten
+SSH_COMMAND = os.environ.get("CHAT_SSH_COMMAND", "ssh")   # test için taklit komut verilebilir
+FILE_PORT = 8000                         # dosya linklerinin portu (tünelde yerel = uzak)
+TUNNEL_TIMEOUT = 15                      # tünelin portları açması için en fazla süre, sn
+TUNNEL_CHECK = 1                         # port sağlık kontrolü zaman aşımı, sn
+TUNNEL_ALIVE = 15                        # ssh ServerAliveInterval; 3 cevapsızda ssh çıkar
+
+# /get: dosya linklerini indirme (keep-alive havuz, büyük dosyada paralel Range)
+DOWNLOAD_DIR = os.path.expanduser(os.environ.get("CHAT_DOWNLOADS") or
+                                  ("~/Downloads" if os.path.isdir(os.path.expanduser("~/Downloads")) else "."))
+DOWNLOAD_PARTS = 4                       # bir dosyaya en fazla paralel Range isteği (= havuzda boşta bağlantı)
+DOWNLOAD_MIN_PART = 4 << 20              # parça başına en az bayt; daha küçük dosya tek istekte iner
+DOWNLOAD_BUF = 256 * 1024                # yanıt gövdesi okuma tamponu
+DOWNLOAD_TIMEOUT = 15                    # bağlantı/okuma zaman aşımı, sn
+LINKS_MAX = 50                           # /links listesinde tutulan son dosya linki
+
+# Yerel mesaj geçmişi (SQLite). Kapalı; açmak için örn. CHAT_HISTORY=~/.chatclient_history.db
+HISTORY_DB = os.environ.get("CHAT_HISTORY") or None
+HISTORY_RELOAD = 200                     # açılışta geçmişe yüklenen son mesaj
+HISTORY_BATCH = 500                      # tek INSERT işlemindeki en fazla satır
+HISTORY_FLUSH = 0.25                     # toplu yazım için bekleme, sn
+HISTORY_SEARCH_LIMIT = 50
+
+# /send TAB dizini: SEND_SEARCH_DIRS arka planda taranır
+INDEX_REFRESH = 5                        # dizin mtime kontrol aralığı, sn
+INDEX_DEPTH = 6                          # kökten en fazla alt dizin derinliği
+INDEX_MAX_DIRS = 20000                   # taranacak en fazla dizin
+INDEX_RESULTS = 200                      # tamamlama panelindeki en fazla aday
+PRESENCE_NOTICE_MAX = 5                  # daha büyük giriş/çıkış farkı tek satırda özetlenir
+
+# Ölçüm (/stats): CHAT_METRICS=1 ile açılır; dosya verilirse JSON satırları yazılır
+METRICS_FILE = os.environ.get("CHAT_METRICS_FILE") or None
+METRICS_INTERVAL = 10                    # JSON satırı aralığı, sn
+
+MEDIA_EXTS = {
+    ".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp",
+    ".mp4", ".mkv", ".mov", ".webm", ".avi", ".m4v"
+}
+def is_image_name(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() in {
+        ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp"
+    }
+
+SEND_SEARCH_DIRS = [os.getcwd()]
+if os.environ.get("MEDIA_DIR"):
+    md = os.environ["MEDIA_DIR"]
+    if os.path.isdir(md): SEND_SEARCH_DIRS.append(md)
+LAST_URL_FILE = os.path.expanduser("~/.chatclient_lasturl")
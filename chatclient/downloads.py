@@ -0,0 +1,301 @@
+"""Dosya indirme (/get): keep-alive bağlantı havuzu ve paralel Range parçaları."""
+import collections, os, re, threading, time
+
+from .config import DOWNLOAD_BUF, DOWNLOAD_DIR, DOWNLOAD_MIN_PART, DOWNLOAD_PARTS, DOWNLOAD_TIMEOUT
+from .metrics import METRICS, fmt_bytes
+from .uploads import fmt_eta
+
+# ===== HTTP bağlantı havuzu =====
+class HttpPool:
+    """(şema, sunucu, port) başına boşta bekleyen HTTP/1.1 bağlantıları.
+
+    Yanıt gövdesi sonuna kadar okunan bağlantı havuza geri döner; sunucu
+    kapatacağını bildirdiyse (Connection: close, HTTP/1.0) atılır. Boşta
+    beklerken sunucunun kapattığı bağlantıdaki istek bir kez yeni
+    bağlantıyla yinelenir.
+    """
+    def __init__(self, per_host=DOWNLOAD_PARTS):
+        self.per_host = per_host
+        self.lock = threading.Lock()
+        self.idle = collections.defaultdict(list)
+        self.opened = self.reused = 0
+
+    def _get(self, key):
+        with self.lock:
+            if self.idle[key]:
+                self.reused += 1
+                return self.idle[key].pop(), True
+            self.opened += 1
+        import http.client      # ilk /get'te yüklenir
+        scheme, host, port = key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        conn = cls(host, port, timeout=DOWNLOAD_TIMEOUT)
+        conn.pool_key = key
+        return conn, False
+
+    def request(self, method, url, headers=None):
+        """(bağlantı, yanıt); gövde okununca release(), hata olursa conn.close()."""
+        import http.client
+        from urllib.parse import urlsplit
+        u = urlsplit(url)
+        if u.scheme not in ("http", "https") or not u.hostname:
+            raise ValueError(f"desteklenmeyen link: {url}")
+        key = (u.scheme, u.hostname, u.port or (443 if u.scheme == "https" else 80))
+        target = (u.path or "/") + (f"?{u.query}" if u.query else "")
+        while True:
+            conn, reused = self._get(key)
+            try:
+                conn.request(method, target, headers=headers or {})
+                return conn, conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if not reused: raise
+            except BaseException:
+                conn.close(); raise
+
+    def release(self, conn, resp):
+        if resp.will_close or not resp.isclosed():
+            conn.close(); return
+        with self.lock:
+            idle = self.idle[conn.pool_key]
+            if len(idle) < self.per_host:
+                idle.append(conn); return
+        conn.close()
+
+    def __str__(self):
+        with self.lock: idle = sum(len(v) for v in self.idle.values())
+        return f"bağlantı: {self.opened} açıldı, {self.reused} yeniden kullanıldı, {idle} boşta"
+
+# ===== İndirme =====
+def link_name(url):
+    from urllib.parse import unquote, urlsplit
+    name = os.path.basename(unquote(urlsplit(url).path)).strip()
+    return name if name not in ("", ".", "..") else "indirilen"
+
+def unique_path(folder, name):
+    # var olan dosyanın (ve yarım .part'ın) üstüne yazılmaz: "ad (1).png"
+    base, ext = os.path.splitext(name)
+    path, n = os.path.join(folder, name), 1
+    while os.path.exists(path) or os.path.exists(path + ".part"):
+        path = os.path.join(folder, f"{base} ({n}){ext}"); n += 1
+    return path
+
+def progress_bar(frac, width=12):
+    full = int(frac * width)
+    return "[" + "#" * full + "-" * (width - full) + "]"
+
+class Download:
+    """Kuyruktaki tek indirme ve ilerlemesi."""
+    def __init__(self, n, url, name=None):
+        self.id = n
+        self.url = url
+        self.name = os.path.basename(name or "") or link_name(url)   # sunucu adı yol içeremez
+        self.path = None
+        self.size = None            # bilinmiyorsa None (Content-Length yok)
+        self.got = 0
+        self.parts = 1
+        self.state = "sırada"       # sırada | iniyor | bitti | iptal | hata
+        self.t0 = None
+        self.cancelled = False
+        self.stop = False           # iptal ya da başka parçada hata: tüm parçalar durur
+        self.error = None
+        self.done = None            # bitti/iptal/hata olunca done(dl) (Client.download)
+
+    def progress(self):
+        dt = max(time.monotonic() - self.t0, 1e-6) if self.t0 else 0
+        rate = self.got / dt if dt else 0
+        speed = f"{rate / 1e6:.1f} MB/s"
+        if not self.size: return f"{fmt_bytes(self.got)} {speed}"
+        eta = (self.size - self.got) / rate if rate else 0
+        parts = f" ×{self.parts}" if self.parts > 1 else ""
+        return (f"{progress_bar(self.got / self.size)} {self.got * 100 // self.size}% "
+                f"{speed} ETA {fmt_eta(eta)}{parts}")
+
+def copy_body(resp, f, dl, downloads, limit=None):
+    """Yanıt gövdesini (en çok limit bayt) f'e yazar; tek tampon, readinto."""
+    buf = bytearray(DOWNLOAD_BUF); view = memoryview(buf)
+    total = 0
+    while limit is None or total < limit:
+        n = resp.readinto(view if limit is None else view[:min(len(buf), limit - total)])
+        if not n: break
+        if dl.stop: raise InterruptedError("durduruldu")
+        f.write(view[:n]); total += n
+        downloads.advance(dl, n)
+    return total
+
+def response_size(resp):
+    """(boyut, parçalanabilir mi); boyut bilinmiyorsa None."""
+    if resp.status == 206:
+        m = re.fullmatch(r"bytes 0-\d+/(\d+)", resp.getheader("Content-Range", ""))
+        if not m: raise RuntimeError("sunucunun Content-Range yanıtı anlaşılamadı")
+        return int(m[1]), True
+    if resp.status == 200:
+        length = resp.getheader("Content-Length", "")
+        return (int(length) if length.isdigit() else None), False
+    if resp.status == 416:          # boş dosyada bytes=0- karşılanamaz
+        resp.read(); return 0, False
+    raise RuntimeError(f"HTTP {resp.status} {resp.reason}")
+
+def fetch_range(dl, downloads, tmp, start, end):
+    # [start, end) aralığı; her parça kendi bağlantısı ve dosya tutamacıyla
+    pool = downloads.pool
+    conn, resp = pool.request("GET", dl.url, {"Range": f"bytes={start}-{end - 1}"})
+    try:
+        if resp.status != 206: raise RuntimeError(f"sunucu Range yanıtı vermedi (HTTP {resp.status})")
+        with open(tmp, "r+b") as f:
+            f.seek(start)
+            n = copy_body(resp, f, dl, downloads)
+    except BaseException:
+        conn.close(); raise
+    pool.release(conn, resp)
+    if n != end - start: raise ConnectionError(f"parça eksik indi ({n}/{end - start})")
+
+def fetch_parts(dl, downloads, tmp, resp, f, step):
+    """İlk parçayı açık yanıttan okur, kalan aralıkları paralel ister."""
+    import concurrent.futures
+    bounds = [(a, min(a + step, dl.size)) for a in range(step, dl.size, step)]
+    with concurrent.futures.ThreadPoolExecutor(len(bounds), "download") as ex:
+        futs = [ex.submit(fetch_range, dl, downloads, tmp, a, b) for a, b in bounds]
+        try:
+            if copy_body(resp, f, dl, downloads, step) != step:
+                raise ConnectionError(f"parça eksik indi (0-{step})")
+        except BaseException:
+            dl.stop = True; raise
+        for fut in concurrent.futures.as_completed(futs):
+            if fut.exception():         # ilk hata asıl neden; ötekiler "durduruldu"
+                dl.stop = True; raise fut.exception()
+
+def fetch(dl, downloads):
+    """Dosyayı .part'a indirip yerine koyar.
+
+    İlk istek "Range: bytes=0-": yanıt hem boyutu söyler hem de ilk parça
+    olarak okunur, küçük dosyalar tek istekte iner. Dosya
+    DOWNLOAD_MIN_PART'ın en az iki katıysa kalan aralıklar ayrı
+    bağlantılarda paralel istenir; ilk yanıt kendi parçasının sonunda
+    kesilir, o bağlantı havuza dönmez. Range tanımayan sunucu 200 ile
+    tüm dosyayı yollar, tek akış olarak iner.
+    """
+    pool = downloads.pool
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+    dl.path = unique_path(DOWNLOAD_DIR, dl.name)
+    tmp = dl.path + ".part"
+    conn, resp = pool.request("GET", dl.url, {"Range": "bytes=0-"})
+    try:
+        dl.size, ranged = response_size(resp)
+        if ranged: dl.parts = max(1, min(DOWNLOAD_PARTS, dl.size // DOWNLOAD_MIN_PART))
+        with open(tmp, "wb") as f:
+            if dl.parts > 1:
+                f.truncate(dl.size)
+                fetch_parts(dl, downloads, tmp, resp, f, -(-dl.size // dl.parts))
+            elif dl.size != 0:
+                n = copy_body(resp, f, dl, downloads)
+                if dl.size is not None and n != dl.size:
+                    raise ConnectionError(f"eksik indi ({n}/{dl.size})")
+        os.replace(tmp, dl.path)
+    except BaseException:
+        conn.close()
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+    if dl.parts > 1: conn.close()
+    else: pool.release(conn, resp)
+
+class Downloads:
+    """İndirme kuyruğu: /get, /downloads listesi ve durum satırı.
+
+    Tek işçi thread'i kuyruğu sırayla indirir; ekran ve sohbet beklemez.
+    Bağlantılar HttpPool'da kalır, art arda /get'ler ve bir dosyanın
+    parçaları aynı TCP bağlantılarını kullanır.
+    """
+    KEEP_DONE = 20      # listede tutulan bitmiş kayıt
+    STATUS_EVERY = 0.1  # durum satırı güncelleme aralığı, sn
+
+    def __init__(self, ui):
+        self.ui = ui
+        self.pool = HttpPool()
+        self.lock = threading.Lock()
+        self.items = []
+        self.queue = collections.deque()
+        self.active = None
+        self.next_id = 1
+        self.worker = None
+        self.shown = 0.0
+
+    def add(self, url, name=None, done=None):
+        with self.lock:
+            dl = Download(self.next_id, url, name); self.next_id += 1
+            dl.done = done
+            self.items.append(dl); self.queue.append(dl)
+            if not self.worker:
+                self.worker = threading.Thread(target=self._work, name="download", daemon=True)
+                self.worker.start()
+        self.ui.write(f"[İndirme #{dl.id}] {dl.name} sıraya alındı")
+        self.update_status()
+        return dl
+
+    def _work(self):
+        while True:
+            with self.lock:
+                if not self.queue:
+                    self.active = self.worker = None; return
+                dl = self.active = self.queue.popleft()
+                dl.state = "iniyor"; dl.t0 = time.monotonic()
+            try: fetch(dl, self)
+            except Exception as e: self.finish(dl, e)
+            else: self.finish(dl)
+
+    def advance(self, dl, n):
+        with self.lock: dl.got += n     # parçalar aynı anda ilerler
+        if METRICS.on: METRICS.count("download.bytes", n)
+        now = time.monotonic()
+        if now - self.shown >= self.STATUS_EVERY:
+            self.shown = now; self.update_status()
+
+    def finish(self, dl, error=None):
+        with self.lock:
+            if dl.cancelled: dl.state = "iptal"
+            elif error is None: dl.state = "bitti"
+            else: dl.state = "hata"
+            dl.error = error
+            done = [d for d in self.items if d.state in ("bitti", "iptal", "hata")]
+            for d in done[:-self.KEEP_DONE]: self.items.remove(d)
+        dt = time.monotonic() - dl.t0
+        if dl.state == "iptal": self.ui.write(f"[İndirme #{dl.id}] iptal edildi: {dl.name}")
+        elif error: self.ui.write(f"[Hata] İndirilemedi: {dl.name}: {error}")
+        else:
+            parts = f", {dl.parts} parça" if dl.parts > 1 else ""
+            self.ui.write(f"[İndirildi] {dl.name} → {dl.path} "
+                          f"({fmt_bytes(dl.got)}, {dl.got / max(dt, 1e-6) / 1e6:.1f} MB/s{parts})")
+            if METRICS.on: METRICS.observe("download.file", dt)
+        self.update_status()
+        if dl.done: dl.done(dl)
+
+    def cancel(self, n):
+        with self.lock:
+            dl = next((d for d in self.items if d.id == n), None)
+            if dl is None: return f"[Hata] #{n} numaralı indirme yok."
+            if dl.state not in ("sırada", "iniyor"): return f"[Bilgi] #{n} zaten {dl.state}."
+            dl.cancelled = dl.stop = True
+            if dl.state == "iniyor": return f"[İndirme #{n}] iptal ediliyor…"
+            self.queue.remove(dl); dl.state = "iptal"
+        self.update_status()
+        if dl.done: dl.done(dl)
+        return f"[İndirme #{n}] iptal edildi: {dl.name}"
+
+    def listing(self):
+        with self.lock: items = list(self.items)
+        if not items: return "[Bilgi] İndirme yok."
+        lines = ["[İndirmeler]"]
+        for d in items:
+            info = d.progress() if d.state == "iniyor" else d.state
+            lines.append(f"  #{d.id} {d.name}  {info}")
+        lines.append(f"  {self.pool}")
+        return "\n".join(lines)
+
+    def update_status(self):
+        dl, waiting = self.active, len(self.queue)
+        if not dl:
+            self.ui.set_status(f"↓ {waiting} sırada" if waiting else "", "download")
+            return
+        more = f" (+{waiting} sırada)" if waiting else ""
+        self.ui.set_status(f"↓ #{dl.id} {dl.name} {dl.progress()}{more}", "download")
@@ -0,0 +1,279 @@
+"""Gelen satırların yönlendirilmesi ve thread motoru (alım döngüsü, gönderici)."""
+import socket, threading, time
+
+from .commands import remember_url
+from .config import AUTO_PREVIEW, QUIT_WAIT, SEND_WAIT, is_image_name
+from .downloads import Downloads
+from .metrics import METRICS
+from .protocol import Dispatcher, Message, TKM_VIEWS
+from .session import Outbox
+from .uploads import Transfers, send_upload, send_upload_chunked
+
+# ===== Gelen satırlar =====
+# İşleyici imzası: (msg, ui, transfers, meter) → False yalnızca "sunucu bizi attı"
+def _say_line(msg, ui, transfers, meter):
+    ui.say(msg.line, log=True)
+
+LINES = Dispatcher(_say_line)
+
+@LINES.on("PONG")
+def _on_pong(msg, ui, transfers, meter):
+    # --- keepalive ---
+    if not meter: return _say_line(msg, ui, transfers, meter)
+    rtt = meter.on_pong(msg.line)
+    if rtt is not None: ui.set_latency(f"{rtt * 1000:.0f} ms")
+
+@LINES.on("FILE2")
+def _on_file2(msg, ui, transfers, meter):
+    # --- upload2 yanıtları (yükleme işçisine) ---
+    if not transfers: return _say_line(msg, ui, transfers, meter)
+    transfers.on_reply(msg.line)
+
+@LINES.on("TKM")
+def _on_tkm(msg, ui, transfers, meter):
+    m = msg.sub()
+    ui.write(TKM_VIEWS.table.get(m.kind, TKM_VIEWS.default)(m), log=True)
+
+@LINES.on("FILEURL")
+def _on_fileurl(msg, ui, transfers, meter):
+    # --- Dosya URL’leri ---
+    f = msg.fields
+    url = f.get("url", "?")
+    name = f.get("name", "?")
+    n = remember_url(url, f.get("name"))
+    ui.write(f"[Dosya] {f.get('from', '?')} → {name}  (/get {n})\n        İndir: {url}", log=True)
+    if AUTO_PREVIEW and ui.previews and is_image_name(name): ui.previews.request(url, name)
+
+@LINES.on("[FILE]")
+def _on_file_note(msg, ui, transfers, meter):
+    ui.write(msg.line, log=True)
+
+@LINES.on("USERLIST")
+def _on_userlist(msg, ui, transfers, meter):
+    ui.set_users([u for u in msg.rest.split(",") if u])
+
+@LINES.on("JOIN")
+def _on_join(msg, ui, transfers, meter):
+    ui.user_join(msg.rest.strip())
+
+@LINES.on("PART")
+def _on_part(msg, ui, transfers, meter):
+    ui.user_part(msg.rest.strip())
+
+@LINES.on("NOTICE")
+def _on_notice(msg, ui, transfers, meter):
+    ui.say("[Sunucu] " + msg.rest, log=True)
+
+CTRL = Dispatcher(_say_line)
+
+@LINES.on("CTRL")
+def _on_ctrl(msg, *args):
+    return CTRL(msg.sub(), *args)
+
+@CTRL.on("CLEAR")
+def _on_clear(msg, ui, transfers, meter):
+    ui.clear("— Admin sohbet penceresini temizledi —")
+
+@CTRL.on("KICKED")
+def _on_kicked(msg, ui, transfers, meter):
+    ui.say("[Sistem] Admin tarafından çıkarıldınız.")
+    return False
+
+def handle_line(text, ui, transfers=None, meter=None) -> bool:
+    """Sunucudan gelen tek satırı ekrana işler. False → sunucu bizi attı."""
+    kind = text.partition(" ")[0]           # Message'daki ayrımın aynısı
+    if ":" in kind: kind = kind.partition(":")[0]
+    fn = LINES.table.get(kind)
+    if fn is None:                  # sohbet satırı: Message kurulmadan ekrana
+        ui.say(text, log=True); return True
+    return fn(Message(text, kind), ui, transfers, meter) is not False
+
+def handle_message(msg, ui, transfers=None, meter=None) -> bool:
+    return LINES.table.get(msg.kind, _say_line)(msg, ui, transfers, meter) is not False
+
+# ===== Alım döngüsü =====
+def process_line(raw, ui, transfers, meter) -> bool:
+    """Ham satırı (v2'de çözülmüş çerçeveyi) işler; ölçüm açıksa süreleri kaydeder."""
+    if raw.__class__ is Message:
+        if not METRICS.on: return handle_message(raw, ui, transfers, meter)
+        t0 = time.perf_counter()
+        ok = handle_message(raw, ui, transfers, meter)
+        METRICS.observe("recv.dispatch", time.perf_counter() - t0)
+        return ok
+    if not METRICS.on:
+        return handle_line(raw.decode("utf-8", errors="replace").strip(), ui, transfers, meter)
+    t0 = time.perf_counter()
+    text = raw.decode("utf-8", errors="replace").strip()
+    t1 = time.perf_counter()
+    ok = handle_line(text, ui, transfers, meter)
+    METRICS.observe("recv.decode", t1 - t0)
+    METRICS.observe("recv.dispatch", time.perf_counter() - t1)
+    return ok
+
+def count_recv(n):
+    if METRICS.on:
+        METRICS.count("recv.calls"); METRICS.count("recv.bytes", n)
+
+def pump_lines(session, ui, transfers):
+    """Bağlantı bitene kadar satırları işler; "kicked" ya da kopma nedenini döndürür."""
+    sock, framer, meter = session.sock, session.framer, session.meter
+    while True:
+        try:
+            for line in framer.lines():
+                if not process_line(line, ui, transfers, meter):
+                    return "kicked"
+            n = framer.recv(sock)
+        except Exception as e:
+            return str(e) or type(e).__name__
+        if not n: return "sunucu kapattı"
+        meter.bytes_in += n
+        count_recv(n)
+
+def recv_loop(session, ui, out):
+    """Alım thread'i; bağlantı koparsa geri çekilerek yeniden bağlanır."""
+    while True:
+        why = pump_lines(session, ui, out.transfers)
+        if session.closing: return
+        if why == "kicked":
+            out.kill(); session.close(); return
+        session.lost(ui, why)       # soketi kapatır: bekleyen yazımlar da uyanır
+        out.detach()
+        while True:
+            time.sleep(session.delay())
+            if session.closing: return
+            try: welcome = session.reconnect_once()
+            except OSError as e:
+                session.failed(ui, e); continue
+            break
+        session.restored(ui, welcome)
+        out.attach(session.wire())
+
+# ===== Gönderici (thread motoru) =====
+class SocketSender:
+    """Bloklayan soket üzerinden gönderim (varsayılan motor).
+
+    Soketi tek bir yazıcı thread kullanır: sohbet satırları, PING, /quit
+    ve dosya başlıkları aynı sınırlı kuyruktan (Outbox) sırayla çıkar;
+    birikmiş satırlar tek sendmsg'de (writev) gider, kısmi yazımın kalanı
+    yeniden denenir. Dosya akarken girilen satırlar v1'de dosya bitince,
+    upload2'de her parçadan sonra yazılır; böylece satırlar dosya
+    gövdesine karışmaz. Bağlantı yokken yazılanlar kuyrukta bekler ve
+    yeniden bağlanınca sırayla gider. Kuyruk doluysa send_line yer açılmasını
+    SEND_WAIT kadar bekler (geri basınç), sonra satırı reddeder.
+    """
+    def __init__(self, session, ui):
+        self.session, self.sock, self.ui = session, session.wire(), ui
+        self.transfers = Transfers(ui, session.meter)
+        self.transfers.on_ready = self._wake
+        self.downloads = Downloads(ui)
+        self.cv = threading.Condition()
+        self.busy = False           # dosya akıyor
+        self.upload = None          # akan yükleme (keepalive v1 gövdesini ayırt eder)
+        self.writing = False        # kuyruktan alınmış satırlar yazılıyor
+        self.online = True
+        self.dead = False           # atıldık: artık gönderim yok
+        self.out = Outbox(ui)
+        threading.Thread(target=self._worker, name="send", daemon=True).start()
+
+    def send_line(self, text):
+        data = (text + "\n").encode("utf-8")
+        with self.cv:
+            if self.dead: raise BrokenPipeError
+            if self.out.full() and not self.cv.wait_for(lambda: self.dead or not self.out.full(), SEND_WAIT):
+                self.out.refuse(text); return
+            if self.dead: raise BrokenPipeError
+            self.out.put(data)
+            if self.busy or not self.online: self.out.show()
+            self.cv.notify_all()
+
+    def send_file(self, path, raw=False):
+        if self.transfers.add(path, raw): self._wake()
+
+    def _wake(self):
+        with self.cv: self.cv.notify_all()
+
+    def quit(self):
+        self.session.closing = True     # kopma yeniden bağlanma sayılmasın
+        self.send_line("/quit")
+        with self.cv:                   # soket /quit yazılmadan kapanmasın
+            self.cv.wait_for(lambda: not (self.out or self.writing) or not self.online, QUIT_WAIT)
+
+    def detach(self):
+        with self.cv: self.online = False
+        self.transfers.abort_replies()
+
+    def kill(self):
+        with self.cv:
+            self.online = False; self.dead = True
+            self.cv.notify_all()
+
+    def attach(self, sock):
+        self.transfers.requeue_interrupted()
+        with self.cv:
+            self.sock = sock; self.online = True
+            self.cv.notify_all()
+
+    def queue_text(self):
+        return self.out.report()
+
+    def _drain(self):
+        """Kuyruktakileri yazar; her turda o ana kadar birikenler tek yazımda."""
+        while True:
+            with self.cv:
+                if not self.online or not self.out:
+                    self.out.show(); return
+                batch = self.out.take()
+                self.writing = True
+                self.cv.notify_all()        # yer açıldı: bekleyen send_line'lar
+            rest = self._write(batch)
+            with self.cv:
+                self.writing = False
+                if rest:
+                    # tam gidemeyenler yeniden bağlanınca baştan; alım thread'i kopmayı görür
+                    self.out.unget(rest); self.online = False
+                self.cv.notify_all()
+            if rest:
+                try: self.sock.shutdown(socket.SHUT_RDWR)
+                except OSError: pass
+                return
+
+    def _write(self, batch):
+        # sendmsg kısmi yazabilir (sinyal, dolu tampon): giden kısım düşülüp kalanı
+        # yeniden yazılır. Hata olursa tam gidemeyen satırlar döner.
+        sock, total = self.sock, sum(map(len, batch))
+        t0 = time.perf_counter() if METRICS.on else 0
+        bufs, done = [memoryview(b) for b in batch], 0
+        try:
+            if not hasattr(sock, "sendmsg"):            # Windows
+                sock.sendall(b"".join(batch)); done = len(batch)
+            while done < len(batch):
+                n = sock.sendmsg(bufs[done:])
+                while n:
+                    if n >= len(bufs[done]): n -= len(bufs[done]); done += 1
+                    else: bufs[done] = bufs[done][n:]; n = 0
+        except OSError:
+            return batch[done:]
+        self.session.meter.bytes_out += total
+        self.out.sent(len(batch))
+        if t0: METRICS.observe("send.write", time.perf_counter() - t0)
+        return None
+
+    def _worker(self):
+        while True:
+            with self.cv:
+                while not self.online or not (self.out or (up := self.transfers.next())):
+                    self.cv.wait()
+                if self.out: up = None          # önce bekleyen satırlar: sıra korunur
+                if up: up.chunked = "upload2" in self.session.caps
+                self.busy, self.upload = up is not None, up
+            if not up:
+                self._drain(); continue
+            try:
+                if up.chunked: send_upload_chunked(self.sock, up, self.transfers, self._drain)
+                else: send_upload(self.sock, up, self.transfers)
+                self.transfers.finish(up)
+            except Exception as e:
+                if not self.online and not isinstance(e, OSError): e = ConnectionError(e)
+                self.transfers.finish(up, e)
+            if self.online: self.transfers.requeue_interrupted()
+            with self.cv: self.busy, self.upload = False, None
@@ -0,0 +1,352 @@
+"""Başsız istemci: Client API ve --headless JSON satırları (curses yüklenmez)."""
+import asyncio, json, os, signal, sys, threading, time
+
+from .aio import AsyncSender, async_reconnect, open_stream
+from .commands import add_link, run_command
+from .config import (AUTO_PREVIEW, EVENT_QUEUE, KEEPALIVE_INTERVAL, METRICS_FILE, PREVIEW_MODE, QUIT_WAIT,
+                     arg_value, is_image_name)
+from .engine import count_recv
+from .metrics import METRICS
+from .protocol import Dispatcher, LineFramer, Presence, TKM_VIEWS, as_message
+from .session import Session
+from .transports import make_transport
+
+# ===== Başsız istemci (--headless, Client API) =====
+def handshake_answers(name=None, accept=None, admin_key=None):
+    """Soru sormadan handshake: verilen cevaplar, yoksa ortam değişkenleri."""
+    name = name or os.environ.get("CHAT_NAME")
+    if not name: raise ValueError("isim gerekli (name= ya da CHAT_NAME)")
+    answers = {"USERNAME?": name, "ACCEPT?": accept or os.environ.get("CHAT_ACCEPT", "OK")}
+    key = admin_key or os.environ.get("CHAT_ADMINKEY")
+    if key: answers["ADMINKEY?"] = key
+    return answers
+
+def _ev_line(msg, client):
+    name, sep, text = msg.line.partition(": ")
+    if sep and name and " " not in name:
+        return {"type": "chat", "from": name, "text": text}
+    return {"type": "line", "text": msg.line}
+
+# İşleyici imzası: (msg, client) → olay (dict), None (olay yok) ya da False (atıldık)
+EVENTS = Dispatcher(_ev_line)
+
+@EVENTS.on("PONG")
+def _ev_pong(msg, client):
+    client.session.meter.on_pong(msg.line)
+
+@EVENTS.on("FILE2")
+def _ev_file2(msg, client):
+    client.out.transfers.on_reply(msg.line)
+
+@EVENTS.on("NOTICE")
+def _ev_notice(msg, client):
+    return {"type": "notice", "text": msg.rest}
+
+@EVENTS.on("FILEURL")
+def _ev_fileurl(msg, client):
+    f = msg.fields
+    url, name = f.get("url"), f.get("name")
+    if AUTO_PREVIEW and url and name and client.previews and is_image_name(name):
+        client.previews.request(url, name)
+    return {"type": "file", "from": f.get("from"), "name": f.get("name"), "url": url,
+            "n": add_link(url, f.get("name")) if url else None}
+
+@EVENTS.on("[FILE]")
+def _ev_file_note(msg, client):
+    return {"type": "file_note", "text": msg.line}
+
+@EVENTS.on("USERLIST")
+def _ev_userlist(msg, client):
+    users = [u for u in msg.rest.split(",") if u]
+    joined, left = client.users.replace(users)
+    return {"type": "users", "users": users, "joined": joined, "left": left}
+
+@EVENTS.on("JOIN")
+def _ev_join(msg, client):
+    name = msg.rest.strip()
+    client.users.join(name)
+    return {"type": "join", "user": name}
+
+@EVENTS.on("PART")
+def _ev_part(msg, client):
+    name = msg.rest.strip()
+    client.users.part(name)
+    return {"type": "part", "user": name}
+
+@EVENTS.on("TKM")
+def _ev_tkm(msg, client):
+    m = msg.sub()
+    return {"type": "tkm", "event": m.kind.lower(), "fields": m.fields, "text": TKM_VIEWS(m)}
+
+@EVENTS.on("CTRL")
+def _ev_ctrl(msg, client):
+    m = msg.sub()
+    if m.kind == "KICKED": return False
+    return {"type": "ctrl", "action": m.kind.lower()}
+
+class Client:
+    """curses'sız istemci: botlar, arşivleyiciler, yük üreticileri için.
+
+        client = await Client.connect(name="bot")
+        await client.send("merhaba")
+        await client.send_file("foto.jpg")
+        dl = await client.download(url)     # "file" olayındaki link; dl.path
+        async for ev in client:
+            print(ev["type"], ev.get("text"))
+
+    Olaylar JSON'a hazır dict'lerdir (EVENTS tablosu). Handshake soruları
+    verilen cevaplarla, yoksa CHAT_NAME / CHAT_ACCEPT / CHAT_ADMINKEY ile
+    yanıtlanır; bağlantı koparsa ekranlı motorlar gibi yeniden bağlanır.
+    Gönderimi AsyncSender yapar. Okunmayan olaylar EVENT_QUEUE'yu
+    doldurunca soketten okuma durur, sunucu TCP üzerinden yavaşlar.
+    """
+    archive = None      # run_command için ChatUI yerine geçer
+
+    def __init__(self, session, reader, writer, welcome):
+        self.session, self.reader, self.welcome = session, reader, welcome
+        self.events = asyncio.Queue(EVENT_QUEUE)
+        self.users = Presence()
+        self.received = 0
+        self.loop, self.thread = asyncio.get_running_loop(), threading.get_ident()
+        self.out = AsyncSender(session, writer, self)
+        self.previews = None
+        if PREVIEW_MODE != "none":
+            from .preview import Previews
+            self.previews = Previews(self, self.out.downloads.pool)
+        self.receiver = asyncio.ensure_future(self._receive())
+        self.tasks = {self.receiver, asyncio.ensure_future(self._keepalive())}
+
+    @classmethod
+    async def connect(cls, host=None, port=None, name=None, accept=None, admin_key=None,
+                      transport=None):
+        session = Session(transport or make_transport(host, port))
+        session.answers = handshake_answers(name, accept, admin_key)
+        welcome = await asyncio.to_thread(session.reconnect_once)
+        session.online = True
+        reader, writer = await open_stream(session)
+        return cls(session, reader, writer, welcome)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        ev = await self.events.get()
+        if ev is None:
+            self.events.put_nowait(None)    # sonraki döngüler de hemen bitsin
+            raise StopAsyncIteration
+        return ev
+
+    def emit(self, ev):
+        if threading.get_ident() != self.thread:    # indirme işçisinden gelen satırlar
+            self.loop.call_soon_threadsafe(self.emit, ev); return
+        try: self.events.put_nowait(ev)
+        except asyncio.QueueFull: asyncio.ensure_future(self.events.put(ev))
+
+    async def send(self, text):
+        await self.out.room()       # kuyruk doluysa yer açılana kadar bekler
+        self.out.send_line(text)
+
+    async def send_file(self, path, raw=False):
+        """Dosyayı yükler; bitince Upload'ı döndürür (iptalde state="iptal").
+
+        CHAT_OPTIMIZE=1 ise görseller önce küçültülür (OPTIMIZE_*); raw=True
+        özgün baytları yollar.
+        """
+        fut = asyncio.get_running_loop().create_future()
+        up = self.out.transfers.add(path, raw)
+        if not up: raise FileNotFoundError(path)
+        up.done = lambda u: fut.done() or fut.set_result(u)
+        self.out.wake.set()
+        await fut
+        if up.state == "hata": raise up.error
+        return up
+
+    async def download(self, url, name=None):
+        """Linki DOWNLOAD_DIR'e indirir; bitince Download'ı döndürür (yolu: dl.path)."""
+        fut = self.loop.create_future()
+        done = lambda d: self.loop.call_soon_threadsafe(lambda: fut.done() or fut.set_result(d))
+        dl = self.out.downloads.add(url, name, done)
+        await fut
+        if dl.state == "hata": raise dl.error
+        return dl
+
+    async def wait_uploads(self):
+        t = self.out.transfers
+        while t.queue or t.active or any(u.state == "yarıda" for u in t.items):
+            await asyncio.sleep(0.05)
+
+    async def wait_downloads(self):
+        d = self.out.downloads
+        while d.queue or d.active: await asyncio.sleep(0.05)
+
+    async def close(self):
+        """/quit yollar ve bağlantıyı kapatır; olay döngüsü biter.
+
+        Sunucu /quit'ten önceki satırları da yollasın diye bağlantıyı
+        kendisi kapatana kadar (en fazla QUIT_WAIT) okumaya devam edilir.
+        """
+        try:
+            if not self.session.closing: self.out.quit()
+            await asyncio.wait_for(self.out.writer.drain(), QUIT_WAIT)
+        except (OSError, asyncio.TimeoutError): pass
+        self.session.closing = True
+        await asyncio.wait([self.receiver], timeout=QUIT_WAIT)
+        for t in list(self.tasks) + list(self.out.tasks): t.cancel()
+        self.out.writer.close()
+        self.session.close()
+        if self.previews: self.previews.close()
+        self.emit(None)
+
+    # --- Session, Transfers ve run_command'ın beklediği ekran yüzü ---
+    def say(self, text, log=False):
+        self.emit({"type": "info", "text": text, "ts": round(time.time(), 3)})
+
+    write = say
+
+    def show_preview(self, pv):
+        ev = {"type": "preview", "url": pv.url, "name": pv.name, "width": pv.w, "height": pv.h,
+              "lines": pv.lines, "ts": round(time.time(), 3)}
+        if pv.sixel: ev["sixel"] = pv.sixel
+        self.emit(ev)
+
+    def clear(self, note=None): pass
+    def set_status(self, text, part="upload"): pass
+    def set_latency(self, text): pass
+
+    def resync_users(self):
+        self.users.synced = False
+
+    def stats_text(self):
+        return f"[Olaylar] alınan satır: {self.received}  okunmamış olay: {self.events.qsize()}"
+
+    # --- alım ---
+    async def _pump(self):
+        framer, meter, events = self.session.framer, self.session.meter, self.events
+        table = EVENTS.table
+        try:
+            while True:
+                ts = round(time.time(), 3)
+                for raw in framer.lines():
+                    self.received += 1
+                    msg = as_message(raw)
+                    ev = table.get(msg.kind, _ev_line)(msg, self)
+                    if ev is False: return "kicked"
+                    if ev:
+                        ev["ts"] = ts
+                        if events.full(): await events.put(ev)
+                        else: events.put_nowait(ev)
+                data = await self.reader.read(65536)
+                if not data: return "sunucu kapattı"
+                meter.bytes_in += len(data)
+                count_recv(len(data))
+                framer.feed(data)
+        except Exception as e:
+            return str(e) or type(e).__name__
+
+    async def _receive(self):
+        session = self.session
+        try:
+            while True:
+                why = await self._pump()
+                if session.closing: return
+                if why == "kicked":
+                    self.out.kill(); self.out.writer.close()
+                    self.emit({"type": "kicked", "ts": round(time.time(), 3)})
+                    return
+                self.out.writer.close()
+                session.lost(self, why)
+                self.out.detach()
+                conn = await async_reconnect(session, self)
+                if not conn: return
+                self.reader, writer, welcome = conn
+                session.restored(self, welcome)
+                self.out.attach(writer)
+        finally:
+            self.emit(None)
+
+    async def _keepalive(self):
+        while True:
+            await asyncio.sleep(KEEPALIVE_INTERVAL)
+            self.session.keepalive_tick(self.out, self)
+
+async def headless_main():
+    """--headless: stdin satırları mesaj/komut, olaylar stdout'a JSON satırı.
+
+    stdin bitince bekleyen yüklemeler tamamlanıp çıkılır; --listen ile
+    sunucu kapatana (ya da SIGINT/SIGTERM gelene) kadar dinlenir.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        client = await Client.connect(name=arg_value("--name"), accept=arg_value("--accept"),
+                                      admin_key=arg_value("--admin-key"))
+    except (OSError, ValueError) as e:
+        print(f"[Hata] Bağlanılamadı: {e}", file=sys.stderr)
+        return 1
+    if METRICS_FILE: METRICS.start_dump(os.path.expanduser(METRICS_FILE))
+    listen = "--listen" in sys.argv[1:]
+
+    def stop():
+        if not client.session.closing: asyncio.ensure_future(client.close())
+
+    async def finish():
+        await client.wait_uploads()
+        await client.wait_downloads()
+        await client.close()
+
+    def on_lines(lines):
+        for raw in lines:
+            text = raw.decode("utf-8", errors="replace").rstrip("\r")
+            if not text or client.session.closing: continue
+            try:
+                if run_command(text, client, client.out) == "quit": stop()
+            except (BrokenPipeError, ConnectionError):
+                stop()
+
+    def on_eof():
+        if not listen and not client.session.closing: asyncio.ensure_future(finish())
+
+    def on_error(text):
+        client.emit({"type": "error", "text": text, "ts": round(time.time(), 3)})
+
+    def read_stdin():
+        # sys.stdin yerine ham fd: bloklu okuma çıkışta tampon kilidini tutmasın
+        fd, framer = sys.stdin.fileno(), LineFramer()
+        try:
+            while data := os.read(fd, 65536):
+                framer.feed(data)
+                lines = list(framer.lines())
+                if lines: loop.call_soon_threadsafe(on_lines, lines)
+            framer.feed(b"\n")         # sonu satır sonuyla bitmeyen girdi
+            loop.call_soon_threadsafe(on_lines, list(framer.lines()))
+        except (OSError, ValueError) as e:      # ValueError: satır framer sınırını aştı
+            loop.call_soon_threadsafe(on_error, f"[Hata] stdin okunamadı: {e}; girdi kapatıldı")
+        finally:
+            # thread ölse de çıkış yolu açık kalsın (--listen yoksa finish)
+            loop.call_soon_threadsafe(on_eof)
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try: loop.add_signal_handler(sig, stop)
+        except (NotImplementedError, AttributeError, ValueError): pass
+    threading.Thread(target=read_stdin, name="stdin", daemon=True).start()
+
+    out = sys.stdout
+    out.write(json.dumps({"type": "welcome", "text": client.welcome,
+                          "ts": round(time.time(), 3)}, ensure_ascii=False) + "\n")
+    kicked = False
+    try:
+        async for ev in client:
+            kicked = kicked or ev["type"] == "kicked"
+            out.write(json.dumps(ev, ensure_ascii=False) + "\n")
+            if client.events.empty(): out.flush()
+        out.flush()
+    except BrokenPipeError:
+        pass
+    finally:
+        await client.close()
+    return 2 if kicked else 0
@@ -0,0 +1,115 @@
+"""Yerel mesaj geçmişi (SQLite, CHAT_HISTORY ile açılır)."""
+import os, queue, sqlite3, threading, time
+
+from .config import (HISTORY_BATCH, HISTORY_DB, HISTORY_FLUSH, HISTORY_RELOAD,
+                     HISTORY_SEARCH_LIMIT)
+
+# ===== Yerel mesaj geçmişi =====
+class HistoryStore:
+    """Gelen mesajların yerel arşivi: SQLite (WAL) + FTS5 arama dizini.
+
+    add() yalnızca kuyruğa koyar; yazıcı thread kuyruğu toplu INSERT ile
+    boşaltır, böylece disk G/Ç alım ve çizim yolunu hiç bekletmez.
+    sqlite3 FTS5'siz derlenmişse arama LIKE ile yapılır.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.q = queue.SimpleQueue()
+        self.rlock = threading.Lock()
+        self.reader = None          # arama/yükleme bağlantısı (ilk kullanımda)
+        self.fts = True
+        conn = self._open()
+        conn.execute("CREATE TABLE IF NOT EXISTS messages("
+                     "id INTEGER PRIMARY KEY, ts REAL, kind TEXT, text TEXT)")
+        try:
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING "
+                         "fts5(text, content='messages', content_rowid='id')")
+            conn.execute("CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages "
+                         "BEGIN INSERT INTO messages_fts(rowid, text) VALUES (new.id, new.text); END")
+        except sqlite3.OperationalError:
+            self.fts = False
+        conn.commit()
+        # açılıştaki son kayıt: tail() bu oturumun satırlarını karıştırmasın
+        self.last_id = conn.execute("SELECT IFNULL(MAX(id), 0) FROM messages").fetchone()[0]
+        conn.close()
+        self.thread = threading.Thread(target=self._writer, daemon=True)
+        self.thread.start()
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def add(self, kind, text):
+        self.q.put((time.time(), kind, text))
+
+    def _writer(self):
+        conn = self._open()
+        while True:
+            item = self.q.get()
+            batch = []
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= HISTORY_BATCH: break
+                try: item = self.q.get(timeout=HISTORY_FLUSH)
+                except queue.Empty: break
+            if batch:
+                with conn: conn.executemany(
+                    "INSERT INTO messages(ts, kind, text) VALUES (?, ?, ?)", batch)
+            if item is None: break
+        conn.close()
+
+    def _query(self, sql, args):
+        with self.rlock:
+            if self.reader is None: self.reader = self._open()
+            return self.reader.execute(sql, args).fetchall()
+
+    def search(self, term, limit=HISTORY_SEARCH_LIMIT):
+        if self.fts:
+            phrase = '"' + term.replace('"', '""') + '"'
+            return self._query(
+                "SELECT m.ts, m.text FROM messages_fts f JOIN messages m ON m.id = f.rowid "
+                "WHERE messages_fts MATCH ? ORDER BY f.rowid DESC LIMIT ?", (phrase, limit))
+        return self._query("SELECT ts, text FROM messages WHERE text LIKE ? "
+                           "ORDER BY id DESC LIMIT ?", (f"%{term}%", limit))
+
+    def tail(self, n):
+        rows = self._query("SELECT kind, text FROM messages WHERE id <= ? "
+                           "ORDER BY id DESC LIMIT ?", (self.last_id, n))
+        rows.reverse()
+        return rows
+
+    def close(self):
+        self.q.put(None)
+        self.thread.join(timeout=2)
+
+def open_history(ui):
+    """HISTORY_DB ayarlıysa arşivi açar ve son satırları arka planda yükler."""
+    if not HISTORY_DB: return None
+    try: store = HistoryStore(os.path.expanduser(HISTORY_DB))
+    except sqlite3.Error as e:
+        ui.write(f"[Hata] Geçmiş veritabanı açılamadı: {e}")
+        return None
+    def preload():
+        try: rows = store.tail(HISTORY_RELOAD)
+        except sqlite3.Error: return
+        entries = []
+        for kind, text in rows:
+            if kind == "write": entries += [(line, True) for line in text.split("\n")]
+            else: entries += [(line, False) for line in text.splitlines()]
+        if entries:
+            ui.preload(entries + [("— önceki oturumlar —", False)])
+    threading.Thread(target=preload, daemon=True).start()
+    ui.archive = store
+    return store
+
+def search_text(store, term):
+    t0 = time.perf_counter()
+    rows = store.search(term)
+    dt = (time.perf_counter() - t0) * 1000
+    lines = [f"[Arama] \"{term}\": {len(rows)} sonuç ({dt:.1f} ms)"]
+    for ts, text in rows:
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(ts))
+        lines.append(f"  {when}  {text.replace(chr(10), ' ')}")
+    return "\n".join(lines)
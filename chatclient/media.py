@@ -0,0 +1,165 @@
+"""/send öncesi görsel iyileştirme: EXIF silme, küçültme, yeniden kodlama.
+
+Aşama isteğe bağlıdır, CHAT_OPTIMIZE=1 ile açılır (config.OPTIMIZE_IMAGES).
+Pillow kuruluysa EXIF yönü uygulanır, uzun kenar OPTIMIZE_MAX_DIM'e
+küçültülür ve görsel meta verisiz yeniden kodlanır: fotoğraflar (JPEG,
+WebP) OPTIMIZE_FORMAT'ta, kayıpsız kaynaklar (PNG, GIF, BMP; ekran
+görüntüleri) PNG olarak; animasyonlara dokunulmaz.
+Pillow yoksa yalnızca kayıpsız adımlar yapılır: JPEG'den EXIF/XMP/IPTC
+ve ek resimler (yön etiketi korunarak), PNG'den metin ve zaman
+parçaları atılır; hızlı düzeyde sıkıştırılmış PNG yeniden sıkıştırılır.
+
+İş tek bir "spawn" süreçte, düşük öncelikle koşar; sonuç geçici dizine
+yazılır ve özgün dosyanın yerine ancak küçükse gönderilir (kayıplı
+kodlamada en az OPTIMIZE_MIN_GAIN kadar).
+"""
+import os, struct, zlib
+
+from .config import (OPTIMIZE_FORMAT, OPTIMIZE_MAX_DIM, OPTIMIZE_MIN_BYTES, OPTIMIZE_MIN_GAIN,
+                     OPTIMIZE_QUALITY)
+from .preview import _worker_init
+
+def pillow():
+    import importlib.util     # PIL'i yüklemeden bakar
+    return importlib.util.find_spec("PIL") is not None
+
+def wanted(path, size):
+    """Bu dosya /send öncesi iyileştirilmeli mi (uzantı ve boyuta göre)."""
+    if size < OPTIMIZE_MIN_BYTES: return False
+    ext = os.path.splitext(path)[1].lower()
+    return ext in (".jpg", ".jpeg", ".png") or (ext in (".webp", ".gif", ".bmp") and pillow())
+
+# ===== Kayıpsız: meta veri silme (Pillow gerekmez) =====
+KEEP_APP = (0xE0, 0xEE)     # APP0 JFIF, APP14 Adobe (renk dönüşümü); APP2'de yalnızca ICC
+
+def exif_orientation(seg):
+    # APP1 Exif gövdesinden 0x0112 (Orientation); yoksa 1
+    if seg[:6] != b"Exif\0\0": return 1
+    tiff = seg[6:]
+    end = "<" if tiff[:2] == b"II" else ">"
+    try:
+        ifd, = struct.unpack_from(end + "I", tiff, 4)
+        count, = struct.unpack_from(end + "H", tiff, ifd)
+        for i in range(count):
+            tag, _, _, value = struct.unpack_from(end + "HHIH", tiff, ifd + 2 + i * 12)
+            if tag == 0x0112: return value if 1 <= value <= 8 else 1
+    except struct.error: pass
+    return 1
+
+def orientation_segment(value):
+    # yalnızca yön etiketini taşıyan en küçük Exif (görüntüleyiciler döndürmeye devam etsin)
+    body = b"Exif\0\0MM\0*\0\0\0\x08" + struct.pack(">HHHIHHI", 1, 0x0112, 3, 1, value, 0, 0)
+    return b"\xff\xe1" + struct.pack(">H", len(body) + 2) + body
+
+def jpeg_strip(data):
+    """JPEG'in meta veri bölümlerini ve EOI sonrasını (MPF ek resimleri) atar."""
+    if data[:2] != b"\xff\xd8": raise ValueError("bozuk JPEG")
+    out, pos, orient, n = [b"\xff\xd8"], 2, 1, len(data)
+    while pos + 4 <= n:
+        if data[pos] != 0xFF: raise ValueError("bozuk JPEG")
+        marker = data[pos + 1]
+        if marker == 0xFF: pos += 1; continue        # dolgu
+        if marker == 0xD9: break
+        length, = struct.unpack_from(">H", data, pos + 2)
+        end = pos + 2 + length
+        seg = data[pos + 4:end]
+        if marker == 0xE1 and orient == 1: orient = exif_orientation(seg)
+        if not (0xE0 <= marker <= 0xEF or marker == 0xFE) or marker in KEEP_APP \
+                or (marker == 0xE2 and seg.startswith(b"ICC_PROFILE\0")):
+            out.append(data[pos:end])
+        pos = end
+        if marker == 0xDA:
+            # sıkıştırılmış veri: FF00 ve RSTn dışındaki ilk FFxx bir sonraki bölüm
+            scan = pos
+            while True:
+                pos = data.find(b"\xff", pos)
+                if pos < 0 or pos + 1 >= n: raise ValueError("bozuk JPEG (EOI yok)")
+                if data[pos + 1] == 0 or 0xD0 <= data[pos + 1] <= 0xD7: pos += 2; continue
+                break
+            out.append(data[scan:pos])
+    out.append(b"\xff\xd9")
+    if orient != 1: out.insert(2 if out[1][:2] == b"\xff\xe0" else 1, orientation_segment(orient))
+    return b"".join(out)
+
+PNG_DROP = {b"tEXt", b"zTXt", b"iTXt", b"eXIf", b"tIME"}
+
+def png_chunk(kind, body):
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+def png_strip(data):
+    """Metin/EXIF/zaman parçalarını atar; IDAT hızlı düzeyde sıkıştırılmışsa 9'la yeniden."""
+    if data[:8] != b"\x89PNG\r\n\x1a\n": raise ValueError("bozuk PNG")
+    out, idat, pos = [data[:8]], [], 8
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack_from(">I4s", data, pos)
+        end = pos + 12 + length
+        if kind == b"IDAT": idat.append(data[pos + 8:end - 4])
+        else:
+            if idat:
+                stream = b"".join(idat)
+                if stream[1] >> 6 < 2:     # FLEVEL: 0-1 hızlı sıkıştırma
+                    z = zlib.compressobj(9, memLevel=9)
+                    stream = z.compress(zlib.decompress(stream)) + z.flush()
+                out.append(png_chunk(b"IDAT", stream)); idat = []
+            if kind not in PNG_DROP: out.append(data[pos:end])
+        if kind == b"IEND": break
+        pos = end
+    return b"".join(out)
+
+# ===== Pillow: küçültme ve yeniden kodlama =====
+def reencode(src, dst, max_dim, fmt, quality):
+    """(dosya yolu, uzantı, w, h, kayıplı mı); animasyonlu görselde None."""
+    import warnings
+    from PIL import Image, ImageOps
+    warnings.simplefilter("ignore")     # Pillow uyarıları curses ekranına basılmasın
+    with Image.open(src) as im:
+        if getattr(im, "n_frames", 1) > 1: return None
+        lossless = im.format in ("PNG", "GIF", "BMP")
+        im.draft("RGB", (max_dim, max_dim))     # JPEG: DCT aşamasında 1/2…1/8
+        icc = im.info.get("icc_profile")
+        im = ImageOps.exif_transpose(im)
+        im.thumbnail((max_dim, max_dim), Image.Resampling.LANCZOS)
+        if lossless or im.mode in ("RGBA", "LA", "PA") or "transparency" in im.info:
+            ext = ".png"
+            im.save(dst + ext, "PNG", optimize=True)
+        elif fmt == "webp":
+            ext = ".webp"
+            im.convert("RGB").save(dst + ext, "WEBP", quality=quality, method=4, icc_profile=icc)
+        else:
+            ext = ".jpg"
+            im.convert("RGB").save(dst + ext, "JPEG", quality=quality, optimize=True,
+                                   progressive=True, icc_profile=icc)
+        return dst + ext, ext, im.width, im.height, ext != ".png"
+
+def optimize(src, dst, max_dim, fmt, quality, min_gain):
+    """İşçi süreçte koşar: (yol, uzantı, açıklama) ya da kazanç yoksa None."""
+    if pillow():
+        res = reencode(src, dst, max_dim, fmt, quality)
+        if not res: return None
+        path, ext, w, h, lossy = res
+        note = f"{w}×{h} {ext[1:].upper()}"
+    else:
+        lossy = False
+        with open(src, "rb") as f: data = f.read()
+        ext = os.path.splitext(src)[1].lower()
+        data = png_strip(data) if data[:4] == b"\x89PNG" else jpeg_strip(data)
+        path, note = dst + ext, "meta veri silindi"
+        with open(path, "wb") as f: f.write(data)
+    if os.path.getsize(path) > os.path.getsize(src) * (1 - (min_gain if lossy else 0)):
+        os.remove(path); return None
+    return path, ext, note
+
+class Optimizer:
+    """Yükleme kuyruğunun önündeki iyileştirme aşaması: tek işçi süreç, geçici dizin."""
+    def __init__(self):
+        import concurrent.futures, multiprocessing, tempfile
+        self.tmp = tempfile.TemporaryDirectory(prefix="chat-send-")     # çıkışta silinir
+        self.workers = concurrent.futures.ProcessPoolExecutor(
+            1, multiprocessing.get_context("spawn"), _worker_init)
+
+    def submit(self, up, done):
+        """up.path'i işçiye verir; bitince done(up, future) (işçi thread'inden)."""
+        dst = os.path.join(self.tmp.name, str(up.id))
+        fut = self.workers.submit(optimize, up.path, dst, OPTIMIZE_MAX_DIM, OPTIMIZE_FORMAT,
+                                  OPTIMIZE_QUALITY, OPTIMIZE_MIN_GAIN)
+        fut.add_done_callback(lambda f: done(up, f))
@@ -0,0 +1,137 @@
+"""Ölçümler (/stats): süre histogramları, sayaçlar ve kilit çekişmesi."""
+import bisect, collections, os, threading, time
+
+from .config import METRICS_FILE, METRICS_INTERVAL
+
+# ===== Ölçümler (/stats) =====
+class Histogram:
+    """Süre dağılımı: ×2 büyüyen sabit kovalar (1 µs … ~17 sn), yaklaşık yüzdelik."""
+    __slots__ = ("n", "total", "max", "buckets")
+    EDGES = tuple(1e-6 * 2 ** i for i in range(25))
+
+    def __init__(self):
+        self.n, self.total, self.max = 0, 0.0, 0.0
+        self.buckets = [0] * (len(self.EDGES) + 1)
+
+    def add(self, v):
+        self.n += 1; self.total += v
+        if v > self.max: self.max = v
+        self.buckets[bisect.bisect_left(self.EDGES, v)] += 1
+
+    def quantile(self, q):
+        # kovanın üst sınırı; en üst kova için gözlenen en büyük değer
+        want, seen = q * self.n, 0
+        for i, c in enumerate(self.buckets):
+            seen += c
+            if c and seen >= want:
+                return min(self.EDGES[i], self.max) if i < len(self.EDGES) else self.max
+        return self.max
+
+    def snapshot(self):
+        return {"n": self.n, "sum": self.total, "max": self.max,
+                "p50": self.quantile(0.50), "p95": self.quantile(0.95), "p99": self.quantile(0.99)}
+
+def fmt_secs(s):
+    if s < 1e-3: return f"{s * 1e6:.0f} µs"
+    if s < 1: return f"{s * 1e3:.1f} ms"
+    return f"{s:.2f} sn"
+
+def fmt_bytes(n):
+    for unit in ("B", "KiB", "MiB"):
+        if n < 1024: return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.2f} GiB"
+
+class Metrics:
+    """Sayaçlar ve süre histogramları.
+
+    Kapalıyken (varsayılan) sıcak yollar yalnızca `if METRICS.on:`
+    kontrolünü öder; CHAT_METRICS=1 ile açılır. CHAT_METRICS_FILE
+    verilirse her METRICS_INTERVAL saniyede dosyaya bir JSON satırı eklenir.
+    """
+    def __init__(self, on):
+        self.on = on
+        self.lock = threading.Lock()        # kaydın kendi kilidi (ölçülmez)
+        self.counters = collections.Counter()
+        self.hists = {}
+        self.t0 = time.monotonic()
+
+    def count(self, name, n=1):
+        with self.lock: self.counters[name] += n
+
+    def observe(self, name, seconds):
+        with self.lock:
+            h = self.hists.get(name)
+            if h is None: h = self.hists[name] = Histogram()
+            h.add(seconds)
+
+    def snapshot(self):
+        with self.lock:
+            return {"ts": time.time(), "uptime": time.monotonic() - self.t0,
+                    "counters": dict(self.counters),
+                    "timers": {k: h.snapshot() for k, h in self.hists.items()}}
+
+    def report(self):
+        snap = self.snapshot()
+        c, timers = snap["counters"], snap["timers"]
+        lines = [f"[Ölçüm] {snap['uptime']:.0f} sn"]
+        for name in sorted(k for k in timers if not k.startswith("lock.")):
+            t = timers[name]
+            lines.append(f"  {name:<18} n={t['n']:<6} p50 {fmt_secs(t['p50'])} "
+                         f"p99 {fmt_secs(t['p99'])} max {fmt_secs(t['max'])} "
+                         f"Σ {fmt_secs(t['sum'])}")
+        if c.get("recv.bytes"):
+            lines.append(f"  alım: {c.get('recv.calls', 0)} recv, {fmt_bytes(c['recv.bytes'])}")
+        up = timers.get("upload.slice")
+        if up and up["sum"]:
+            lines.append(f"  yükleme: {fmt_bytes(c.get('upload.bytes', 0))}, "
+                         f"{c.get('upload.bytes', 0) / up['sum'] / 1e6:.1f} MB/sn (gönderim süresine göre)")
+        locks = sorted({k.split(".")[1] for k in c if k.startswith("lock.")})
+        if locks: lines.append("[Kilit çekişmesi]")
+        for name in locks:
+            acq = c.get(f"lock.{name}.acquire", 0)
+            waits = {k.rsplit(".", 1)[1]: v for k, v in c.items()
+                     if k.startswith(f"lock.{name}.contended.")}
+            w = timers.get(f"lock.{name}.wait")
+            line = f"  {name:<8} alınma {acq}, beklenen {sum(waits.values())}"
+            if w:
+                line += (f" (p99 {fmt_secs(w['p99'])}, max {fmt_secs(w['max'])}, "
+                         f"Σ {fmt_secs(w['sum'])})")
+            if waits:
+                line += "  bekleyen: " + ", ".join(f"{t}={n}" for t, n in sorted(waits.items()))
+            lines.append(line)
+        return "\n".join(lines)
+
+    def start_dump(self, path):
+        import json
+        def run():
+            while True:
+                time.sleep(METRICS_INTERVAL)
+                try:
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(self.snapshot()) + "\n")
+                except OSError: return
+        threading.Thread(target=run, name="metrics", daemon=True).start()
+
+METRICS = Metrics(bool(METRICS_FILE or os.environ.get("CHAT_METRICS")))
+
+class TimedLock:
+    """threading.Lock + çekişme ölçümü: beklemek zorunda kalan thread ve süresi."""
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        if not self._lock.acquire(False):
+            t0 = time.perf_counter()
+            self._lock.acquire()
+            METRICS.observe(f"lock.{self.name}.wait", time.perf_counter() - t0)
+            METRICS.count(f"lock.{self.name}.contended.{threading.current_thread().name}")
+        METRICS.count(f"lock.{self.name}.acquire")
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+def make_lock(name):
+    return TimedLock(name) if METRICS.on else threading.Lock()
@@ -0,0 +1,212 @@
+"""/send için dosya yolları: dizin önbelleği, arka plan dizini, tamamlama."""
+import bisect, os, re, threading, time
+
+from .config import (INDEX_DEPTH, INDEX_MAX_DIRS, INDEX_REFRESH, INDEX_RESULTS,
+                     MEDIA_EXTS, SEND_SEARCH_DIRS)
+
+# ===== Dosya dizini (/send tamamlama) =====
+def list_dir(d, _cache={}):
+    """Dizindeki (isim, dizin_mi) çiftleri, sıralı; dizin mtime'ı değişmedikçe önbellekten."""
+    try: mtime = os.stat(d).st_mtime_ns
+    except OSError: return []
+    hit = _cache.get(d)
+    if hit and hit[0] == mtime: return hit[1]
+    entries = []
+    try:
+        with os.scandir(d) as it:
+            for e in it:
+                try: entries.append((e.name, e.is_dir()))
+                except OSError: pass
+    except OSError: return []
+    entries.sort()
+    _cache[d] = (mtime, entries)
+    return entries
+
+class PathIndex:
+    """SEND_SEARCH_DIRS altındaki medya dosyalarının bellek içi dizini.
+
+    Arka plan thread'i ağacı os.scandir ile tarar (d_type sayesinde dosya
+    başına stat yok), sonra her INDEX_REFRESH saniyede yalnızca dizinlerin
+    mtime'ına bakar ve değişen dizini yeniden okur. Sorgular anlık bir
+    kopya üzerinde çalışır: ön ek eşleşmesi sıralı isimlerde bisect,
+    bulanık (alt dizi) eşleşme tek bir metin üzerinde derlenmiş regex.
+    """
+    def __init__(self, roots):
+        self.roots = list(roots)
+        self.dirs = {}          # dizin → (mtime_ns, [medya dosyaları], [alt dizinler])
+        self.snap = ([], [], "", [])    # (anahtarlar, yollar, bulanık metin, satır başları)
+        self.ready = False
+        self.truncated = False
+        self.build_s = 0.0
+        self.ev = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def poke(self):
+        self.ev.set()
+
+    def _run(self):
+        while True:
+            t0 = time.perf_counter()
+            changed = self._refresh()
+            if changed or not self.ready:
+                self._rebuild()
+                self.build_s = time.perf_counter() - t0
+                self.ready = True
+            self.ev.wait(INDEX_REFRESH); self.ev.clear()
+
+    def _scan(self, d):
+        try: mtime = os.stat(d).st_mtime_ns
+        except OSError: return False
+        files, subdirs = [], []
+        try:
+            with os.scandir(d) as it:
+                for e in it:
+                    if e.name.startswith("."): continue
+                    try:
+                        if e.is_dir(follow_symlinks=False): subdirs.append(e.path)
+                        elif os.path.splitext(e.name)[1].lower() in MEDIA_EXTS: files.append(e.name)
+                    except OSError: pass
+        except OSError: return False
+        self.dirs[d] = (mtime, files, subdirs)
+        return True
+
+    def _walk(self, d, depth):
+        if d in self.dirs or not self._scan(d): return
+        if depth >= INDEX_DEPTH: return
+        for sub in self.dirs[d][2]:
+            if len(self.dirs) >= INDEX_MAX_DIRS:
+                self.truncated = True; return
+            self._walk(sub, depth + 1)
+
+    def _drop(self, d):
+        entry = self.dirs.pop(d, None)
+        if entry:
+            for sub in entry[2]: self._drop(sub)
+
+    def _refresh(self):
+        """Yalnızca mtime'ı değişen dizinleri yeniden okur; değişiklik var mı döner."""
+        changed = False
+        for root in self.roots:
+            if root not in self.dirs:
+                self._walk(root, 0); changed = True
+        for d, (mtime, _, subdirs) in list(self.dirs.items()):
+            if d not in self.dirs: continue
+            try: now = os.stat(d).st_mtime_ns
+            except OSError:
+                self._drop(d); changed = True; continue
+            if now == mtime: continue
+            changed = True
+            old = set(subdirs)
+            self._scan(d)
+            new = set(self.dirs[d][2])
+            for gone in old - new: self._drop(gone)
+            for added in new - old:
+                self._walk(added, self._depth(added))
+        return changed
+
+    def _depth(self, d):
+        for root in self.roots:
+            if d.startswith(root.rstrip(os.sep) + os.sep):
+                return d[len(root):].count(os.sep)
+        return INDEX_DEPTH
+
+    def _rebuild(self):
+        # iç içe kökler (örn. MEDIA_DIR çalışma dizininin altında) tek sayılır;
+        # bulanık arama en yakın köke göreli yol üzerinde yapılır
+        tops = sorted((r.rstrip(os.sep) + os.sep for r in self.roots), key=len, reverse=True)
+        rows = []
+        for d, (_, files, _) in self.dirs.items():
+            cut = next((len(t) for t in tops if (d + os.sep).startswith(t)), 0)
+            for name in files:
+                path = os.path.join(d, name)
+                rows.append((name.lower(), path, path[cut:].lower()))
+        rows.sort()
+        keys = [r[0] for r in rows]
+        blob = "\n".join(r[2] for r in rows)
+        starts, pos = [], 0
+        for r in rows:
+            starts.append(pos); pos += len(r[2]) + 1
+        self.snap = (keys, [r[1] for r in rows], blob, starts)
+
+    def __len__(self):
+        return len(self.snap[0])
+
+    def query(self, token, limit=INDEX_RESULTS):
+        """Önce ad ön eki eşleşenler, sonra bulanık eşleşenler (kısa yol önde)."""
+        keys, paths, blob, starts = self.snap
+        t = token.lower()
+        if not t: return []
+        out, seen = [], set()
+        i = bisect.bisect_left(keys, t)
+        while i < len(keys) and keys[i].startswith(t) and len(out) < limit:
+            out.append(paths[i]); seen.add(i); i += 1
+        if len(out) < limit:
+            # "hol" → h[^\no]*o[^\nl]*l : geri izlemesiz alt dizi araması
+            pat = re.compile("".join(re.escape(a) + "[^\n" + re.escape(b) + "]*"
+                                     for a, b in zip(t, t[1:])) + re.escape(t[-1]))
+            fuzzy = []
+            for m in pat.finditer(blob):
+                j = bisect.bisect_right(starts, m.start()) - 1
+                if j in seen: continue
+                seen.add(j)
+                fuzzy.append((m.end() - m.start(), len(paths[j]), paths[j]))
+            fuzzy.sort()
+            out += [p for _, _, p in fuzzy[:limit - len(out)]]
+        return out
+
+    def exact(self, name):
+        """Adı tam olarak eşleşen tek dosya (yoksa veya birden fazlaysa None)."""
+        keys, paths = self.snap[0], self.snap[1]
+        t = name.lower()
+        i = bisect.bisect_left(keys, t)
+        hits = [paths[j] for j in range(i, min(i + 2, len(keys))) if keys[j] == t]
+        return hits[0] if len(hits) == 1 else None
+
+PATH_INDEX = PathIndex(SEND_SEARCH_DIRS)
+
+def short_path(p):
+    """Eklenecek metin: çalışma dizinine göreli, değilse ~ ile kısaltılmış."""
+    cwd = os.getcwd() + os.sep
+    if p.startswith(cwd): return p[len(cwd):]
+    home = os.path.expanduser("~") + os.sep
+    return "~/" + p[len(home):] if p.startswith(home) else p
+
+def path_candidates(base_token: str):
+    """(eklenecek metinler, gösterilecek adlar).
+
+    Yol içeren girdi o dizinin (önbellekli) listesinden tamamlanır; yalın
+    isim ise çalışma dizini + PATH_INDEX üzerinden ön ek/bulanık aranır.
+    """
+    token = base_token or ""
+    expanded = os.path.expanduser(token)
+    head, prefix = os.path.split(token)
+    d = os.path.dirname(expanded) or "."
+    cands, names = [], []
+    for name, is_dir in list_dir(d):
+        if not name.startswith(prefix): continue
+        if is_dir:
+            if name.startswith(".") and not prefix.startswith("."): continue
+            cands.append(os.path.join(head, name) + os.sep); names.append(name + "/")
+        elif os.path.splitext(name)[1].lower() in MEDIA_EXTS:
+            cands.append(os.path.join(head, name)); names.append(name)
+    if not head and token:
+        seen = {os.path.abspath(c) for c in cands}
+        for p in PATH_INDEX.query(token):
+            if p in seen: continue
+            cands.append(short_path(p)); names.append(short_path(p))
+    return cands, names
+
+# ===== Dosya gönder =====
+def resolve_send_path(arg: str) -> str | None:
+    if not arg: return None
+    cand = os.path.expanduser(arg)
+    if os.path.isabs(cand) or os.path.exists(cand):
+        return cand if os.path.isfile(cand) else None
+    for d in SEND_SEARCH_DIRS:
+        p = os.path.join(d, cand)
+        if os.path.isfile(p): return p
+    # alt dizinlerdeki tek eşleşme (örn. /send tatil.mp4 → MEDIA_DIR/2026/tatil.mp4)
+    if os.sep not in cand: return PATH_INDEX.exact(cand)
+    return None
@@ -0,0 +1,315 @@
+"""Görsel önizleme: arka planda indirme, süreç havuzunda çözme ve küçültme.
+
+Çizim kipleri: blocks (gri tonlu ░▒▓█, hücre başına bir piksel),
+halfblocks (titreşimli ▀▄█, hücre başına iki piksel) ve sixel (renkli,
+destekleyen uçbirimlerde). Ekran satırları düz metin olduğundan blok
+kipleri tek renklidir; sixel kipinde aynı satırlar resmin yer tutucusu
+olur, resim curses karesinin üstüne basılır.
+
+Çözme Pillow kuruluysa onunla (JPEG, WebP, GIF …), değilse yerleşik PNG
+ve BMP çözücüyle yapılır. İşçi süreçler "spawn" ile başlar: thread'li
+ana süreçten fork edilmezler ve yalnızca bu modülü yükler.
+"""
+import collections, os, socket, struct, threading, time, zlib
+
+from .config import (PREVIEW_CACHE, PREVIEW_COLS, PREVIEW_MAX_BYTES, PREVIEW_MODE, PREVIEW_ROWS,
+                     PREVIEW_WORKERS)
+from .metrics import METRICS
+
+SIXEL_TERMS = ("mlterm", "foot", "yaft", "contour")
+
+def pick_mode():
+    """auto → uçbirim sixel biliniyorsa sixel, değilse halfblocks."""
+    if PREVIEW_MODE != "auto": return PREVIEW_MODE
+    term, prog = os.environ.get("TERM", ""), os.environ.get("TERM_PROGRAM", "")
+    if "sixel" in term or term.startswith(SIXEL_TERMS) or prog in ("WezTerm", "mlterm"):
+        return "sixel"
+    return "halfblocks"
+
+def cell_pixels():
+    # uçbirim bildiriyorsa gerçek hücre boyu (TIOCGWINSZ), yoksa 10×20
+    try:
+        import fcntl, termios
+        rows, cols, xpix, ypix = struct.unpack("HHHH", fcntl.ioctl(1, termios.TIOCGWINSZ, b"\0" * 8))
+        if xpix and ypix: return xpix // cols, ypix // rows
+    except (ImportError, OSError): pass
+    return 10, 20
+
+# ===== Yerleşik çözücüler (Pillow yoksa) =====
+# Her biri (w, h, row, bpp, kanallar, palet) döndürür: row(y) y. satırın baytları,
+# kanallar pikseldeki R, G, B konumları; paletli görselde piksel palet sırasıdır.
+def _unfilter(kind, line, prev, bpp):
+    n = len(line)
+    if kind == 1:       # Sub: kanal başına önek toplamı
+        from itertools import accumulate
+        for c in range(bpp): line[c::bpp] = bytes(map((255).__and__, accumulate(line[c::bpp])))
+    elif kind == 2:     # Up: bayt bayt toplama, tek büyük tamsayıyla (taşma baytlar arası geçmez)
+        a, b = int.from_bytes(line, "big"), int.from_bytes(prev, "big")
+        lo, hi = int.from_bytes(b"\x7f" * n, "big"), int.from_bytes(b"\x80" * n, "big")
+        line[:] = (((a & lo) + (b & lo)) ^ ((a ^ b) & hi)).to_bytes(n, "big")
+    elif kind == 3:     # Average
+        for i in range(n):
+            left = line[i - bpp] if i >= bpp else 0
+            line[i] = (line[i] + ((left + prev[i]) >> 1)) & 255
+    elif kind == 4:     # Paeth
+        for i in range(n):
+            a = line[i - bpp] if i >= bpp else 0
+            b = prev[i]; c = prev[i - bpp] if i >= bpp else 0
+            p = a + b - c; pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+            line[i] = (line[i] + (a if pa <= pb and pa <= pc else b if pb <= pc else c)) & 255
+    elif kind: raise ValueError(f"bozuk PNG filtresi {kind}")
+
+def decode_png(data):
+    pos, idat, plte, head = 8, [], b"", None
+    while pos + 8 <= len(data):
+        n, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + n]; pos += 12 + n
+        if kind == b"IHDR": head = struct.unpack(">IIBBBBB", body)
+        elif kind == b"PLTE": plte = body
+        elif kind == b"IDAT": idat.append(body)
+        elif kind == b"IEND": break
+    if not head: raise ValueError("bozuk PNG")
+    w, h, depth, ctype, _, _, interlace = head
+    if depth != 8 or interlace or ctype not in (0, 2, 3, 4, 6):
+        raise ValueError("bu PNG türü için Pillow gerekli (yalnızca 8 bit, taramasız)")
+    bpp = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}[ctype]
+    raw, stride = zlib.decompress(b"".join(idat)), w * bpp
+    rows, prev = [], bytearray(stride)
+    for y in range(h):
+        at = y * (stride + 1)
+        line = bytearray(raw[at + 1:at + 1 + stride])
+        _unfilter(raw[at], line, prev, bpp)
+        rows.append(line); prev = line
+    if ctype == 3: return w, h, rows.__getitem__, 1, (0,), plte
+    return w, h, rows.__getitem__, bpp, (0, 0, 0) if ctype in (0, 4) else (0, 1, 2), None
+
+def decode_bmp(data):
+    off, = struct.unpack_from("<I", data, 10)
+    w, h, _, bits, comp = struct.unpack_from("<iiHHI", data, 18)
+    if bits not in (24, 32) or comp not in (0, 3):
+        raise ValueError("bu BMP türü için Pillow gerekli (yalnızca 24/32 bit)")
+    bpp, top_down, h = bits // 8, h < 0, abs(h)
+    stride = (w * bpp + 3) & ~3
+    def row(y):
+        at = off + (y if top_down else h - 1 - y) * stride
+        return data[at:at + w * bpp]
+    return w, h, row, bpp, (2, 1, 0), None
+
+def fit(w, h, cols, rows):
+    """Hücre en-boy oranı 1:2 varsayılarak (sütun, satır)."""
+    r = max(1, round(cols * h / w / 2))
+    if r > rows: r, cols = rows, max(1, round(rows * 2 * w / h))
+    return cols, r
+
+def load(data, need):
+    """(w, h, scale); scale(tw, th) → tw×th RGB baytları.
+
+    Pillow varsa kutu filtresiyle küçültülür; JPEG en az need piksele
+    kadar DCT aşamasında küçültülerek çözülür, EXIF yönü uygulanır.
+    Yerleşik çözücüde her hedef piksel kaynaktan 2×2 örneğin ortalaması
+    olur; yalnızca örneklenen satırlar okunur.
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        Image = None
+    if Image:
+        import io
+        im = Image.open(io.BytesIO(data))
+        w, h = im.size
+        im.draft("RGB", (need, need))
+        im = ImageOps.exif_transpose(im).convert("RGB")
+        if (im.width > im.height) != (w > h): w, h = h, w
+        return w, h, lambda tw, th: im.resize((tw, th), Image.BOX).tobytes()
+    if data[:8] == b"\x89PNG\r\n\x1a\n": w, h, row, bpp, chans, plte = decode_png(data)
+    elif data[:2] == b"BM": w, h, row, bpp, chans, plte = decode_bmp(data)
+    else: raise ValueError("bu biçim için Pillow gerekli (pip install pillow)")
+    colors = [plte[i:i + 3].ljust(3, b"\0") for i in range(0, 768, 3)] if plte else None
+    def scale(tw, th):
+        # satır başına itemgetter ile örnekleme (C'de); 2×2 örnek yalnızca küçültürken
+        from operator import itemgetter
+        fx = (0.25, 0.75) if w >= tw * 2 else (0.5,)
+        fy = (0.25, 0.75) if h >= th * 2 else (0.5,)
+        picks = []
+        for f in fx:
+            idx = [min(w - 1, int((tx + f) * w / tw)) * bpp + c for tx in range(tw) for c in chans]
+            picks.append(itemgetter(*idx) if len(idx) > 1 else lambda r, i=idx[0]: (r[i],))
+        n, out = len(fx) * len(fy), bytearray()
+        for ty in range(th):
+            samples = []
+            for f in fy:
+                line = row(min(h - 1, int((ty + f) * h / th)))
+                for pick in picks:
+                    v = pick(line)
+                    samples.append(b"".join(map(colors.__getitem__, v)) if colors else v)
+            out += bytes(samples[0]) if n == 1 else bytes(sum(v) // n for v in zip(*samples))
+        return bytes(out)
+    return w, h, scale
+
+# ===== Çizim =====
+SHADES = " ░▒▓█"
+HALF = {(0, 0): " ", (1, 0): "▀", (0, 1): "▄", (1, 1): "█"}
+BAYER = ((0, 8, 2, 10), (12, 4, 14, 6), (3, 11, 1, 9), (15, 7, 13, 5))
+
+def luma(rgb):
+    return [(299 * rgb[i] + 587 * rgb[i + 1] + 114 * rgb[i + 2]) // 1000 for i in range(0, len(rgb), 3)]
+
+def draw_blocks(rgb, tw, th):
+    lum = luma(rgb)
+    return ["".join(SHADES[v * len(SHADES) // 256] for v in lum[y * tw:(y + 1) * tw]) for y in range(th)]
+
+def draw_halfblocks(rgb, tw, th):
+    # th piksel satırı = th/2 ekran satırı; 4×4 Bayer eşiğiyle titreşim
+    lum = luma(rgb)
+    on = [[lum[y * tw + x] > BAYER[y % 4][x % 4] * 16 + 8 for x in range(tw)] for y in range(th)]
+    return ["".join(HALF[on[y][x], on[y + 1][x]] for x in range(tw)) for y in range(0, th - 1, 2)]
+
+def draw_sixel(rgb, tw, th):
+    """DCS q … ST; 6×6×6 renk küpü, sıra başına renk maskeleri ve !N tekrar kısaltması."""
+    import re
+    q = [(rgb[i] * 5 + 127) // 255 * 36 + (rgb[i + 1] * 5 + 127) // 255 * 6 + (rgb[i + 2] * 5 + 127) // 255
+         for i in range(0, len(rgb), 3)]
+    used = sorted(set(q))
+    out = [f'\x1bP0;1;0q"1;1;{tw};{th}']
+    for c in used:
+        out.append(f"#{c};2;{c // 36 * 20};{c // 6 % 6 * 20};{c % 6 * 20}")
+    sixchars = bytes(range(63, 127)) + bytes(192)
+    run = re.compile(rb"(.)\1{3,}")
+    bands = []
+    for top in range(0, th, 6):
+        masks = {}
+        for dy in range(min(6, th - top)):
+            row, bit = q[(top + dy) * tw:(top + dy + 1) * tw], 1 << dy
+            for x, c in enumerate(row):
+                m = masks.get(c)
+                if m is None: m = masks[c] = bytearray(tw)
+                m[x] |= bit
+        band = []
+        for c, m in masks.items():
+            s = bytes(m).translate(sixchars).rstrip(b"?")
+            s = run.sub(lambda r: b"!%d%c" % (len(r[0]), r[1][0]), s)
+            band.append(f"#{c}" + s.decode("ascii"))
+        bands.append("$".join(band))
+    out.append("-".join(bands) + "\x1b\\")
+    return "".join(out)
+
+def render(data, mode, cols, rows, cell):
+    """İşçi süreçte koşar: (w, h, satırlar, sixel | None)."""
+    need = max(cols * cell[0], rows * cell[1]) if cell else cols * 2
+    w, h, scale = load(data, need)
+    tw, tr = fit(w, h, cols, rows)
+    if mode == "blocks": return w, h, draw_blocks(scale(tw, tr), tw, tr), None
+    lines = draw_halfblocks(scale(tw, tr * 2), tw, tr * 2)
+    if mode != "sixel": return w, h, lines, None
+    # aynı satırlar sixel'in yer tutucusu; resim o hücreleri tam kaplar
+    sw, sh = tw * cell[0], tr * cell[1]
+    return w, h, lines, draw_sixel(scale(sw, sh), sw, sh)
+
+def _worker_init():
+    # düşük öncelik: tek çekirdekte de ekran ve alım thread'leri önde kalsın
+    if hasattr(os, "nice"): os.nice(10)
+
+# ===== Önizleme kuyruğu =====
+class Preview:
+    """Çizilmiş önizleme; önbellekte URL ile tutulur."""
+    def __init__(self, url, name, w, h, lines, sixel):
+        self.url, self.name, self.w, self.h = url, name, w, h
+        self.lines, self.sixel = lines, sixel
+        self.size = sum(len(l) for l in lines) * 3 + len(sixel or "")
+
+class Previews:
+    """/preview ve AUTO_PREVIEW: indirme thread'i, çözme süreç havuzu, LRU önbellek.
+
+    Dosya Downloads'ın HttpPool'undan belleğe iner (en fazla
+    PREVIEW_MAX_BYTES), çözme ve küçültme PREVIEW_WORKERS süreçte yapılır;
+    ekran ve alım thread'i GIL için beklemez. Hazır önizleme
+    ui.show_preview(pv) ile verilir ve (URL, kip, genişlik) anahtarıyla
+    PREVIEW_CACHE baytlık LRU'da kalır: aynı link yeniden istenince
+    indirme ve çözme yapılmaz.
+    """
+    def __init__(self, ui, pool, width=lambda: PREVIEW_COLS):
+        self.ui, self.pool, self.width = ui, pool, width
+        self.mode = pick_mode()
+        self.cell = cell_pixels() if self.mode == "sixel" else None
+        self.lock = threading.Lock()
+        self.cache = collections.OrderedDict()
+        self.cached = 0             # önbellekteki toplam bayt
+        self.pending = {}           # anahtar → aynı anda gelen istek sayısı
+        self.fetcher = self.workers = None
+        self.conn = None            # sürmekte olan çekimin bağlantısı (close() keser)
+        self.hits = self.misses = 0
+
+    def request(self, url, name=None):
+        cols = max(8, min(PREVIEW_COLS, self.width()))
+        key = (url, self.mode, cols)
+        with self.lock:
+            pv = self.cache.get(key)
+            if pv:
+                self.cache.move_to_end(key); self.hits += 1
+            elif key in self.pending:
+                return
+            else:
+                self.misses += 1
+                self.pending[key] = name
+                if not self.fetcher:
+                    import concurrent.futures, multiprocessing
+                    self.fetcher = concurrent.futures.ThreadPoolExecutor(1, "preview")
+                    self.workers = concurrent.futures.ProcessPoolExecutor(
+                        min(PREVIEW_WORKERS, os.cpu_count() or 1), multiprocessing.get_context("spawn"),
+                        _worker_init)
+        if pv: self.ui.show_preview(pv)
+        else: self.fetcher.submit(self._fetch, key, name)
+
+    def _fetch(self, key, name):
+        url = key[0]
+        t0 = time.perf_counter()
+        try:
+            conn, resp = self.pool.request("GET", url)
+            self.conn = conn
+            try:
+                if resp.status != 200: raise RuntimeError(f"HTTP {resp.status} {resp.reason}")
+                length = resp.getheader("Content-Length", "")
+                if length.isdigit() and int(length) > PREVIEW_MAX_BYTES:
+                    raise ValueError(f"çok büyük ({int(length) >> 20} MiB)")
+                data = resp.read(PREVIEW_MAX_BYTES + 1)
+                if len(data) > PREVIEW_MAX_BYTES: raise ValueError("çok büyük")
+            except BaseException:
+                conn.close(); raise
+            finally: self.conn = None
+            self.pool.release(conn, resp)
+            if METRICS.on: METRICS.observe("preview.fetch", time.perf_counter() - t0)
+            fut = self.workers.submit(render, data, self.mode, key[2], PREVIEW_ROWS, self.cell)
+        except Exception as e:
+            self._done(key, name, error=e); return
+        t1 = time.perf_counter()
+        fut.add_done_callback(lambda f: self._done(key, name, f, t1))
+
+    def _done(self, key, name, fut=None, t1=0, error=None):
+        name = name or key[0].rsplit("/", 1)[-1]
+        if fut:
+            try: w, h, lines, sixel = fut.result()
+            except Exception as e: error = e
+        if METRICS.on and fut: METRICS.observe("preview.render", time.perf_counter() - t1)
+        with self.lock:
+            self.pending.pop(key, None)
+            if error is None:
+                pv = Preview(key[0], name, w, h, lines, sixel)
+                self.cache[key] = pv; self.cached += pv.size
+                while self.cached > PREVIEW_CACHE and len(self.cache) > 1:
+                    self.cached -= self.cache.popitem(last=False)[1].size
+        if error is not None: self.ui.write(f"[Önizleme] {name}: {error}")
+        else: self.ui.show_preview(pv)
+
+    def stats(self):
+        with self.lock:
+            return (f"[Önizleme] kip: {self.mode}  önbellek: {len(self.cache)} görsel, "
+                    f"{self.cached // 1024} KiB  isabet: {self.hits}/{self.hits + self.misses}")
+
+    def close(self):
+        # çıkışta havuz thread'leri yine de beklenir: yavaş bir çekim bağlantısı kesilerek bitirilir
+        if self.fetcher: self.fetcher.shutdown(wait=False, cancel_futures=True)
+        conn = self.conn
+        if conn and conn.sock:
+            try: conn.sock.shutdown(socket.SHUT_RDWR)
+            except OSError: pass
+        if self.workers: self.workers.shutdown(cancel_futures=True)
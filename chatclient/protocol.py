@@ -0,0 +1,558 @@
+"""Sunucu protokolü: satır ve v2 çerçeveleme, mesaj ayrıştırma, handshake."""
+import itertools, os, struct, threading, time, zlib
+
+from . import config
+from .config import PRESENCE_NOTICE_MAX, SEND_BUF_SIZE
+from .metrics import METRICS, fmt_bytes
+
+# Sunucu handshake'te "CAPS:a,b" gönderirse ortak yetenekler kullanılır.
+# Göndermeyen (eski) sunucu için her şey v1 kalır. Anlaşılan küme
+# bağlantıya aittir: run_handshake döndürür, Session.caps'te durur.
+CLIENT_CAPS = ("upload2", "ping", "presence")   # presence: JOIN:/PART: farkları
+
+def client_caps():
+    # zlib isteğe bağlı: CHAT_COMPRESS=1, ya da auto iken ssh tünelinde
+    on = config.COMPRESS == "1" or (config.COMPRESS == "auto" and
+                                    (config.TRANSPORT == "tunnel" or bool(config.SSH_TARGET)))
+    caps = CLIENT_CAPS + ("zlib",) if on else CLIENT_CAPS
+    return caps + ("frame2",) if config.FRAMING == "v2" else caps
+
+# ===== zlib akışı =====
+# İki taraf da CAPS'te "zlib" derse WELCOME satırından sonraki baytlar iki
+# yönde de ham deflate akışıdır (wbits=-15, ön sözlük ZDICT). Her yazım
+# Z_SYNC_FLUSH ile biter, satır beklemeden karşıya geçer. Dosya gövdeleri
+# sıkıştırılmaz: "stored" bloklar olarak geçer ve sıkıştırıcı gövdenin son
+# 32 KiB'ıyla yeniden kurulur (açıcının penceresi de odur). Sözlük
+# protokolün parçasıdır; değişirse yetenek adı da değişmeli.
+ZDICT = (
+    b"DENIED:USERNAME?\nADMINKEY?\nACCEPT? (OK/EXIT)\nCAPS:upload2,ping,presence,zlib\n"
+    b"CTRL:KICKED\nCTRL:CLEAR\nFILE2:ERR id=\nFILE2:ABORT id=\nFILE2:END id=\n"
+    b"FILE name= size= type=image/jpeg\n\nFILE2 id= name= size= type=image/png hash=blake2b:\n"
+    b"CHUNK id= off= len=\nFILE2:OFFSET id= offset=\n/tkm se\xc3\xa7 tas|kagit|makas\n"
+    b"TKM:CHALLENGE from=\nTKM:CONFIRM\nTKM:DECLINE by=\nTKM:CANCEL by=\nTKM:WAITING\n"
+    b"TKM:ERR \nTKM:SKOR \nTKM:RESULT match winner=\nTKM:PROMPT round=\n"
+    b"TKM:ROUND round= tas kagit makas winner=\nTKM:INFO \n"
+    b"FILEURL from= name=.mp4.png.jpg url=http://127.0.0.1:8000/\n"
+    b"JOIN:\nPART:\nPING \nPONG \nNOTICE:\nUSERLIST:"
+)
+ZLIB_LEVEL = 6
+ZLIB_WINDOW = 1 << 15
+
+def stored_blocks(data):
+    # sıkıştırılmamış deflate blokları (BFINAL=0, BTYPE=00); akış bayt sınırında olmalı
+    view, out = memoryview(data), []
+    for i in range(0, len(data), 65535):
+        part = view[i:i + 65535]
+        out += (struct.pack("<BHH", 0, len(part), len(part) ^ 0xFFFF), part)
+    return b"".join(out)
+
+class WireSocket:
+    """Bloklayan soket; gönderim yönü çerçeveleyicinin pack()'inden geçer
+    (zlib ve/veya v2 çerçeveleri; thread motoru).
+
+    send/sendall/sendmsg/sendfile dışındaki her şey (recv, shutdown …) alttaki
+    sokete gider; alım yönünü çerçeveleyici açar.
+    """
+    def __init__(self, sock, framer):
+        self.sock, self.framer = sock, framer
+
+    def __getattr__(self, name):
+        return getattr(self.sock, name)
+
+    def sendall(self, data):
+        self.sock.sendall(self.framer.pack(data))
+
+    def send(self, data):
+        self.sendall(data); return len(data)
+
+    def sendmsg(self, buffers):
+        data = b"".join(buffers)
+        self.sendall(data); return len(data)
+
+    def sendfile(self, f, offset, count):
+        if not self.framer.deflater:
+            # yalnızca v2: BODY başlığı, gövde yine çekirdekten (socket.sendfile)
+            sent = 0
+            while sent < count:
+                n = min(FRAME_MAX, count - sent)
+                self.sock.sendall(body_head(n))
+                if self.sock.sendfile(f, offset + sent, n) != n:
+                    raise ConnectionError("dosya beklenenden kısa")   # başlık n bayt söz verdi
+                sent += n
+            return sent
+        sent = 0
+        while sent < count:
+            data = os.pread(f.fileno(), min(SEND_BUF_SIZE, count - sent), offset + sent)
+            if not data: break
+            self.sock.sendall(self.framer.pack_stored(data)); sent += len(data)
+        return sent
+
+# ===== Satır çerçeveleyici =====
+class LineFramer:
+    """Akıştan gelen baytları satırlara (frame2 anlaşıldıysa v2 çerçevelerine) böler.
+
+    Tampon her satırda yeniden kopyalanmaz; okunan kısım bir imleçle
+    (pos) atlanır ve yalnızca bir sonraki feed() başında toplu silinir.
+    """
+    def __init__(self, max_line=1 << 20):
+        self.buf = bytearray()
+        self.pos = 0          # okunmamış verinin başı
+        self.scan = 0         # '\n' aramasının kaldığı yer
+        self.max_line = max_line
+        self.inflater = self.deflater = None   # zlib yeteneği: compress()
+        self.frames = False   # frame2 yeteneği: binary()
+        self.end = 0          # v2: tamponun dolu kısmının sonu (ötesi boş yer)
+        self.want = 4         # v2: yarım çerçeveyi tamamlamak için gereken bayt
+        self.lock = threading.Lock()
+        self.wire_in = self.plain_in = self.wire_out = self.plain_out = 0
+
+    def feed(self, data):
+        if self.inflater:
+            t0 = time.perf_counter()
+            self.wire_in += len(data)
+            data = self.inflater.decompress(data)
+            self.plain_in += len(data)
+            if METRICS.on: METRICS.observe("zlib.inflate", time.perf_counter() - t0)
+        if self.frames: return self._put(data)
+        if self.pos:
+            del self.buf[:self.pos]
+            self.scan -= self.pos; self.pos = 0
+        self.buf += data
+
+    def recv(self, sock):
+        """sock'tan okuyup besler; okunan bayt (0: karşı taraf kapattı).
+
+        v2'de (zlib kapalıyken) recv_into ile doğrudan tampona okunur.
+        Yarım çerçevenin boyu bilindiğinden tampon gerekirse tam o kadar
+        büyütülür: büyük çerçeve de tek bir tamamlayıcı okumayla biter.
+        """
+        if not self.frames or self.inflater:
+            data = sock.recv(FRAME_BUF)
+            if data: self.feed(data)
+            return len(data)
+        self._room(max(self.want, FRAME_BUF // 4))
+        with memoryview(self.buf) as view:
+            n = sock.recv_into(view[self.end:])
+        self.end += n
+        return n
+
+    def _room(self, n):
+        # v2: tamponun sonunda en az n bayt boş yer; okunmuş baş kısım öne kaydırılır
+        if self.pos == self.end: self.pos = self.end = 0
+        elif len(self.buf) - self.end < n and self.pos:
+            rest = self.end - self.pos
+            self.buf[:rest] = self.buf[self.pos:self.end]
+            self.pos, self.end = 0, rest
+        if len(self.buf) - self.end < n: self.buf.extend(bytes(n - len(self.buf) + self.end))
+
+    def _put(self, data):
+        self._room(len(data))
+        self.buf[self.end:self.end + len(data)] = data
+        self.end += len(data)
+
+    def compress(self):
+        """zlib'e geçer: okunmamış baytlar ve sonrası açılır, pack() sıkıştırır."""
+        self.deflater = self.new_deflater(ZDICT)
+        self.inflater = zlib.decompressobj(-15, ZDICT)
+        rest = bytes(memoryview(self.buf)[self.pos:])
+        del self.buf[:]; self.pos = self.scan = 0
+        self.feed(rest)
+
+    def binary(self):
+        """v2 çerçevelerine geçer (zlib'den sonra): okunmamış baytlar korunur."""
+        rest = bytes(memoryview(self.buf)[self.pos:])
+        self.buf = bytearray(FRAME_BUF)
+        self.pos = self.end = self.scan = 0
+        self.frames = True
+        self._put(rest)
+
+    @staticmethod
+    def new_deflater(zdict):
+        return zlib.compressobj(ZLIB_LEVEL, zlib.DEFLATED, -15, zlib.DEF_MEM_LEVEL, zlib.Z_DEFAULT_STRATEGY, zdict)
+
+    def pack(self, data):
+        """Gönderilecek satırlar: v2'de çerçeveli; zlib açıksa sıkıştırılmış, SYNC_FLUSH'lı."""
+        if self.frames: data = frame_lines(data)
+        if not self.deflater: return data
+        t0 = time.perf_counter()
+        with self.lock:
+            out = self.deflater.compress(data) + self.deflater.flush(zlib.Z_SYNC_FLUSH)
+            self.plain_out += len(data); self.wire_out += len(out)
+        if METRICS.on: METRICS.observe("zlib.deflate", time.perf_counter() - t0)
+        return out
+
+    def pack_stored(self, data):
+        """Dosya gövdesi: v2'de BODY çerçeveleri; zlib açıksa sıkıştırmadan
+        stored bloklar ve sözlük gövdenin sonu olur."""
+        if self.frames and data: data = body_frames(data)
+        if not self.deflater or not data: return data
+        with self.lock:
+            out = stored_blocks(data)
+            self.deflater = self.new_deflater(bytes(data[-ZLIB_WINDOW:]))
+            self.plain_out += len(data); self.wire_out += len(out)
+        return out
+
+    def ratio_text(self):
+        if not self.deflater: return "zlib: kapalı (sunucu sunmadı ya da CHAT_COMPRESS=0)"
+        def side(w, p):
+            d = 100 - w * 100 // p if p else 0
+            return f"{fmt_bytes(p)} → {fmt_bytes(w)} ({'-' if d >= 0 else '+'}%{abs(d)})"
+        return f"zlib: gelen {side(self.wire_in, self.plain_in)}  giden {side(self.wire_out, self.plain_out)}"
+
+    def lines(self):
+        """v1: satırlar (bytes, '\n'siz); v2: çözülmüş çerçeveler (Message)."""
+        return self._messages() if self.frames else self._lines()
+
+    def _lines(self):
+        buf = self.buf
+        while True:
+            i = buf.find(b"\n", self.scan)
+            if i < 0:
+                self.scan = len(buf)
+                if len(buf) - self.pos > self.max_line:
+                    raise ValueError(f"satır çok uzun (>{self.max_line} bayt)")
+                return
+            line = bytes(memoryview(buf)[self.pos:i])
+            self.pos = self.scan = i + 1
+            yield line
+
+    def _messages(self):
+        # _spans() ile aynı döngü, çerçeve başına bir üreteç adımı az (sıcak yol)
+        buf, unpack, decode = self.buf, FRAME_HEAD.unpack_from, frame_message
+        with memoryview(buf) as view:       # tüketici yinelerken besleme yok: tampon büyümez
+            while True:
+                pos, avail = self.pos, self.end - self.pos
+                if avail < 4:
+                    self.want = 4 - avail; return
+                word, = unpack(buf, pos)
+                n = word & FRAME_MAX
+                if n > self.max_line:
+                    raise ValueError(f"çerçeve çok uzun ({n} > {self.max_line} bayt)")
+                if avail < 4 + n:
+                    self.want = 4 + n - avail; return
+                self.pos = pos + 4 + n
+                if word >> 24 == BODY: raise ValueError("sunucudan beklenmeyen BODY çerçevesi")
+                if not METRICS.on:
+                    yield decode(word >> 24, view[pos + 4:pos + 4 + n]); continue
+                t0 = time.perf_counter()
+                msg = decode(word >> 24, view[pos + 4:pos + 4 + n])
+                METRICS.observe("recv.decode", time.perf_counter() - t0)
+                yield msg
+
+    def frames_raw(self):
+        """v2: (tür, yük bytes) çiftleri; BODY dahil (sunucu tarafı)."""
+        for typ, a, b in self._spans():
+            yield typ, bytes(memoryview(self.buf)[a:b])
+
+    def _spans(self):
+        # tamamlanmış çerçeveler: (tür, yükün başı, sonu); tarama yok, başlık boyu söyler
+        buf, unpack = self.buf, FRAME_HEAD.unpack_from
+        while True:
+            pos, avail = self.pos, self.end - self.pos
+            if avail < 4:
+                self.want = 4 - avail; return
+            word, = unpack(buf, pos)
+            n = word & FRAME_MAX
+            if n > self.max_line:
+                raise ValueError(f"çerçeve çok uzun ({n} > {self.max_line} bayt)")
+            if avail < 4 + n:
+                self.want = 4 + n - avail; return
+            self.pos = pos + 4 + n
+            yield word >> 24, pos + 4, pos + 4 + n
+
+# ===== Sunucu satırları: ayrıştırma ve yönlendirme =====
+def parse_fields(text):
+    # tek geçişte key=value alanları
+    return dict(p.split("=", 1) for p in text.split() if "=" in p)
+
+class Message:
+    """Baştaki tür belirteci bir kez ayrılmış sunucu satırı.
+
+    "FILEURL from=a ..." → kind="FILEURL", rest="from=a ..."; ayraç ilk
+    ':' ya da boşluktur. line her zaman satırın tamamıdır, sub() ile
+    iç içe türlere (TKM:ROUND, CTRL:CLEAR) inilir.
+    """
+    __slots__ = ("line", "text", "kind", "end", "_fields")
+
+    def __init__(self, text, kind=None):
+        # kind verilmişse (handle_line ayırdı) yeniden bölünmez
+        if kind is None:
+            kind = text.partition(" ")[0]
+            if ":" in kind: kind = kind.partition(":")[0]
+        self.line = self.text = text
+        self.kind = kind
+        self.end = len(kind) + 1        # ayraçtan sonrası (ayraç yoksa rest boş)
+        self._fields = None
+
+    @property
+    def rest(self):
+        # çoğu işleyici gövdeye bakmaz; dilim ancak istenince alınır
+        return self.text[self.end:]
+
+    @property
+    def fields(self):
+        if self._fields is None: self._fields = parse_fields(self.rest)
+        return self._fields
+
+    def sub(self):
+        m = Message(self.text[self.end:])
+        m.line = self.line
+        return m
+
+    @classmethod
+    def typed(cls, line, kind, end, fields):
+        # v2 çerçevesinden: tür ve alanlar çerçevede hazır, yeniden bölünmez
+        m = cls.__new__(cls)
+        m.line = m.text = line
+        m.kind, m.end, m._fields = kind, end, fields
+        return m
+
+def as_message(raw):
+    """framer.lines() öğesi → Message (v1 bayt satırı ya da v2'de hazır Message)."""
+    if raw.__class__ is Message: return raw
+    return Message(raw.decode("utf-8", errors="replace").strip())
+
+class Dispatcher:
+    """Tür → işleyici tablosu (tek sözlük araması).
+
+    Yeni bir sunucu mesajı için döngüye dokunmadan işleyici kaydedilir:
+
+        @LINES.on("YENI")
+        def _yeni(msg, ui, transfers, meter): ...
+    """
+    def __init__(self, default):
+        self.table, self.default = {}, default
+
+    def on(self, *kinds):
+        def register(fn):
+            for k in kinds: self.table[k] = fn
+            return fn
+        return register
+
+    def __call__(self, msg, *args):
+        return self.table.get(msg.kind, self.default)(msg, *args)
+
+# ===== v2 çerçeveleri =====
+# İki taraf da CAPS'te "frame2" derse WELCOME'dan sonra (zlib de açıksa onun
+# içinde) satırlar yerine çerçeveler akar: 4 baytlık başlık (üst bayt tür,
+# alt 24 bit yük uzunluğu) ve yük. Her v1 satırı tek çerçevedir; bilinen
+# türler alanlarıyla taşınır (anahtar adları ve ayraçlar telde yok, boşluklu
+# dosya adları bozulmaz), gerisi LINE olarak metnin kendisi. Dosya gövdeleri
+# BODY çerçeveleridir. Tür tablosu protokolün parçasıdır; sırası değişirse
+# yetenek adı da değişmeli.
+FRAME_HEAD = struct.Struct(">I")
+FRAME_MAX = 0xFFFFFF
+FRAME_BUF = 1 << 16       # v2 alım tamponunun başlangıç boyu
+LINE, BODY = 0, 1
+FRAME_KINDS = (            # (baş, alanlar): alanlar None → başın ardındaki metin tek değer
+    ("FILEURL ", ("from", "name", "url")),
+    ("USERLIST:", None), ("JOIN:", None), ("PART:", None), ("NOTICE:", None),
+    ("PING ", None), ("PONG ", None),
+    ("FILE ", ("name", "size", "type")),
+    ("FILE2 ", ("id", "name", "size", "type", "hash")),
+    ("CHUNK ", ("id", "off", "len")),
+    ("FILE2:OFFSET ", ("id", "offset")),
+    ("FILE2:END ", ("id",)),
+    ("FILE2:ABORT ", ("id",)),
+)
+
+class FrameKind:
+    """Tablodaki bir tür: satır ↔ yük dönüşümü için önceden hesaplananlar."""
+    __slots__ = ("code", "head", "keys", "needles", "lens", "kind", "end")
+
+    def __init__(self, code, head, keys):
+        self.code, self.head, self.keys = code, head, keys
+        m = Message(head)
+        self.kind, self.end = m.kind, m.end
+        if keys:
+            self.needles = [f" {k}=" for k in keys[1:]]
+            self.lens = struct.Struct(f">{len(keys)}H")
+
+    def values(self, rest):
+        # "a=1 b=x y c=3" → ["1", "x y", "3"]: değer bir sonraki " anahtar="a kadar
+        first = self.keys[0] + "="
+        if not rest.startswith(first): return None
+        out, start = [], len(first)
+        for needle in self.needles:
+            i = rest.find(needle, start)
+            if i < 0: return None
+            out.append(rest[start:i]); start = i + len(needle)
+        out.append(rest[start:])
+        return out
+
+FRAME_TABLE = [None, None] + [FrameKind(i + 2, h, k) for i, (h, k) in enumerate(FRAME_KINDS)]
+FRAME_HEADS = {k.head: k for k in FRAME_TABLE[2:]}
+
+def frame_line(line):
+    """Tek v1 satırı (str, '\n'siz) → çerçeve baytları."""
+    sp = line.find(" ")
+    spec = FRAME_HEADS.get(line[:sp + 1]) if sp > 0 else None
+    if spec is None:
+        c = line.find(":")
+        spec = FRAME_HEADS.get(line[:c + 1]) if c > 0 else None
+    payload = None
+    if spec is not None:
+        rest = line[len(spec.head):]
+        if spec.keys is None: payload = rest.encode("utf-8")
+        elif (vals := spec.values(rest)) is not None:
+            vals = [v.encode("utf-8") for v in vals]
+            if max(map(len, vals)) <= 0xFFFF:
+                payload = spec.lens.pack(*map(len, vals)) + b"".join(vals)
+    if payload is None: spec, payload = None, line.encode("utf-8")
+    if len(payload) > FRAME_MAX: raise ValueError("satır çerçeveye sığmıyor")
+    return FRAME_HEAD.pack((spec.code if spec else LINE) << 24 | len(payload)) + payload
+
+def frame_lines(data):
+    # '\n' ile biten satır(lar) → çerçeveler; yazımlar hep bütün satırdır
+    text = data.decode("utf-8", errors="replace")
+    if text.endswith("\n"): text = text[:-1]
+    return b"".join([frame_line(line) for line in text.split("\n")])
+
+def body_head(n):
+    return FRAME_HEAD.pack(BODY << 24 | n)
+
+def body_frames(data):
+    view = memoryview(data)
+    return b"".join(body_head(len(view[i:i + FRAME_MAX])) + view[i:i + FRAME_MAX]
+                    for i in range(0, len(data), FRAME_MAX))
+
+def frame_message(typ, payload):
+    """Çerçeve yükü (bytes ya da memoryview) → Message; line v1 satırının aynısı."""
+    if typ == LINE: return Message(str(payload, "utf-8", "replace").strip())
+    spec = FRAME_TABLE[typ] if 1 < typ < len(FRAME_TABLE) else None
+    if spec is None: raise ValueError(f"bilinmeyen çerçeve türü: {typ}")
+    if spec.keys is None:
+        return Message.typed(spec.head + str(payload, "utf-8", "replace"), spec.kind, spec.end, None)
+    pos, vals = spec.lens.size, []
+    for n in spec.lens.unpack_from(payload):
+        vals.append(str(payload[pos:pos + n], "utf-8", "replace")); pos += n
+    line = spec.head + spec.keys[0] + "=" + vals[0] + "".join(map(str.__add__, spec.needles, vals[1:]))
+    return Message.typed(line, spec.kind, spec.end, dict(zip(spec.keys, vals)))
+
+# ===== TKM satırlarını Türkçeleştir =====
+TKM_VIEWS = Dispatcher(lambda m: m.line)
+
+@TKM_VIEWS.on("CHALLENGE")
+def _tkm_challenge(m):
+    return f"[TKM] Meydan okuma geldi: {m.fields.get('from', '?')}\n      Kabul: /tkm kabul  |  Red: /tkm red"
+
+@TKM_VIEWS.on("CONFIRM")
+def _tkm_confirm(m):
+    return "[TKM] Meydan okuma kabul edildi. Her turda /tkm seç tas|kagit|makas"
+
+@TKM_VIEWS.on("PROMPT")
+def _tkm_prompt(m):
+    return f"[TKM] Tur {m.fields.get('round', '?')} → /tkm seç tas|kagit|makas"
+
+@TKM_VIEWS.on("WAITING")
+def _tkm_waiting(m):
+    return "[TKM] Rakip seçimi bekleniyor…"
+
+@TKM_VIEWS.on("DECLINE")
+def _tkm_decline(m):
+    return f"[TKM] {m.fields.get('by', '?')} meydan okumayı reddetti."
+
+@TKM_VIEWS.on("CANCEL")
+def _tkm_cancel(m):
+    return f"[TKM] Oyun iptal edildi (by {m.fields.get('by', '?')})."
+
+@TKM_VIEWS.on("ROUND")
+def _tkm_round(m):
+    return f"[TKM Tur] {m.rest}".replace(" winner=", " kazanan=")
+
+@TKM_VIEWS.on("RESULT")
+def _tkm_result(m):
+    return f"[TKM Maç] {m.rest.replace('match', 'Maç')}".replace(" winner=", " kazanan=")
+
+@TKM_VIEWS.on("SKOR")
+def _tkm_skor(m):
+    return "[TKM] Skorlar: " + m.rest
+
+@TKM_VIEWS.on("INFO")
+def _tkm_info(m):
+    return "[TKM] " + m.rest
+
+@TKM_VIEWS.on("ERR")
+def _tkm_err(m):
+    return "[TKM:Hata] " + m.rest
+
+def render_tkm_line(line: str) -> str:
+    return TKM_VIEWS(Message(line).sub())
+
+# ===== Kullanıcı listesi =====
+class Presence:
+    """Odadaki kullanıcılar: sıralı küme (dict, ekleme sırası = gösterim sırası).
+
+    USERLIST tam listesi öncekiyle karşılaştırılır; JOIN/PART tek kişilik
+    farklardır. Hepsi (katılan, ayrılan) döndürür. (Yeniden) bağlanınca
+    gelen ilk liste sessiz uygulanır, yoksa herkes "katıldı" görünürdü.
+    """
+    def __init__(self):
+        self.names = {}
+        self.synced = False
+
+    def __len__(self):
+        return len(self.names)
+
+    def replace(self, users):
+        new = dict.fromkeys(users)
+        joined = [u for u in new if u not in self.names]
+        left = [u for u in self.names if u not in new]
+        self.names = new
+        if not self.synced:
+            self.synced = True
+            return [], []
+        return joined, left
+
+    def join(self, name):
+        if not name or name in self.names: return [], []
+        self.names[name] = None
+        return [name], []
+
+    def part(self, name):
+        if self.names.pop(name, False) is False: return [], []
+        return [], [name]
+
+    def window(self, top, n):
+        return list(itertools.islice(self.names, top, top + n))
+
+def presence_notice(joined, left):
+    if not joined and not left: return None
+    if len(joined) + len(left) > PRESENCE_NOTICE_MAX:
+        return f"[Sistem] {len(joined)} kişi katıldı, {len(left)} kişi ayrıldı"
+    return "\n".join([f"[Sistem] {u} katıldı" for u in joined] +
+                     [f"[Sistem] {u} ayrıldı" for u in left])
+
+# ===== Handshake =====
+def run_handshake(sock, framer, answer, show=None):
+    """Sunucunun sorularını answer(soru) ile yanıtlar; (WELCOME satırı, anlaşılan yetenekler).
+
+    soru: "USERNAME?", "ADMINKEY?" ya da "ACCEPT?". Soru dışındaki satırlar
+    (kurallar vb.) show() ile gösterilir.
+    """
+    caps = frozenset()
+    while True:
+        data = sock.recv(65536)
+        if not data: raise ConnectionError("Sunucudan veri gelmiyor.")
+        framer.feed(data)
+        for raw in framer.lines():
+            text = raw.decode("utf-8", errors="replace").strip()
+            up = text.upper()
+
+            if up.startswith("DENIED:"): raise ConnectionError(text)
+            if up.startswith("USERNAME?"):
+                sock.sendall((answer("USERNAME?") + "\n").encode("utf-8")); continue
+            if up.startswith("ADMINKEY?"):
+                sock.sendall((answer("ADMINKEY?") + "\n").encode("utf-8")); continue
+            if "ACCEPT?" in up:
+                sock.sendall((answer("ACCEPT?") + "\n").encode("utf-8")); continue
+            if up.startswith("CAPS:"):
+                offered = {c.strip().lower() for c in text.split(":", 1)[1].split(",")}
+                caps = frozenset(c for c in client_caps() if c in offered)
+                sock.sendall(("CAPS:" + ",".join(sorted(caps)) + "\n").encode("utf-8")); continue
+            if up.startswith("WELCOME "):
+                if "zlib" in caps: framer.compress()      # bundan sonrası deflate
+                if "frame2" in caps: framer.binary()      # ve/veya v2 çerçeveleri
+                return text, caps
+
+            if show: show(text)
@@ -0,0 +1,242 @@
+"""Bağlantı oturumu: yeniden bağlanma, keepalive, gönderim kuyruğu ve bağlantı ölçümleri."""
+import collections, random, socket, time
+
+from .config import (CONNECT_TIMEOUT, KEEPALIVE_INTERVAL, KEEPALIVE_MISSES, OUTBOX_MAX,
+                     RECONNECT_BASE, RECONNECT_MAX, RTT_WINDOW, SEND_COALESCE)
+from .metrics import METRICS, fmt_bytes
+from .protocol import LineFramer, WireSocket, run_handshake
+from .transports import sockopts_text
+
+class LinkMeter:
+    """PING/PONG gidiş-dönüş süreleri (kayan pencere) ve bayt sayaçları.
+
+    Sunucu CAPS'te "ping" sunarsa KEEPALIVE_INTERVAL'de bir "PING <n>"
+    gönderilir, "PONG <n>" ile ölçülür. Cevapsız ping KEEPALIVE_MISSES
+    aralığı aşarsa bağlantı ölü sayılır.
+    """
+    BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+    def __init__(self):
+        self.rtts = collections.deque(maxlen=RTT_WINDOW)
+        self.pending = {}           # seq → gönderim zamanı
+        self.seq = 0
+        self.last = None            # son RTT (sn)
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def ping_line(self):
+        self.seq += 1
+        self.pending[self.seq] = time.monotonic()
+        return f"PING {self.seq}"
+
+    def on_pong(self, text):
+        try: t = self.pending.pop(int(text.split()[1]))
+        except (IndexError, ValueError, KeyError): return None
+        self.pending.clear()        # daha eskiler de cevaplanmış sayılır
+        self.last = time.monotonic() - t
+        self.rtts.append(self.last)
+        return self.last
+
+    def overdue(self):
+        if not self.pending: return False
+        return time.monotonic() - min(self.pending.values()) > KEEPALIVE_INTERVAL * KEEPALIVE_MISSES
+
+    def percentiles(self):
+        s = sorted(self.rtts)
+        if not s: return None
+        pick = lambda q: s[min(len(s) - 1, int(q * len(s)))]
+        return pick(0.50), pick(0.95), pick(0.99)
+
+    def report(self, sock, framer=None, caps=frozenset()):
+        lines = ["[Ağ]"]
+        if "ping" not in caps:
+            lines.append("  RTT: sunucu PING desteklemiyor (yalnızca TCP keepalive)")
+        elif not self.rtts:
+            lines.append("  RTT: henüz ölçüm yok")
+        else:
+            p50, p95, p99 = self.percentiles()
+            lines.append(f"  RTT son {self.last * 1000:.1f} ms  p50 {p50 * 1000:.1f}  "
+                         f"p95 {p95 * 1000:.1f}  p99 {p99 * 1000:.1f} ms  (n={len(self.rtts)})")
+            counts = [0] * (len(self.BUCKETS_MS) + 1)
+            for r in self.rtts:
+                ms = r * 1000
+                counts[next((i for i, b in enumerate(self.BUCKETS_MS) if ms < b), -1)] += 1
+            labels = [f"<{b}" for b in self.BUCKETS_MS] + [f">={self.BUCKETS_MS[-1]}"]
+            lines.append("  ms: " + " ".join(f"{l}:{c}" for l, c in zip(labels, counts) if c))
+        lines.append(f"  gelen {fmt_bytes(self.bytes_in)}  giden {fmt_bytes(self.bytes_out)}")
+        if framer:
+            lines.append("  çerçeve: " + ("v2 (uzunluk önekli)" if framer.frames else "v1 (satır)"))
+            lines.append("  " + framer.ratio_text())
+        try: lines.append("  soket: " + sockopts_text(sock))
+        except (OSError, AttributeError): lines.append("  soket: bağlı değil")
+        return "\n".join(lines)
+
+class Outbox:
+    """Gönderim kuyruğu: sıralı satırlar, OUTBOX_MAX sınırı ve birleştirme sayaçları.
+
+    Kilidi sahibi tutar (SocketSender'da Condition, AsyncSender'da tek
+    döngü). Derinlik, satırlar hemen gidemezken durum satırında görünür.
+    """
+    def __init__(self, ui):
+        self.items = collections.deque()
+        self.ui = ui
+        self.peak = 0               # görülen en büyük derinlik
+        self.writes = self.lines = self.refused = 0
+        self.shown = False
+
+    def __len__(self):
+        return len(self.items)
+
+    def full(self):
+        return len(self.items) >= OUTBOX_MAX
+
+    def put(self, data):
+        self.items.append(data)
+        if len(self.items) > self.peak: self.peak = len(self.items)
+
+    def take(self):
+        # sıradaki en fazla SEND_COALESCE satır (tek yazım)
+        n = min(len(self.items), SEND_COALESCE)
+        return [self.items.popleft() for _ in range(n)]
+
+    def unget(self, batch):
+        self.items.extendleft(reversed(batch))
+
+    def sent(self, lines):
+        self.writes += 1; self.lines += lines
+        if METRICS.on:
+            METRICS.count("send.writes"); METRICS.count("send.lines", lines)
+
+    def refuse(self, text):
+        self.refused += 1
+        self.ui.say(f"[Hata] Gönderim kuyruğu dolu ({OUTBOX_MAX} satır); gönderilmedi: {text[:60]}")
+
+    def show(self):
+        if not self.items and not self.shown: return
+        self.shown = bool(self.items)
+        self.ui.set_status(f"✉ {len(self.items)} satır kuyrukta" if self.items else "", "queue")
+
+    def report(self):
+        avg = f"{self.lines / self.writes:.1f}" if self.writes else "-"
+        more = f", reddedilen {self.refused}" if self.refused else ""
+        return (f"gönderim kuyruğu: {len(self.items)}/{OUTBOX_MAX} satır (en çok {self.peak}{more})  "
+                f"{self.lines} satır {self.writes} yazımda (ort. {avg})")
+
+class Session:
+    """Sunucu bağlantısı: handshake cevapları, yeniden bağlanma ve sayaçlar.
+
+    Bağlantı koptuğunda motor, delay() kadar bekleyip reconnect_once()
+    dener; bu ilk handshake'te verilen cevapları (isim, kabul, PIN)
+    soru sormadan tekrar oynatır.
+    """
+    def __init__(self, transport):
+        self.transport = transport  # transports.TcpTransport, TunnelTransport …
+        self.sock = None
+        self.framer = None
+        self.caps = frozenset()     # bu bağlantıda anlaşılan yetenekler (run_handshake)
+        self.answers = {}           # handshake sorusu → kullanıcının cevabı
+        self.closing = False        # /quit: yeniden bağlanma yok
+        self.online = False
+        self.attempt = 0
+        self.reconnects = 0
+        self.down_since = None
+        self.last_down = None       # son kesintinin süresi (sn)
+        self.drop_reason = None
+        self.meter = LinkMeter()
+
+    def connect(self):
+        sock = self.transport.open(CONNECT_TIMEOUT)
+        sock.settimeout(None)
+        # WELCOME ile aynı pakette gelen satırlar kaybolmasın diye tek çerçeveleyici
+        self.sock, self.framer = sock, LineFramer()
+        self.online = True
+        return sock
+
+    def reconnect_once(self):
+        """Bağlanır ve handshake'i saklı cevaplarla oynatır (bloklar)."""
+        def replay(q):
+            if q not in self.answers:
+                raise ConnectionError(f"sunucu yeni bir soru sordu: {q}")
+            return self.answers[q]
+        sock = self.transport.open(CONNECT_TIMEOUT)
+        try:
+            framer = LineFramer()
+            welcome, caps = run_handshake(sock, framer, replay)
+        except BaseException:
+            sock.close(); raise
+        sock.settimeout(None)
+        self.sock, self.framer, self.caps = sock, framer, caps
+        return welcome
+
+    def wire(self):
+        """Gönderim soketi; zlib ya da v2 anlaşıldıysa pack()'ten geçiren sarmalayıcı."""
+        f = self.framer
+        return WireSocket(self.sock, f) if f.deflater or f.frames else self.sock
+
+    def delay(self):
+        # üstel geri çekilme, tam jitter
+        d = random.uniform(0, min(RECONNECT_MAX, RECONNECT_BASE * 2 ** self.attempt))
+        self.attempt += 1
+        return d
+
+    def drop(self, why):
+        """Canlı görünen ama ölü bağlantıyı keser; alım tarafı yeniden bağlanır."""
+        self.drop_reason = why
+        try: self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError: pass
+
+    def lost(self, ui, why):
+        why, self.drop_reason = self.drop_reason or why, None
+        self.meter.pending.clear()
+        self.online = False
+        self.down_since = time.monotonic()
+        self.attempt = 0
+        try: self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError: pass
+        try: self.sock.close()
+        except OSError: pass
+        ui.say(f"[Sistem] Bağlantı koptu ({why}); yeniden bağlanılıyor…")
+        self.update_status(ui)
+
+    def failed(self, ui, err):
+        ui.set_status(f"bağlantı yok: {self.attempt}. deneme başarısız ({err})", "net")
+
+    def restored(self, ui, welcome):
+        self.online = True
+        ui.resync_users()
+        self.reconnects += 1
+        self.last_down = time.monotonic() - self.down_since
+        ui.say(f"[Sistem] Yeniden bağlandı ({self.last_down:.1f} sn kesinti). {welcome}")
+        self.update_status(ui)
+
+    def update_status(self, ui):
+        if not self.online:
+            ui.set_status("bağlantı yok, yeniden deneniyor", "net")
+        elif self.reconnects:
+            ui.set_status(f"yeniden bağlanma: {self.reconnects}, son kesinti "
+                          f"{self.last_down:.1f} sn", "net")
+
+    def close(self):
+        self.closing = True
+        try: self.sock.close()
+        except OSError: pass
+        self.transport.close()      # istemcinin kurduğu ssh tüneli de kapanır
+
+    def keepalive_tick(self, out, ui):
+        """KEEPALIVE_INTERVAL'de bir çağrılır: ölü bağlantıyı keser, PING yollar."""
+        m = self.meter
+        if not self.online or self.closing: return
+        if out.upload and not out.upload.chunked:
+            # v1 dosya gövdesi akarken PING yazılamaz; bekleyen sayılmasın.
+            # upload2'de PING parçaların arasında gider, ölü bağlantı yakalanır.
+            m.pending.clear(); return
+        if m.overdue():
+            self.drop("keepalive yanıtı yok"); return
+        if "ping" in self.caps:
+            try: out.send_line(m.ping_line())
+            except OSError: pass
+
+def keepalive_loop(session, out, ui):
+    while not session.closing:
+        time.sleep(KEEPALIVE_INTERVAL)
+        session.keepalive_tick(out, ui)
@@ -0,0 +1,218 @@
+"""Taşıyıcılar: Session'ın bağlandığı yol (doğrudan TCP, tünel, süreç içi)."""
+import atexit, os, socket, threading, time
+
+from . import config
+from .config import (FILE_PORT, KEEPALIVE_IDLE, KEEPALIVE_INTERVAL, KEEPALIVE_MISSES,
+                     SSH_COMMAND, TUNNEL_ALIVE, TUNNEL_CHECK, TUNNEL_TIMEOUT)
+
+# ===== Soket ayarları =====
+def tune_socket(sock):
+    """TCP keepalive: sunucu PING bilmese de ölü bağlantı çekirdekte fark edilir.
+
+    Not: ssh -L tünelinde bu yalnızca yerel ssh sürecine kadarki bacağı
+    korur; uçtan uca canlılığı PING/PONG ölçer.
+
+    TCP_NODELAY bilerek açık: biriken satırları gönderici kendisi tek
+    yazımda birleştirir; Nagle yalnızca tek başına yazılan satırı (ya da
+    v2 BODY başlığını) bir önceki yazımın ACK'ine kadar bekletir.
+    """
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    try: sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except OSError: pass
+    for name, val in (("TCP_KEEPIDLE", KEEPALIVE_IDLE), ("TCP_KEEPINTVL", KEEPALIVE_INTERVAL),
+                      ("TCP_KEEPCNT", KEEPALIVE_MISSES)):
+        if hasattr(socket, name):
+            try: sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, name), val)
+            except OSError: pass
+
+SOCKOPTS = (("SOL_SOCKET", "SO_KEEPALIVE"), ("SOL_SOCKET", "SO_SNDBUF"),
+            ("SOL_SOCKET", "SO_RCVBUF"), ("IPPROTO_TCP", "TCP_NODELAY"),
+            ("IPPROTO_TCP", "TCP_KEEPIDLE"), ("IPPROTO_TCP", "TCP_KEEPINTVL"),
+            ("IPPROTO_TCP", "TCP_KEEPCNT"))
+
+def sockopts_text(sock):
+    out = []
+    for level, name in SOCKOPTS:
+        if not hasattr(socket, name): continue
+        try: out.append(f"{name}={sock.getsockopt(getattr(socket, level), getattr(socket, name))}")
+        except OSError: pass
+    return " ".join(out)
+
+# ===== Taşıyıcılar =====
+# Session yalnızca open(timeout) → bağlı soket ister; gerisi (handshake,
+# yeniden bağlanma, çerçeveleme) taşıyıcıdan bağımsızdır.
+class TcpTransport:
+    """Sunucuya doğrudan TCP bağlantısı."""
+    def __init__(self, host, port):
+        self.addr = (host, port)
+
+    def __str__(self):
+        return f"{self.addr[0]}:{self.addr[1]}"
+
+    def open(self, timeout):
+        sock = socket.create_connection(self.addr, timeout=timeout)
+        tune_socket(sock)
+        return sock
+
+    def close(self): pass
+
+class SshTunnel:
+    """İstemcinin sahip olduğu ssh -L tüneli: tek ControlMaster süreci.
+
+    ensure() her bağlanmadan önce çağrılır. Master yaşıyor ve
+    yönlendirilen portların hepsi yerelde bağlantı kabul ediyorsa bir şey
+    yapmaz; yoksa tüneli (yeniden) kurar ve portlar açılana kadar bekler.
+    Böylece ssh düşünce kopan bağlantıyı Session'ın yeniden bağlanma
+    döngüsü tüneli de kaldırarak geri getirir. Aynı hedefe başka bir
+    istemcinin master'ı açıksa o paylaşılır; close() yalnızca kendi
+    başlattığını kapatır.
+    """
+    def __init__(self, target, forwards, command=SSH_COMMAND):
+        import shlex
+        self.target = target
+        self.forwards = forwards            # [(yerel port, uzak port)], uzak uç sunucunun 127.0.0.1'i
+        self.ssh = shlex.split(command)
+        self.control = os.path.join(os.path.expanduser("~/.ssh"), "chatclient-%C")
+        self.proc = None                    # bizim başlattığımız master
+        self.log = None                     # ssh'in stderr'i (hata mesajı için)
+        self.starts = 0
+        self.lock = threading.Lock()
+
+    def __str__(self):
+        ports = ", ".join(str(l) for l, _ in self.forwards)
+        own = f"pid {self.proc.pid}" if self.proc else "paylaşılan master"
+        return f"ssh {self.target} -L {ports} ({own}, {max(0, self.starts - 1)} yeniden kurulum)"
+
+    def _cmd(self, *args):
+        return [*self.ssh, "-o", f"ControlPath={self.control}", *args, self.target]
+
+    def _run(self, *args):
+        import subprocess
+        try:
+            return subprocess.run(self._cmd(*args), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL, timeout=TUNNEL_TIMEOUT).returncode == 0
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+
+    def master_alive(self):
+        if self.proc: return self.proc.poll() is None
+        return self._run("-O", "check")
+
+    def ports_ok(self):
+        for local, _ in self.forwards:
+            try: socket.create_connection(("127.0.0.1", local), timeout=TUNNEL_CHECK).close()
+            except OSError: return False
+        return True
+
+    def _specs(self):
+        return [a for l, r in self.forwards for a in ("-L", f"{l}:127.0.0.1:{r}")]
+
+    def _start(self, alive):
+        import subprocess, tempfile
+        os.makedirs(os.path.dirname(self.control), mode=0o700, exist_ok=True)
+        if alive and not self.proc:
+            # başkasının master'ı: eksik yönlendirmeleri ona ekle
+            self._run("-O", "forward", *self._specs()); return
+        self._stop_own()
+        self.log = tempfile.TemporaryFile()
+        # BatchMode: parola sorusu curses'ın arkasında asılı kalmasın (anahtar gerekli)
+        self.proc = subprocess.Popen(
+            self._cmd("-N", "-M", "-o", "ControlPersist=no", "-o", "ExitOnForwardFailure=yes",
+                      "-o", "BatchMode=yes", "-o", f"ServerAliveInterval={TUNNEL_ALIVE}",
+                      "-o", "ServerAliveCountMax=3", *self._specs()),
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=self.log,
+            start_new_session=True)         # Ctrl-C istemciye gelir, ssh'e değil
+        if not self.starts: atexit.register(self.close)    # çökmede de yetim kalmasın
+        self.starts += 1
+
+    def _error(self):
+        try:
+            self.log.seek(0)
+            text = self.log.read().decode("utf-8", "replace").strip()
+        except (OSError, AttributeError): text = ""
+        return text.splitlines()[-1] if text else f"çıkış kodu {self.proc.returncode}"
+
+    def ensure(self):
+        with self.lock:
+            alive = self.master_alive()
+            if alive and self.ports_ok(): return
+            self._start(alive)
+            deadline = time.monotonic() + TUNNEL_TIMEOUT
+            while not self.ports_ok():
+                if self.proc and self.proc.poll() is not None:
+                    raise ConnectionError(f"ssh tüneli kurulamadı: {self._error()}")
+                if time.monotonic() > deadline:
+                    self._stop_own()
+                    raise ConnectionError(f"ssh tüneli {TUNNEL_TIMEOUT} sn içinde açılmadı")
+                time.sleep(0.1)
+
+    def _stop_own(self):
+        import subprocess
+        proc, self.proc = self.proc, None
+        if not proc: return
+        if proc.poll() is None:
+            proc.terminate()
+            try: proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                proc.kill(); proc.wait()
+        if self.log: self.log.close(); self.log = None
+
+    def close(self):
+        with self.lock: self._stop_own()
+
+class TunnelTransport(TcpTransport):
+    """ssh -L ile yerel porta açılmış sunucu (LAN istemcisi).
+
+    tunnel (SshTunnel) verilirse her bağlanmadan önce tünel denetlenir,
+    gerekirse yeniden kurulur; verilmezse elle açılmış tünel beklenir ve
+    bağlantı reddedilince hata bunu hatırlatır. Dosya linkleri de aynı
+    tünelden (127.0.0.1:8000) iner.
+    """
+    def __init__(self, port, host="127.0.0.1", tunnel=None):
+        super().__init__(host, port)
+        self.tunnel = tunnel
+
+    def __str__(self):
+        return f"{super().__str__()} ({self.tunnel or 'ssh tüneli'})"
+
+    def open(self, timeout):
+        if self.tunnel: self.tunnel.ensure()
+        try: return super().open(timeout)
+        except ConnectionRefusedError:
+            if self.tunnel: raise
+            raise ConnectionRefusedError(
+                f"{self} kapalı; tünel açık mı? "
+                f"ssh -N -L {self.addr[1]}:127.0.0.1:{self.addr[1]} chat@sunucu "
+                f"(ya da --ssh=kullanici@sunucu)") from None
+
+    def close(self):
+        if self.tunnel: self.tunnel.close()
+
+class InProcessTransport:
+    """Aynı süreçteki sunucu (testler): her bağlantı bir socketpair.
+
+    serve(sock) sunucu ucunu alır ve hemen dönmelidir (thread ya da
+    olay döngüsüne devreder).
+    """
+    def __init__(self, serve):
+        self.serve = serve
+
+    def __str__(self):
+        return "süreç içi"
+
+    def open(self, timeout):
+        ours, theirs = socket.socketpair()
+        self.serve(theirs)
+        ours.settimeout(timeout)
+        return ours
+
+    def close(self): pass
+
+def make_transport(host=None, port=None):
+    """Profil ve argv'ye göre taşıyıcı (config.TRANSPORT, config.SSH_TARGET)."""
+    host, port = host or config.SERVER_IP, port or config.SERVER_PORT
+    if config.SSH_TARGET:
+        tunnel = SshTunnel(config.SSH_TARGET, [(port, port), (FILE_PORT, FILE_PORT)])
+        return TunnelTransport(port, "127.0.0.1", tunnel)
+    if config.TRANSPORT == "tunnel": return TunnelTransport(port, host)
+    return TcpTransport(host, port)
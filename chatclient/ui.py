@@ -0,0 +1,757 @@
+"""curses arayüzü: sohbet ekranı, giriş satırı, tamamlama paneli, handshake."""
+import curses, locale, os, re, sys, threading, time
+
+from . import commands, config
+from .commands import run_command
+from .config import HISTORY_DB, METRICS_FILE, PREVIEW_MODE, RENDER_FPS, SCROLLBACK_LINES
+from .engine import SocketSender, recv_loop
+from .metrics import METRICS, make_lock
+from .paths import PATH_INDEX, path_candidates
+from .protocol import Presence, presence_notice, run_handshake
+from .session import Session, keepalive_loop
+from .transports import make_transport
+
+locale.setlocale(locale.LC_ALL, '')
+
+# ===== Yardımcılar =====
+def draw_box_ascii(win):
+    try: win.border('|','|','-','-','+','+','+','+')
+    except curses.error: pass
+
+def eat_escape_sequence(win):
+    try:
+        win.nodelay(True)
+        while True:
+            ch = win.getch()
+            if ch == -1: break
+    finally:
+        try: win.nodelay(False)
+        except: pass
+
+# ===== Kaydırma geçmişi =====
+class Scrollback:
+    """Sabit kapasiteli satır halkası.
+
+    Her kayıt (metin, sar) çiftidir: sar=False satırlar pencere
+    genişliğinde kesilir, sar=True (linkler) alt satıra sarılır. Sarma
+    çizim anında yapılır; bu yüzden boyut değişince içerik kaybolmaz.
+    Görünen alan yalnızca sondan `offset` kayıt yukarıdaki pencere
+    kadar satırı dolaşır, geçmişin boyundan bağımsızdır. offset en fazla
+    ilk sayfa dolu kalacak kadar büyür (max_offset); sınır son çizilen
+    pencerenin boyuyla (view) hesaplanır.
+    """
+    def __init__(self, cap):
+        self.cap = cap
+        self.ring = [None] * cap
+        self.start = 0          # en eski kaydın halkadaki yeri
+        self.count = 0
+        self.dropped = 0        # halkadan düşen toplam kayıt
+        self.nbytes = 0         # tutulan metinlerin yaklaşık bellek boyu
+        self.offset = 0         # sondan kaç kayıt yukarıdayız (0 = canlı)
+        self.floor = 0          # /cls: canlı görünüm bu mutlak kayıttan başlar
+        self.view = None        # son rows() çağrısının (yükseklik, genişlik)
+
+    def append(self, text, wrap=False):
+        if self.count == self.cap:
+            old = self.ring[self.start]
+            self.nbytes -= sys.getsizeof(old[0])
+            self.ring[self.start] = (text, wrap)
+            self.start = (self.start + 1) % self.cap
+            self.dropped += 1
+        else:
+            self.ring[(self.start + self.count) % self.cap] = (text, wrap)
+            self.count += 1
+        self.nbytes += sys.getsizeof(text)
+        if self.offset:     # yukarıdayken görünüm yerinde kalsın (düşen kayıt da olsa)
+            self.offset = min(self.offset + 1, self.top())
+
+    def prepend(self, entries):
+        # yalnızca boş yer kadar; en yeniler tutulur
+        entries = entries[max(0, len(entries) - (self.cap - self.count)):]
+        for text, wrap in reversed(entries):
+            self.start = (self.start - 1) % self.cap
+            self.ring[self.start] = (text, wrap)
+            self.nbytes += sys.getsizeof(text)
+        self.count += len(entries)
+        if self.floor: self.floor += len(entries)
+
+    def clear_view(self):
+        self.floor = self.dropped + self.count
+        self.offset = 0
+
+    def max_offset(self, height, width):
+        """En eski kayıtlardan dolan ilk sayfanın offset'i (sarılan satırlar sayılır)."""
+        n = 0
+        for i in range(self.count):
+            text, wrap = self.ring[(self.start + i) % self.cap]
+            n += -(-len(text) // width) if wrap and len(text) > width else 1
+            if n >= height: return self.count - 1 - i
+        return 0
+
+    def top(self):
+        return self.max_offset(*self.view) if self.view else max(0, self.count - 1)
+
+    def scroll(self, n):
+        self.offset = max(0, min(self.offset + n, self.top()))
+
+    def rows(self, height, width):
+        """Görünen alanın satırları (en fazla height adet, üstten alta)."""
+        self.view = height, width
+        if self.offset: self.offset = min(self.offset, self.max_offset(height, width))  # boyut değişmiş olabilir
+        lo = max(0, self.floor - self.dropped) if self.offset == 0 else 0
+        out = []
+        i = self.count - 1 - self.offset
+        while i >= lo and len(out) < height:
+            text, wrap = self.ring[(self.start + i) % self.cap]
+            if wrap and len(text) > width:
+                parts = [text[j:j + width] for j in range(0, len(text), width)]
+                out.extend(reversed(parts))
+            else:
+                out.append(text if len(text) <= width else text[:width])   # PreviewRow kimliği kalsın
+            i -= 1
+        out = out[:height]
+        out.reverse()
+        return out
+
+class PreviewRow(str):
+    """Önizlemenin bir satırı; sixel kipinde resmin hangi satırlara basılacağını taşır."""
+    def __new__(cls, text, preview, index):
+        row = super().__new__(cls, text)
+        row.preview, row.index = preview, index
+        return row
+
+# ===== Ekran =====
+def layout(maxy, maxx):
+    """(msg_h, user_w): mesaj alanı yüksekliği ve kullanıcı paneli genişliği."""
+    return maxy - 3, 24
+
+class ChatUI:
+    """Sohbet pencereleri.
+
+    Gelen satırlar hemen çizilmez, kuyruğa alınır; flush() kuyruğu
+    Scrollback'e ekler, yalnızca görünen alanı yeniden çizer ve
+    noutrefresh + doupdate ile tek fiziksel güncelleme yapar. flush()
+    saniyede en fazla RENDER_FPS kez çağrılır (thread motorunda render
+    thread'i, asyncio motorunda call_later).
+    """
+    def __init__(self, stdscr, msg_win, user_win, inp_win, lock):
+        self.stdscr = stdscr
+        self.msg_win, self.user_win, self.inp_win = msg_win, user_win, inp_win
+        self.lock = lock                    # curses erişimi
+        self.qlock = make_lock("queue")     # kuyruk erişimi
+        self.pending = []                   # (tür, metin)
+        self.pending_t0 = 0.0               # kuyruktaki en eski işin zamanı
+        self.history = Scrollback(SCROLLBACK_LINES)
+        self.archive = None                 # HistoryStore (log=True satırlar)
+        self.previews = None                # Previews (/preview, AUTO_PREVIEW)
+        self.sixels = ()                    # son karede basılan sixel'ler: (satır, önizleme)
+        self.overlay = None                 # açık tamamlama paneli (hep üstte çizilir)
+        self.presence = Presence()
+        self.users_top = 0                  # kullanıcı panelinde ilk görünen sıra
+        self.user_rows = []                 # panelde çizili satırlar (fark çizimi için)
+        self.latency = ""                   # kullanıcı paneli başlığında
+        self.users_dirty = False
+        self.users_full = True              # paneli baştan çiz (boyut, üstüne panel açıldı)
+        self.status = {"net": "", "upload": ""}  # giriş kutusu üst kenarındaki durum
+        self.status_dirty = False
+        self.view_dirty = False             # kaydırma / boyut değişimi
+        self.wake = lambda: None            # motorun flush zamanlayıcısı
+        self.last_flush = 0.0
+        # istatistik (/render)
+        self.n_queued = 0
+        self.n_frames = 0
+        self.flush_s = 0.0
+
+    def _queue(self, kind, text):
+        with self.qlock:
+            if not self.pending: self.pending_t0 = time.perf_counter()
+            self.pending.append((kind, text))
+            self.n_queued += 1
+        self.wake()
+
+    def say(self, text, log=False):
+        # satır başına pencere genişliğinde kesilir
+        self._queue("say", text)
+        if log and self.archive: self.archive.add("say", text)
+
+    def write(self, text, log=False):
+        # uzun satırlar (linkler) kesilmeden sarılır
+        self._queue("write", text)
+        if log and self.archive: self.archive.add("write", text)
+
+    def show_preview(self, pv):
+        self._queue("preview", pv)
+
+    def preview_width(self):
+        return self.msg_win.getmaxyx()[1] - 1
+
+    def preload(self, entries):
+        """Arşivden gelen eski satırları geçmişin başına ekler."""
+        with self.qlock:
+            self.history.prepend(entries)
+            self.view_dirty = True
+        self.wake()
+
+    def repaint(self):
+        """Mesaj ve kullanıcı panellerini bir sonraki karede baştan çizer."""
+        with self.qlock: self.view_dirty = self.users_dirty = self.users_full = True
+        self.wake()
+
+    def clear(self, note=None):
+        # geçmiş silinmez; PageUp ile hâlâ görülebilir
+        self._queue("clear", note)
+
+    def set_latency(self, text):
+        with self.qlock:
+            if text == self.latency: return
+            self.latency = text; self.users_dirty = True
+        self.wake()
+
+    def _presence(self, change, *args):
+        with self.qlock:
+            joined, left = change(*args)
+            self.users_dirty = True
+        note = presence_notice(joined, left)
+        if note: self.say(note)
+        else: self.wake()
+
+    def set_users(self, users):
+        self._presence(self.presence.replace, users)
+
+    def user_join(self, name):
+        self._presence(self.presence.join, name)
+
+    def user_part(self, name):
+        self._presence(self.presence.part, name)
+
+    def resync_users(self):
+        # yeniden bağlanınca gelen tam liste fark bildirimi üretmesin
+        with self.qlock: self.presence.synced = False
+
+    def set_status(self, text, part="upload"):
+        with self.qlock:
+            if text == self.status.get(part): return
+            self.status[part] = text; self.status_dirty = True
+        self.wake()
+
+    def draw_status(self):
+        # imleç giriş satırında kalsın diye konumu geri alınır
+        y, x = self.inp_win.getyx()
+        w = self.inp_win.getmaxyx()[1]
+        try:
+            self.inp_win.hline(0, 1, '-', w - 2)
+            status = " | ".join(t for t in self.status.values() if t)
+            if status: self.inp_win.addnstr(0, 2, f"[{status}]", w - 4)
+            self.inp_win.move(y, x)
+        except curses.error: pass
+
+    def special_key(self, ch):
+        """PageUp/PageDown/Home/End, Shift+↑/↓ (kullanıcılar) ve boyut değişimi."""
+        page = max(1, self.msg_win.getmaxyx()[0] - 1)
+        with self.qlock:
+            h = self.history
+            if ch in (curses.KEY_SR, curses.KEY_SF):
+                self.users_top += -1 if ch == curses.KEY_SR else 1
+                self.users_dirty = True
+            elif ch == curses.KEY_PPAGE: h.scroll(page)
+            elif ch == curses.KEY_NPAGE: h.scroll(-page)
+            elif ch == curses.KEY_HOME: h.scroll(h.count)
+            elif ch == curses.KEY_END: h.scroll(-h.count)
+            elif ch == curses.KEY_RESIZE: self.relayout()
+            else: return
+            self.view_dirty = True
+        self.wake()
+
+    def relayout(self):
+        with self.lock:
+            maxy, maxx = self.stdscr.getmaxyx()
+            msg_h, user_w = layout(maxy, maxx)
+            try:
+                self.msg_win.resize(msg_h, maxx - user_w); self.msg_win.mvwin(0, 0)
+                self.user_win.resize(msg_h, user_w); self.user_win.mvwin(0, maxx - user_w)
+                self.inp_win.resize(3, maxx); self.inp_win.mvwin(msg_h, 0)
+            except curses.error: pass
+            self.stdscr.erase(); self.stdscr.noutrefresh()
+            self.inp_win.erase(); draw_box_ascii(self.inp_win)
+        self.users_dirty = self.users_full = self.status_dirty = True
+
+    def _user_view(self):
+        """qlock altında: (satırlar, alt kenar yazısı); satır 0 başlıktır."""
+        rows = max(1, self.user_win.getmaxyx()[0] - 3)
+        n = len(self.presence)
+        self.users_top = max(0, min(self.users_top, n - rows))
+        head = f"Users {n}" + (f" ({self.latency})" if self.latency else "") + ":"
+        names = self.presence.window(self.users_top, rows)
+        below = n - self.users_top - len(names)
+        foot = f"{self.users_top}↑ {below}↓" if self.users_top or below else ""
+        return [head] + names + [""] * (rows - len(names)), foot
+
+    def _draw_users(self, view, full):
+        """Yalnızca değişen satırları yazar; full → çerçeveyle baştan çizer."""
+        rows, foot = view
+        w = self.user_win.getmaxyx()[1] - 3
+        old = self.user_rows
+        if full or len(old) != len(rows) + 1:
+            self.user_win.erase(); draw_box_ascii(self.user_win)
+            old = [None] * (len(rows) + 1)
+        try:
+            for i, text in enumerate(rows):
+                if old[i] != text:
+                    self.user_win.addnstr(i + 1, 2, text.ljust(w), w)
+            if old[-1] != foot:
+                h, bw = self.user_win.getmaxyx()
+                self.user_win.hline(h - 1, 1, '-', bw - 2)
+                if foot: self.user_win.addnstr(h - 1, 2, f"[{foot}]", bw - 4)
+        except curses.error: pass
+        self.user_rows = rows + [foot]
+
+    def _draw_messages(self, rows, offset):
+        h, w = self.msg_win.getmaxyx()
+        self.msg_win.erase()
+        for y, line in enumerate(rows):
+            try: self.msg_win.addstr(y, 0, line)
+            except curses.error: pass
+        if offset:
+            mark = f"[↑ {offset} satır yukarıdasınız — End: en alta]"
+            try: self.msg_win.addnstr(h - 1, 0, mark, w - 1, curses.A_REVERSE)
+            except curses.error: pass
+
+    def _paint_sixels(self, rows, redraw):
+        """curses karesinden sonra tamamı görünen önizlemelerin sixel'ini yer tutucu satırlara basar.
+
+        curses o hücreleri yer tutucu metinle dolu sanır; resim yalnızca
+        konumu değişince ya da pencere baştan çizilince yeniden yazılır.
+        """
+        shown = tuple((y, line.preview) for y, line in enumerate(rows)
+                      if isinstance(line, PreviewRow) and line.index == 0
+                      and y + len(line.preview.lines) <= len(rows))
+        if shown == self.sixels and not redraw: return
+        self.sixels = shown
+        data = "".join(f"\x1b7\x1b[{y + 1};1H{pv.sixel}\x1b8" for y, pv in shown)
+        if data:
+            try: os.write(sys.stdout.fileno(), data.encode("ascii"))
+            except OSError: pass
+
+    def flush(self):
+        with self.qlock:
+            ops, self.pending = self.pending, []
+            if ops and METRICS.on:      # alımdan ekrana gecikme
+                METRICS.observe("render.queue_delay", time.perf_counter() - self.pending_t0)
+            h = self.history
+            for kind, text in ops:
+                if kind == "say":
+                    for line in text.splitlines(): h.append(line)
+                elif kind == "write":
+                    for line in text.split("\n"): h.append(line, True)
+                elif kind == "preview":
+                    h.append(f"[Önizleme] {text.name} ({text.w}×{text.h})")
+                    for i, line in enumerate(text.lines): h.append(PreviewRow(line, text, i))
+                else:
+                    h.clear_view()
+                    if text: h.append(text)
+            rows = None
+            if ops or self.view_dirty:
+                mh, mw = self.msg_win.getmaxyx()
+                rows, offset = h.rows(mh, mw - 1), h.offset
+            users = self._user_view() if self.users_dirty else None
+            full, status, redraw = self.users_full, self.status_dirty, self.view_dirty
+            self.view_dirty = self.users_dirty = self.users_full = self.status_dirty = False
+        t0 = time.perf_counter()
+        with self.lock:
+            if rows is not None: self._draw_messages(rows, offset)
+            if users is not None: self._draw_users(users, full)
+            if status: self.draw_status()
+            # giriş penceresi en son: imleç giriş satırında kalsın
+            self.msg_win.noutrefresh(); self.user_win.noutrefresh()
+            if self.overlay:
+                self.overlay.touchwin(); self.overlay.noutrefresh()
+            self.inp_win.noutrefresh()
+            curses.doupdate()
+            if rows is not None and self.previews and self.previews.mode == "sixel":
+                self._paint_sixels(rows, redraw)
+        self.last_flush = time.monotonic()
+        self.n_frames += 1
+        self.flush_s += time.perf_counter() - t0
+        if METRICS.on: METRICS.observe("render.draw", time.perf_counter() - t0)
+
+    def start_render_thread(self):
+        ev = threading.Event()
+        self.wake = ev.set
+        def run():
+            while True:
+                ev.wait(); ev.clear()
+                self.flush()
+                time.sleep(1 / RENDER_FPS)
+        threading.Thread(target=run, name="render", daemon=True).start()
+
+    def attach_loop(self, loop):
+        handle = None
+        def fire():
+            nonlocal handle
+            handle = None
+            self.flush()
+        owner = threading.get_ident()
+        def wake():
+            nonlocal handle
+            if threading.get_ident() != owner:   # arka plan thread'i (örn. geçmiş yükleme)
+                try: loop.call_soon_threadsafe(wake)
+                except RuntimeError: pass       # döngü kapanmış
+                return
+            if handle is None:
+                delay = max(0.0, self.last_flush + 1 / RENDER_FPS - time.monotonic())
+                handle = loop.call_later(delay, fire)
+        self.wake = wake
+
+    def stats_text(self):
+        avg = self.flush_s / self.n_frames * 1000 if self.n_frames else 0.0
+        h = self.history
+        return (f"[Render] kuyruğa alınan: {self.n_queued}  çizilen kare: {self.n_frames}  "
+                f"ort. flush: {avg:.2f} ms  (en fazla {RENDER_FPS} kare/sn)\n"
+                f"[Geçmiş] {h.count}/{h.cap} satır, ~{h.nbytes // 1024} KiB, "
+                f"düşen: {h.dropped}" + (f"\n{self.previews.stats()}" if self.previews else ""))
+
+def start_previews(ui, out):
+    # PREVIEW_MODE=none değilse; dosyalar /get ile aynı HTTP havuzundan iner
+    if PREVIEW_MODE == "none": return
+    from .preview import Previews
+    ui.previews = Previews(ui, out.downloads.pool, ui.preview_width)
+
+# ===== Handshake =====
+def h_print(hand_top, lines):
+    hand_top.erase()
+    draw_box_ascii(hand_top)
+    maxy, maxx = hand_top.getmaxyx()
+    start = max(0, len(lines) - (maxy - 2))
+    y = 1
+    for line in lines[start:]:
+        try: hand_top.addnstr(y, 2, line, maxx - 4)
+        except curses.error: pass
+        y += 1
+        if y >= maxy - 1: break
+    hand_top.refresh()
+
+def h_input(hand_inp, prompt, secret=False):
+    curses.flushinp()
+    buf = ""
+    while True:
+        hand_inp.erase(); draw_box_ascii(hand_inp)
+        try:
+            hand_inp.addstr(1, 2, prompt)
+            if not secret:
+                hand_inp.addnstr(1, 2+len(prompt), buf, hand_inp.getmaxyx()[1]-len(prompt)-4)
+        except curses.error: pass
+        hand_inp.refresh()
+        ch = hand_inp.get_wch()
+        if not isinstance(ch, str): continue
+        if ch == "\x1b": eat_escape_sequence(hand_inp); continue
+        if ch == "\n":  return buf
+        elif ch in ("\x08", "\x7f", "\b"): buf = buf[:-1]
+        else: buf += ch
+
+HANDSHAKE_PROMPTS = {
+    "USERNAME?": ("Isminiz > ", False),
+    "ADMINKEY?": ("Admin PIN > ", True),
+    "ACCEPT?":   ("Kabul (OK/EXIT) > ", False),
+}
+
+def handshake(stdscr, session):
+    """İlk (etkileşimli) handshake; cevaplar yeniden bağlanma için saklanır."""
+    stdscr.erase(); stdscr.refresh()
+    maxy, maxx = stdscr.getmaxyx()
+    inp_h = 3
+    hand_top = curses.newwin(maxy - inp_h, maxx, 0, 0)
+    hand_inp = curses.newwin(inp_h, maxx, maxy - inp_h, 0)
+    hand_inp.keypad(True)
+    draw_box_ascii(hand_top); hand_top.refresh()
+    draw_box_ascii(hand_inp); hand_inp.refresh()
+
+    lines = []
+    def ask(q):
+        prompt, secret = HANDSHAKE_PROMPTS[q]
+        session.answers[q] = h_input(hand_inp, prompt, secret=secret)
+        return session.answers[q]
+    def show(text):
+        lines.append(text); h_print(hand_top, lines)
+
+    text, session.caps = run_handshake(session.sock, session.framer, ask, show)
+    hand_top.erase(); hand_top.refresh()
+    hand_inp.erase(); hand_inp.refresh()
+    stdscr.erase(); stdscr.refresh()
+    return text
+
+# ===== Tamamlama paneli (TAB destekli) =====
+class CompletionPanel:
+    """Giriş kutusunun üstünde açılan, tek pencereli aday listesi.
+
+    Pencere bir kez oluşturulur, yalnızca boyu/genişliği değiştiğinde
+    yeniden boyutlanır. Sadece görünen satırlar çizilir ve bir önceki
+    karede aynı olan satırlar atlanır; aday sayısı ne olursa olsun tek
+    adımın maliyeti panel yüksekliği kadardır. Seçim hep görünür alanda
+    tutulur; başlıkta "k/N" ve varsa filtre yazar.
+    """
+    def __init__(self, ui, inp_h=3):
+        self.ui, self.inp_h = ui, inp_h
+        self.win = None
+        self.names, self.full = [], []  # tüm adaylar (gösterilen ad, eklenecek metin)
+        self.view = []          # filtreden geçen aday indeksleri
+        self.sel = -1           # view içindeki seçim (-1: seçim yok)
+        self.top = 0            # görünen ilk satırın view içindeki yeri
+        self.filter = ""
+        self.shown = []         # ekrandaki satırlar (yeniden çizmemek için)
+        self.width = 0
+
+    @property
+    def active(self):
+        return bool(self.names)
+
+    def open(self, names, full):
+        self.names, self.full = names, full
+        self.filter = ""
+        self.view = range(len(names))
+        self.sel, self.top = -1, 0
+        self.width = 0
+        self.draw()
+
+    def close(self):
+        if not self.names: return
+        self.names, self.full, self.view = [], [], []
+        with self.ui.lock:
+            if self.win:
+                self.win.erase(); self.win.noutrefresh()
+            self.ui.overlay = None
+        self.ui.repaint()       # panelin altında kalan mesajlar geri gelsin
+
+    def current(self):
+        return self.full[self.view[self.sel]] if self.sel >= 0 else None
+
+    def move(self, step):
+        if not self.view: return
+        self.sel = (self.sel + step) % len(self.view) if self.sel >= 0 else (0 if step > 0 else len(self.view) - 1)
+        self.draw()
+
+    def narrow(self, text):
+        """Filtreyi değiştirir; uzayan filtre yalnızca mevcut görünümü eler."""
+        t = text.lower()
+        pat = re.compile(".*?".join(map(re.escape, t)))     # alt dizi eşleşmesi
+        base = self.view if t.startswith(self.filter.lower()) else range(len(self.names))
+        names = self.names
+        self.view = [i for i in base if pat.search(names[i].lower())]
+        self.filter = text
+        self.sel, self.top = (0 if self.view else -1), 0
+        self.draw()
+
+    def _geometry(self):
+        maxy, maxx = self.ui.stdscr.getmaxyx()
+        h = min(len(self.view) + 2, max(5, (maxy - self.inp_h) // 3))
+        h = max(3, min(h, maxy - self.inp_h))
+        # genişlik yalnızca görünen adaylardan; açıkken küçülmez (titreme olmasın)
+        visible = (self.names[i] for i in self.view[self.top:self.top + h - 2])
+        w = max((len(x) for x in visible), default=10) + 6
+        self.width = max(self.width, w, len(self._title()) + 6)
+        return h, min(self.width, maxx - 2), maxy - self.inp_h - h
+
+    def _title(self):
+        k = self.sel + 1 if self.sel >= 0 else "-"
+        title = f"{k}/{len(self.view)}"
+        if len(self.view) != len(self.names): title += f" of {len(self.names)}"
+        if self.filter: title += f"  filtre: {self.filter}"
+        return title
+
+    def draw(self):
+        if not self.names: return
+        moved = False
+        with self.ui.lock:
+            h, w, y = self._geometry()
+            rows = h - 2
+            if self.sel >= 0:     # seçimi görünür alana kaydır
+                if self.sel < self.top: self.top = self.sel
+                elif self.sel >= self.top + rows: self.top = self.sel - rows + 1
+            self.top = max(0, min(self.top, max(0, len(self.view) - rows)))
+            h, w, y = self._geometry()
+            try:
+                if self.win is None:
+                    self.win = curses.newwin(h, w, y, 0)
+                    self.shown = []
+                elif self.win.getmaxyx() != (h, w) or self.win.getbegyx() != (y, 0):
+                    self.win.erase(); self.win.noutrefresh()
+                    # önce köşeye: büyürken ekran dışına taşmasın
+                    self.win.mvwin(0, 0); self.win.resize(h, w); self.win.mvwin(y, 0)
+                    moved = True
+                    self.shown = []
+                if not self.shown:
+                    self.win.erase()
+                    self.win.border('|','|','-','-','+','+','+','+')
+                    self.shown = [None] * rows
+                self.win.hline(0, 1, '-', w - 2)
+                self.win.addnstr(0, 2, self._title(), w - 4)
+                for r in range(rows):
+                    j = self.top + r
+                    line = ""
+                    if j < len(self.view):
+                        line = ("> " if j == self.sel else "  ") + self.names[self.view[j]]
+                    if self.shown[r] == line: continue
+                    self.win.addnstr(r + 1, 2, line.ljust(w - 4), w - 4)
+                    self.shown[r] = line
+                self.win.noutrefresh()
+            except curses.error: pass
+            self.ui.overlay = self.win
+            self.ui.inp_win.noutrefresh()
+            curses.doupdate()
+        if moved: self.ui.repaint()     # eski alanın altı (kilit sırası: qlock → lock)
+
+# ===== Giriş satırı =====
+class InputLine:
+    """Giriş satırı tamponu ve /send TAB tamamlama durumu."""
+    def __init__(self, ui):
+        self.ui = ui
+        self.stdscr, self.win = ui.stdscr, ui.inp_win
+        self.buf = ""
+        self.prefix = "/send "          # tamamlanan komut ("/send --raw " de olabilir)
+        self.panel = CompletionPanel(ui)
+
+    def draw(self):
+        with self.ui.lock:
+            self.win.erase(); draw_box_ascii(self.win)
+            self.ui.draw_status()
+            try: self.win.addstr(1, 2, ">" + self.buf)
+            except curses.error: pass
+            self.win.noutrefresh(); curses.doupdate()
+
+    def reset_completion(self):
+        self.panel.close()
+
+    def complete(self):
+        # Yalnızca /send için tamamla
+        if not self.buf.startswith("/send"):
+            return
+        self.prefix = "/send --raw " if self.buf.startswith("/send --raw ") else "/send "
+        base = self.buf[len(self.prefix):]
+
+        # İlk TAB → adayları hesapla, ortak ön eki yaz, paneli aç
+        if not self.panel.active:
+            PATH_INDEX.poke()
+            cands_full, names = path_candidates(base)
+            if not names:
+                return
+            common = os.path.commonprefix(cands_full)
+            if common.startswith(base): self.buf = self.prefix + common
+            self.base = self.buf
+            self.panel.open(names, cands_full)
+        else:
+            # Sonraki TAB'lar → adaylar arasında dolaş
+            self.select(1)
+
+    def select(self, step):
+        self.panel.move(step)
+        chosen = self.panel.current()
+        self.buf = self.prefix + chosen if chosen else self.base
+
+    def special_key(self, ch) -> bool:
+        """Panel açıkken ↑/↓/Shift-TAB seçimi gezdirir; tüketildiyse True."""
+        if ch == curses.KEY_RESIZE: self.reset_completion()
+        if not self.panel.active: return False
+        if ch in (curses.KEY_UP, curses.KEY_BTAB): self.select(-1)
+        elif ch == curses.KEY_DOWN: self.select(1)
+        else: return False
+        return True
+
+    def key(self, ch) -> str | None:
+        """Tek tuşu işler; Enter'da girilen metni döndürür."""
+        if ch == "\x1b":  # ESC
+            eat_escape_sequence(self.win)
+            self.reset_completion()
+            return None
+        if ch == "\t":
+            self.complete()
+            return None
+        if self.panel.active and ch != "\n":
+            # panel açıkken yazılanlar adayları süzer (Backspace filtreyi siler)
+            if ch in ("\x08", "\x7f", "\b"):
+                if self.panel.filter: text = self.panel.filter[:-1]
+                else:
+                    self.reset_completion(); self.buf = self.buf[:-1]
+                    return None
+            else: text = self.panel.filter + ch
+            self.panel.narrow(text)
+            self.select(0)
+            return None
+        # TAB döngüsü dışındaki herhangi bir tuş state'i sıfırlar
+        self.reset_completion()
+        if ch == "\n":
+            text = self.buf.strip(); self.buf = ""
+            return text
+        if ch in ("\x08", "\x7f", "\b"):
+            self.buf = self.buf[:-1]
+        else:
+            self.buf += ch
+        return None
+
+# ===== MAIN =====
+def main(stdscr):
+    commands.load_last_url()
+
+    curses.curs_set(1); curses.noecho(); curses.cbreak()
+    stdscr.keypad(True); curses.mousemask(0)
+
+    session = Session(make_transport())
+    session.connect()
+    welcome_line = handshake(stdscr, session)
+
+    stdscr.erase(); stdscr.refresh()
+    maxy, maxx = stdscr.getmaxyx()
+    msg_h, user_w = layout(maxy, maxx)
+    msg_win = curses.newwin(msg_h, maxx - user_w, 0, 0)
+    user_win = curses.newwin(msg_h, user_w, 0, maxx - user_w)
+    inp_win  = curses.newwin(3, maxx, msg_h, 0)
+    inp_win.keypad(True)    # PageUp/PageDown/Home/End ve KEY_RESIZE
+    draw_box_ascii(user_win); user_win.addstr(1,2,"Users:"); user_win.refresh()
+    draw_box_ascii(inp_win);  inp_win.refresh()
+
+    ui = ChatUI(stdscr, msg_win, user_win, inp_win, make_lock("curses"))
+    inp = InputLine(ui)
+    ui.say(welcome_line)
+    PATH_INDEX.start()
+    archive = None
+    if HISTORY_DB:
+        from .history import open_history     # sqlite3 yalnızca gerekince
+        archive = open_history(ui)
+    if METRICS_FILE: METRICS.start_dump(os.path.expanduser(METRICS_FILE))
+
+    if config.ASYNC_ENGINE:
+        import asyncio
+        from .ui_async import async_main
+        try: asyncio.run(async_main(session, ui, inp))
+        finally:
+            ui.flush()
+            session.close()
+            if archive: archive.close()
+            if ui.previews: ui.previews.close()
+        return
+
+    ui.start_render_thread()
+    out = SocketSender(session, ui)
+    start_previews(ui, out)
+    threading.Thread(target=recv_loop, args=(session, ui, out), name="recv", daemon=True).start()
+    threading.Thread(target=keepalive_loop, args=(session, out, ui), name="keepalive", daemon=True).start()
+    threading.current_thread().name = "input"       # /stats kilit raporunda
+
+    while True:
+        inp.draw()
+        ch = inp_win.get_wch()
+        if ch == curses.KEY_BACKSPACE: ch = "\x7f"     # keypad açıkken Backspace
+        if not isinstance(ch, str):
+            if not inp.special_key(ch): ui.special_key(ch)
+            continue
+        text = inp.key(ch)
+        if text is None: continue
+        try:
+            if run_command(text, ui, out) == "quit": break
+        except BrokenPipeError:
+            ui.say("[Bağlantı koptu]")
+            break
+
+    session.closing = True
+    ui.flush()
+    session.close()
+    if archive: archive.close()
+    if ui.previews: ui.previews.close()
@@ -0,0 +1,95 @@
+"""--async motoru: alım, gönderim ve klavye tek asyncio döngüsünde (curses)."""
+import asyncio, curses, os, signal, sys
+
+from .aio import AsyncSender, async_reconnect, open_stream
+from .commands import run_command
+from .config import KEEPALIVE_INTERVAL
+from .engine import count_recv, process_line
+from .ui import start_previews
+
+async def async_main(session, ui, inp):
+    loop = asyncio.get_running_loop()
+    reader, writer = await open_stream(session)
+    out = AsyncSender(session, writer, ui)
+    start_previews(ui, out)
+    done = loop.create_future()
+
+    async def pump():
+        # bağlantı bitene kadar satırları işler; "kicked" ya da kopma nedeni
+        framer, meter = session.framer, session.meter
+        try:
+            while True:
+                for line in framer.lines():
+                    if not process_line(line, ui, out.transfers, meter):
+                        return "kicked"
+                data = await reader.read(65536)
+                if not data: return "sunucu kapattı"
+                meter.bytes_in += len(data)
+                count_recv(len(data))
+                framer.feed(data)
+        except Exception as e:
+            return str(e) or type(e).__name__
+
+    async def receive():
+        nonlocal reader, writer
+        while True:
+            why = await pump()
+            if session.closing: return
+            if why == "kicked":
+                out.kill(); writer.close(); return
+            writer.close()
+            session.lost(ui, why)
+            out.detach()
+            conn = await async_reconnect(session, ui)
+            if not conn: return
+            reader, writer, welcome = conn
+            session.restored(ui, welcome)
+            out.attach(writer)
+
+    def on_keys():
+        # stdin okunabilir → bekleyen tüm tuşları bloklamadan tüket
+        while not done.done():
+            try: ch = ui.inp_win.get_wch()
+            except curses.error: break
+            if ch == curses.KEY_BACKSPACE: ch = "\x7f"     # keypad açıkken Backspace
+            if not isinstance(ch, str):
+                if not inp.special_key(ch): ui.special_key(ch)
+                continue
+            text = inp.key(ch)
+            ui.inp_win.nodelay(True)    # ESC yutucusu nodelay'i kapatır
+            if text is None: continue
+            try:
+                if run_command(text, ui, out) == "quit":
+                    done.set_result(None)
+            except (BrokenPipeError, ConnectionError):
+                ui.say("[Bağlantı koptu]")
+                done.set_result(None)
+        inp.draw()
+
+    def on_resize():
+        # asyncio'nun işleyicisi ncurses'inkinin yerini alır; boyutu biz bildiririz
+        cols, lines = os.get_terminal_size(sys.__stdout__.fileno())
+        curses.resizeterm(lines, cols)      # kuyruğa KEY_RESIZE bırakır
+        on_keys()
+
+    ui.attach_loop(loop)
+    ui.inp_win.nodelay(True)
+    async def keepalive():
+        while True:
+            await asyncio.sleep(KEEPALIVE_INTERVAL)
+            session.keepalive_tick(out, ui)
+
+    recv_task = asyncio.ensure_future(receive())
+    ka_task = asyncio.ensure_future(keepalive())
+    loop.add_reader(sys.stdin.fileno(), on_keys)
+    if hasattr(signal, "SIGWINCH"):
+        loop.add_signal_handler(signal.SIGWINCH, on_resize)
+    inp.draw()
+    try:
+        await done
+    finally:
+        session.closing = True
+        loop.remove_reader(sys.stdin.fileno())
+        recv_task.cancel(); ka_task.cancel()
+        for t in list(out.tasks): t.cancel()
+        writer.close()
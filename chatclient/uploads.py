@@ -0,0 +1,313 @@
+"""Dosya gönderimi: yükleme kuyruğu, v1 ham akış ve upload2 parçaları."""
+import collections, os, threading, time
+
+from .config import OPTIMIZE_IMAGES, REPLY_TIMEOUT, SEND_BUF_SIZE, UPLOAD_SLICE, USE_SENDFILE
+from .metrics import METRICS
+from .protocol import WireSocket, parse_fields
+
+def file_header(path, name=None):
+    import mimetypes        # ilk gönderimde yüklenir; açılışı yavaşlatmasın
+    name  = name or os.path.basename(path)
+    size  = os.path.getsize(path)
+    ctype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    header = f"FILE name={name} size={size} type={ctype}\n\n"
+    return name, size, ctype, header.encode("utf-8")
+
+def send_buffered(sock, f, offset, count):
+    # tek tampon, her turda readinto ile yeniden kullanılır
+    buf = bytearray(min(SEND_BUF_SIZE, count)); view = memoryview(buf)
+    f.seek(offset)
+    sent = 0
+    while sent < count:
+        n = f.readinto(view[:count - sent])
+        if not n: break
+        sock.sendall(view[:n]); sent += n
+    return sent
+
+def stream_file(sock, f, offset, count):
+    """Dosyanın [offset, offset+count) aralığını yazar; gönderilen bayt sayısı."""
+    if USE_SENDFILE or isinstance(sock, WireSocket):     # sarmalayıcı gövdeyi kendisi çerçeveler
+        return sock.sendfile(f, offset, count)
+    return send_buffered(sock, f, offset, count)
+
+def fmt_eta(sec):
+    sec = int(sec)
+    return f"{sec // 60}:{sec % 60:02d}"
+
+def file_digest(path):
+    # BLAKE2b özeti; yeniden başlatmada dosyanın değişmediğini sunucu doğrular
+    import hashlib
+    h = hashlib.blake2b(digest_size=32)
+    buf = bytearray(SEND_BUF_SIZE); view = memoryview(buf)
+    with open(path, "rb") as f:
+        while n := f.readinto(buf): h.update(view[:n])
+    return h.hexdigest()
+
+class Upload:
+    """Kuyruktaki tek dosya ve ilerlemesi."""
+    def __init__(self, n, path):
+        self.id = n
+        self.path = self.source = path     # iyileştirilince path geçici kopyayı gösterir
+        self.name, self.size, self.ctype, self.header = file_header(path)
+        self.original = self.size
+        self.sent = 0
+        self.state = "sırada"       # hazırlanıyor | sırada | gönderiliyor | bitti | iptal | hata | yarıda
+        self.t0 = None
+        self.mark = None            # son dilimin bitişi (ölçüm)
+        self.base = 0               # bu oturumda gönderime başlanan konum
+        self.chunked = False        # upload2 (parçalı, devam ettirilebilir) kipi
+        self.digest = None
+        self.cancelled = False
+        self.error = None
+        self.done = None            # bitti/iptal/hata olunca done(up) (Client.send_file)
+
+    def replace(self, path, ext):
+        # küçültülmüş kopya gider: ad uzantısı, size= ve type= yeni dosyadan
+        self.path = path
+        name = os.path.splitext(self.name)[0] + ext
+        self.name, self.size, self.ctype, self.header = file_header(path, name)
+
+    def discard(self):
+        # geçici kopya; yarıda kalan upload2 devam edeceği için o durumda tutulur
+        if self.path != self.source:
+            try: os.remove(self.path)
+            except OSError: pass
+
+    @property
+    def key(self):
+        return self.digest[:16]
+
+    def restart_clock(self):
+        self.t0 = self.mark = time.monotonic(); self.base = self.sent
+
+    def chunked_header(self):
+        return (f"FILE2 id={self.key} name={self.name} size={self.size} "
+                f"type={self.ctype} hash=blake2b:{self.digest}\n").encode("utf-8")
+
+    def progress(self):
+        pct = self.sent * 100 // self.size if self.size else 100
+        if not self.t0: return f"{pct}%"
+        dt = max(time.monotonic() - self.t0, 1e-6)
+        rate = (self.sent - self.base) / dt
+        eta = (self.size - self.sent) / rate if rate else 0
+        return f"{pct}% {rate / 1e6:.1f} MB/s ETA {fmt_eta(eta)}"
+
+class Transfers:
+    """Yükleme kuyruğu: sıra, iptal, /uploads listesi ve durum satırı.
+
+    Gönderimi motorun işçisi (thread ya da asyncio görevi) yapar; bu
+    sınıf yalnızca kayıt tutar ve sunucunun FILE2: yanıtlarını bekleyen
+    işçiye iletir. Görseller önce media.Optimizer'dan geçer
+    ("hazırlanıyor"); hazır olunca kuyruğa girer ve on_ready() işçiyi
+    uyandırır. v1 kipinde dosya gövdesi ham akış olduğundan
+    gönderilmekte olan dosya yarıda kesilemez; upload2 kipinde parça
+    aralarında kesilebilir ve kopan gönderim "yarıda" kalıp yeni
+    bağlantıda sunucunun onayladığı konumdan sürer.
+    """
+    KEEP_DONE = 20      # listede tutulan bitmiş kayıt
+
+    def __init__(self, ui, meter):
+        self.ui, self.meter = ui, meter
+        self.lock = threading.Lock()
+        self.items = []             # tüm kayıtlar (sıralı)
+        self.queue = collections.deque()
+        self.active = None
+        self.next_id = 1
+        self.replies = {}           # upload2 id → sunucu yanıtını bekleyen Future
+        self.optimizer = None       # media.Optimizer, ilk görselde
+        self.on_ready = lambda: None    # hazırlanan dosya kuyruğa girdi (gönderici uyanır)
+
+    def add(self, path, raw=False):
+        """Dosyayı kuyruğa alır; raw=True ise görsel iyileştirme atlanır."""
+        if not path or not os.path.isfile(path):
+            self.ui.write(f"[Hata] Dosya yok: {path}")
+            return None
+        from . import media
+        with self.lock:
+            up = Upload(self.next_id, path); self.next_id += 1
+            self.items.append(up)
+            prepare = OPTIMIZE_IMAGES and not raw and media.wanted(path, up.size)
+            if prepare:
+                up.state = "hazırlanıyor"
+                if not self.optimizer: self.optimizer = media.Optimizer()
+            else: self.queue.append(up)
+        if prepare:
+            self.ui.write(f"[Yükleme #{up.id}] {up.name} küçültülüyor ({up.size} bayt)")
+            self.optimizer.submit(up, self.prepared)
+        else: self.ui.write(f"[Yükleme #{up.id}] {up.name} sıraya alındı ({up.size} bayt)")
+        self.update_status()
+        return up
+
+    def prepared(self, up, fut):
+        # Optimizer işçisinden: kopya hazırsa onu, değilse özgün dosyayı kuyruğa koyar
+        try: res, error = fut.result(), None
+        except Exception as e: res, error = None, e
+        with self.lock:
+            if res: up.replace(res[0], res[1])
+            if up.cancelled:
+                up.discard(); return
+            up.state = "sırada"; self.queue.append(up)
+        if res:
+            self.ui.write(f"[Yükleme #{up.id}] {up.name} sıraya alındı: {up.original} → {up.size} bayt "
+                          f"(-%{100 - up.size * 100 // up.original}, {res[2]})")
+        elif error:
+            self.ui.write(f"[Yükleme #{up.id}] {up.name} küçültülemedi ({error}); özgün dosya sıraya alındı")
+        else:
+            self.ui.write(f"[Yükleme #{up.id}] {up.name} sıraya alındı ({up.size} bayt, küçültme kazandırmadı)")
+        self.update_status()
+        self.on_ready()
+
+    def next(self):
+        with self.lock:
+            self.active = self.queue.popleft() if self.queue else None
+            if self.active:
+                self.active.state = "gönderiliyor"; self.active.restart_clock()
+            return self.active
+
+    def advance(self, up, n):
+        up.sent += n
+        self.meter.bytes_out += n
+        if METRICS.on:      # dilim başına gönderim süresi (sendfile/sendall)
+            now = time.monotonic()
+            METRICS.observe("upload.slice", now - up.mark); up.mark = now
+            METRICS.count("upload.bytes", n)
+        self.update_status()
+
+    def finish(self, up, error=None):
+        with self.lock:
+            if up.cancelled: up.state = "iptal"
+            elif error is None: up.state = "bitti"
+            elif up.chunked and isinstance(error, OSError): up.state = "yarıda"
+            else: up.state = "hata"
+            up.error = error
+            self.active = None
+            if up.state != "yarıda": up.discard()
+            done = [u for u in self.items if u.state in ("bitti", "iptal", "hata")]
+            for u in done[:-self.KEEP_DONE]: self.items.remove(u)
+        if up.state == "iptal": self.ui.write(f"[Yükleme #{up.id}] iptal edildi: {up.name}")
+        elif up.state == "yarıda":
+            self.ui.write(f"[Yükleme #{up.id}] {up.name} yarıda kaldı ({up.sent}/{up.size}); "
+                          "bağlantı gelince devam edecek")
+        elif error: self.ui.write(f"[Hata] Gönderim başarısız: {up.name}: {error}")
+        else: self.ui.write(f"[Gönderildi] {up.name} ({up.size} bayt, {up.ctype})")
+        self.update_status()
+        if up.done and up.state != "yarıda": up.done(up)
+
+    def requeue_interrupted(self):
+        """Yeni bağlantıda "yarıda" kalan upload2 gönderimlerini sıraya geri koyar."""
+        with self.lock:
+            back = [u for u in self.items if u.state == "yarıda"]
+            for u in back: u.state = "sırada"
+            self.queue.extendleft(reversed(back))
+        if back: self.update_status()
+        return len(back)
+
+    def cancel(self, n):
+        with self.lock:
+            up = next((u for u in self.items if u.id == n), None)
+            if up is None: return f"[Hata] #{n} numaralı yükleme yok."
+            if up is self.active:
+                if not up.chunked:
+                    return f"[Bilgi] #{n} şu an gönderiliyor; v1 sunucuda yarıda kesilemez."
+                up.cancelled = True
+                return f"[Yükleme #{n}] iptal ediliyor…"
+            if up.state not in ("sırada", "yarıda", "hazırlanıyor"): return f"[Bilgi] #{n} zaten {up.state}."
+            if up in self.queue: self.queue.remove(up)
+            if up.state != "hazırlanıyor": up.discard()
+            up.state = "iptal"; up.cancelled = True
+        self.update_status()
+        if up.done: up.done(up)
+        return f"[Yükleme #{n}] iptal edildi: {up.name}"
+
+    def abort_replies(self):
+        # bağlantı koptu: yanıt bekleyen işçi zaman aşımını beklemesin
+        with self.lock: pending, self.replies = self.replies, {}
+        for fut in pending.values():
+            if not fut.done(): fut.set_exception(ConnectionError("bağlantı koptu"))
+
+    def no_reply(self, up):
+        """FILE2'ye REPLY_TIMEOUT içinde yanıt gelmedi: bekleme kaydı silinir.
+
+        Bu bir kopma değildir (aynı sunucuda yeniden denemek aynı sessizliğe
+        çıkar); dönen hata yüklemeyi "yarıda" yerine "hata" ile bitirir.
+        """
+        with self.lock: self.replies.pop(up.key, None)
+        return RuntimeError(f"sunucu FILE2'ye {REPLY_TIMEOUT} sn içinde yanıt vermedi")
+
+    def expect(self, key):
+        import concurrent.futures
+        fut = concurrent.futures.Future()
+        with self.lock: self.replies[key] = fut
+        return fut
+
+    def on_reply(self, text):
+        # FILE2:OFFSET id=… offset=N  |  FILE2:ERR id=… <açıklama>
+        kind = text.split(None, 1)[0]
+        fields = parse_fields(text)
+        with self.lock: fut = self.replies.pop(fields.get("id"), None)
+        if kind == "FILE2:OFFSET" and fut:
+            try: fut.set_result(int(fields.get("offset", "0")))
+            except ValueError: fut.set_result(0)
+        elif kind == "FILE2:ERR":
+            msg = text.split(None, 2)[2] if len(text.split(None, 2)) > 2 else text
+            if fut: fut.set_exception(RuntimeError(msg))
+            else: self.ui.write(f"[Hata] Sunucu: {msg}")
+
+    def listing(self):
+        with self.lock: items = list(self.items)
+        if not items: return "[Bilgi] Yükleme yok."
+        lines = ["[Yüklemeler]"]
+        for u in items:
+            info = u.progress() if u.state == "gönderiliyor" else u.state
+            lines.append(f"  #{u.id} {u.name}  {info}")
+        return "\n".join(lines)
+
+    def update_status(self):
+        up = self.active
+        if not up:
+            prep = sum(u.state == "hazırlanıyor" for u in self.items)
+            text = f"↑ {len(self.queue)} sırada" if self.queue else ""
+            if prep: text = f"{text or '↑'} ({prep} hazırlanıyor)"
+            self.ui.set_status(text)
+            return
+        more = f" (+{len(self.queue)} sırada)" if self.queue else ""
+        self.ui.set_status(f"↑ #{up.id} {up.name} {up.progress()}{more}")
+
+def resume_offset(up, off):
+    # sunucunun onayladığı konum; anlamsızsa baştan
+    return off if 0 <= off <= up.size else 0
+
+def send_upload(sock, up, transfers):
+    sock.sendall(up.header)
+    with open(up.path, "rb") as f:
+        while up.sent < up.size:
+            n = stream_file(sock, f, up.sent, min(UPLOAD_SLICE, up.size - up.sent))
+            if not n: raise ConnectionError("dosya beklenenden kısa")
+            transfers.advance(up, n)
+
+def send_upload_chunked(sock, up, transfers, between):
+    """upload2: FILE2 başlığı, sunucudan devam konumu, CHUNK parçaları, FILE2:END.
+
+    between() her parçadan sonra çağrılır (bekleyen sohbet satırları).
+    """
+    import concurrent.futures
+    if not up.digest: up.digest = file_digest(up.path)
+    fut = transfers.expect(up.key)
+    sock.sendall(up.chunked_header())
+    try: off = fut.result(timeout=REPLY_TIMEOUT)
+    except concurrent.futures.TimeoutError:     # 3.11'de OSError: kopma sanılmasın
+        sock.sendall(f"FILE2:ABORT id={up.key}\n".encode("utf-8"))
+        raise transfers.no_reply(up) from None
+    up.sent = resume_offset(up, off)
+    up.restart_clock()
+    with open(up.path, "rb") as f:
+        while up.sent < up.size:
+            if up.cancelled:
+                sock.sendall(f"FILE2:ABORT id={up.key}\n".encode("utf-8")); return
+            n = min(UPLOAD_SLICE, up.size - up.sent)
+            sock.sendall(f"CHUNK id={up.key} off={up.sent} len={n}\n".encode("utf-8"))
+            if stream_file(sock, f, up.sent, n) != n:
+                raise ConnectionError("dosya beklenenden kısa")
+            transfers.advance(up, n)
+            between()
+    sock.sendall(f"FILE2:END id={up.key}\n".encode("utf-8"))
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""ssh taklidi (CHAT_SSH_COMMAND için): SshTunnel'in kullandığı kadarı.
+
+    -O check | exit | forward    ControlPath'teki master'a sorar
+    -N -M -L yerel:host:uzak …   master: yerel portları 127.0.0.1:uzak'a aktarır
+
+Master pid'ini ControlPath'e yazar, SIGTERM'de siler. Her çağrı
+SSH_STUB_LOG dosyasına bir satır ekler.
+"""
+import hashlib, os, signal, socket, sys, threading, time
+
+def parse(argv):
+    opts, forwards, op, target, i = {}, [], None, None, 0
+    while i < len(argv):
+        a = argv[i]
+        if a == "-o": k, v = argv[i + 1].split("=", 1); opts[k] = v; i += 2
+        elif a == "-O": op = argv[i + 1]; i += 2
+        elif a == "-L": forwards.append(argv[i + 1]); i += 2
+        elif a.startswith("-"): i += 1
+        else: target = a; i += 1
+    return opts, forwards, op, target
+
+def master_pid(path):
+    try:
+        pid = int(open(path).read())
+        os.kill(pid, 0)
+        return pid
+    except (OSError, ValueError):
+        return None
+
+def pipe(a, b):
+    try:
+        while data := a.recv(65536): b.sendall(data)
+    except OSError: pass
+    for s in (a, b):
+        try: s.shutdown(socket.SHUT_RDWR)
+        except OSError: pass
+
+def forward(srv, port):
+    while True:
+        c, _ = srv.accept()
+        try: u = socket.create_connection(("127.0.0.1", port))
+        except OSError:
+            c.close(); continue
+        threading.Thread(target=pipe, args=(c, u), daemon=True).start()
+        threading.Thread(target=pipe, args=(u, c), daemon=True).start()
+
+def main():
+    opts, forwards, op, target = parse(sys.argv[1:])
+    control = opts["ControlPath"].replace("%C", hashlib.sha1(target.encode()).hexdigest()[:16])
+    if os.environ.get("SSH_STUB_LOG"):
+        with open(os.environ["SSH_STUB_LOG"], "a") as log: print(os.getpid(), op or "master", *forwards, file=log)
+    if op == "check": sys.exit(0 if master_pid(control) else 255)
+    if op == "forward": sys.exit(0 if master_pid(control) else 255)
+    if op == "exit":
+        pid = master_pid(control)
+        if pid: os.kill(pid, signal.SIGTERM)
+        sys.exit(0 if pid else 255)
+    time.sleep(0.2)                     # gerçek ssh de portları hemen açmaz
+    for spec in forwards:
+        local, _, remote = spec.split(":")
+        srv = socket.socket()
+        srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try: srv.bind(("127.0.0.1", int(local)))
+        except OSError:
+            print(f"bind [127.0.0.1]:{local}: Address already in use", file=sys.stderr); sys.exit(255)
+        srv.listen()
+        threading.Thread(target=forward, args=(srv, int(remote)), daemon=True).start()
+    with open(control, "w") as f: f.write(str(os.getpid()))
+    def bye(*_):
+        try: os.remove(control)
+        except OSError: pass
+        os._exit(0)
+    signal.signal(signal.SIGTERM, bye)
+    while True: time.sleep(1)
+
+if __name__ == "__main__":
+    main()
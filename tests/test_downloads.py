@@ -0,0 +1,45 @@
+"""/get: paralel Range parçalarıyla inen dosya bayt bayt aynı birleşir.
+
+Dosya sunucusu loadtest.py'deki file_server'dır (http.server, keep-alive,
+tek aralıklı Range); istemci tarafı gerçek Downloads/HttpPool'dur.
+"""
+import os, random, sys, threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "chat_system_user")]
+
+import loadtest
+from chatclient import downloads
+from chatclient.downloads import Downloads
+
+def test_parallel_range_download_reassembles(tmp_path, monkeypatch):
+    served, saved = tmp_path / "sunucu", tmp_path / "indirilen"
+    served.mkdir()
+    part = 64 * 1024
+    data = random.Random(20).randbytes(4 * part + 777)     # son parça kısa: sınırlar kaymasın
+    (served / "video 1.bin").write_bytes(data)
+    monkeypatch.setattr(downloads, "DOWNLOAD_DIR", str(saved))
+    monkeypatch.setattr(downloads, "DOWNLOAD_MIN_PART", part)
+
+    server = loadtest.file_server(0, str(served))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/video%201.bin"
+    try:
+        ui = loadtest.HeadlessUI()
+        dls = Downloads(ui)
+        finished = threading.Event()
+        first = dls.add(url, done=lambda dl: finished.set())
+        assert finished.wait(20), "zaman aşımı"
+        assert first.state == "bitti", first.error
+        assert first.parts == 4 and first.got == len(data)
+        assert (saved / "video 1.bin").read_bytes() == data
+        assert sorted(os.listdir(saved)) == ["video 1.bin"]         # .part kalmadı
+
+        # ikinci indirme: havuzdaki bağlantılar yeniden kullanılır, ad çakışmaz
+        finished.clear()
+        second = dls.add(url, done=lambda dl: finished.set())
+        assert finished.wait(20) and second.state == "bitti", second.error
+        assert (saved / "video 1 (1).bin").read_bytes() == data
+        assert dls.pool.reused > 0
+    finally:
+        server.shutdown(); server.server_close()
@@ -0,0 +1,78 @@
+"""upload2 devamı: aktarım ortasında kopan bağlantıdan sonra kalınan yerden sürer.
+
+Sahte sunucu loadtest.py'deki serve_client'tır; yarım dosyalar Room'da
+durduğundan yeniden bağlanan istemci FILE2:OFFSET ile alınan baytları
+öğrenir. İstemci tarafı gerçek thread motorudur (SocketSender + recv_loop).
+"""
+import asyncio, os, random, socket, sys, threading, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "chat_system_user")]
+
+import loadtest
+from chatclient.config import UPLOAD_SLICE
+from chatclient.engine import SocketSender, recv_loop
+from chatclient.protocol import parse_fields
+from chatclient.session import Session
+from chatclient.transports import TcpTransport
+
+def start_server(room, caps):
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    async def listen():
+        return await asyncio.start_server(lambda r, w: loadtest.serve_client(r, w, room, caps),
+                                          "127.0.0.1", 0)
+    server = asyncio.run_coroutine_threadsafe(listen(), loop).result(5)
+    return loop, server, server.sockets[0].getsockname()[1]
+
+def wait_for(cond, timeout=20):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "zaman aşımı"
+        time.sleep(0.01)
+
+def test_resume_after_connection_killed_mid_transfer(tmp_path):
+    store = tmp_path / "sunucu"; store.mkdir()
+    src = tmp_path / "video.bin"
+    size = 8 * UPLOAD_SLICE + 12345
+    src.write_bytes(random.Random(7).randbytes(size))
+
+    room = loadtest.Room(str(store))
+    loop, server, port = start_server(room, "upload2,ping")
+    session = Session(TcpTransport("127.0.0.1", port))
+    session.answers = {"USERNAME?": "yukleyen", "ACCEPT?": "OK"}
+    session.reconnect_once(); session.online = True
+    ui = loadtest.HeadlessUI()
+    out = SocketSender(session, ui)
+    threading.Thread(target=recv_loop, args=(session, ui, out), daemon=True).start()
+    try:
+        offsets, after = [], []                 # FILE2:OFFSET yanıtları; kopmadan sonra giden gövde
+        on_reply, advance = out.transfers.on_reply, out.transfers.advance
+        def spy_reply(text):
+            if text.startswith("FILE2:OFFSET"): offsets.append(int(parse_fields(text)["offset"]))
+            on_reply(text)
+        def kill_midway(up, n):
+            advance(up, n)
+            if len(offsets) == 1 and up.sent >= 3 * UPLOAD_SLICE:
+                session.sock.shutdown(socket.SHUT_RDWR)     # tünel düştü
+            elif len(offsets) == 2: after.append(n)
+        out.transfers.on_reply, out.transfers.advance = spy_reply, kill_midway
+
+        out.send_file(str(src))
+        up = out.transfers.items[-1]
+        # sunucu END'de özeti doğrulayınca FILEURL yayınlar (tutmazsa FILE2:ERR)
+        wait_for(lambda: ("yukleyen", "video.bin") in ui.files or ui.errors)
+        assert not ui.errors and up.state == "bitti"
+
+        assert session.reconnects == 1
+        assert len(offsets) == 2 and offsets[0] == 0
+        resumed = offsets[1]
+        assert 0 < resumed < size                           # baştan değil, alınan yerden
+        assert resumed % UPLOAD_SLICE == 0                  # yalnızca tam gelen parçalar sayılır
+        assert sum(after) == size - resumed                 # ikinci bağlantıda yalnızca kalan gitti
+        assert (store / "video.bin").read_bytes() == src.read_bytes()
+        assert not room.uploads
+    finally:
+        session.closing = True
+        session.close()
+        loop.call_soon_threadsafe(server.close)
@@ -0,0 +1,71 @@
+"""SshTunnel: kurulum, master düşünce yeniden kurulum ve yalnızca kendi master'ını kapatma.
+
+ssh yerine ssh_stub.py koşar (CHAT_SSH_COMMAND'a verilecek taklit komut);
+yönlendirilen portların arkasında yerel yankı sunucuları vardır.
+"""
+import os, signal, socket, sys, threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from chatclient import transports
+from chatclient.transports import SshTunnel
+
+STUB = f"{sys.executable} {os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ssh_stub.py')}"
+
+def echo_server():
+    srv = socket.create_server(("127.0.0.1", 0))
+    def echo(c):
+        while data := c.recv(4096): c.sendall(data)
+    def serve():
+        while True:
+            threading.Thread(target=echo, args=(srv.accept()[0],), daemon=True).start()
+    threading.Thread(target=serve, daemon=True).start()
+    return srv.getsockname()[1]
+
+def free_port():
+    with socket.create_server(("127.0.0.1", 0)) as s: return s.getsockname()[1]
+
+def roundtrip(port, data=b"merhaba\n"):
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as c:
+        c.sendall(data)
+        return c.recv(4096)
+
+def test_tunnel_start_restart_and_close(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))           # ControlPath ~/.ssh altında
+    monkeypatch.setenv("SSH_STUB_LOG", str(tmp_path / "ssh.log"))
+    hooks = []
+    monkeypatch.setattr(transports.atexit, "register", hooks.append)
+    forwards = [(free_port(), echo_server()), (free_port(), echo_server())]
+
+    own = SshTunnel("chat@sunucu", forwards, STUB)
+    shared = SshTunnel("chat@sunucu", forwards, STUB)
+    try:
+        # kurulum: master açılır, iki port da karşıya ulaşır
+        own.ensure()
+        first = own.proc
+        assert first and first.poll() is None and own.starts == 1
+        assert all(roundtrip(local) == b"merhaba\n" for local, _ in forwards)
+        own.ensure()                                    # sağlıklıyken dokunmaz
+        assert own.proc is first and own.starts == 1
+
+        # master ölünce sıradaki ensure() yenisini kurar
+        first.send_signal(signal.SIGKILL); first.wait()
+        own.ensure()
+        assert own.proc is not first and own.proc.poll() is None and own.starts == 2
+        assert roundtrip(forwards[0][0]) == b"merhaba\n"
+        assert hooks == [own.close]                     # atexit yalnızca bir kez
+
+        # aynı hedefe açık master paylaşılır; paylaşanın close()'u ona dokunmaz
+        shared.ensure()
+        assert shared.proc is None and shared.starts == 0
+        shared.close()
+        assert own.master_alive() and roundtrip(forwards[1][0]) == b"merhaba\n"
+
+        # sahibi kapatınca master sonlanır, portlar kapanır
+        master = own.proc
+        own.close()
+        assert own.proc is None and master.poll() is not None
+        assert not shared.master_alive() and not own.ports_ok()
+    finally:
+        own.close(); shared.close()